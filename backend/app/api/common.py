@@ -0,0 +1,31 @@
+import math
+from fastapi import HTTPException, Request
+from ..core.admission import admission, AdmissionRejected
+from ..core.config_loader import ConfigLoader
+
+
+def rejected(e: AdmissionRejected) -> HTTPException:
+    """将准入控制的拒绝转换为携带Retry-After响应头的HTTP异常。"""
+    return HTTPException(status_code=e.status_code, detail=e.message,
+                         headers={"Retry-After": str(max(1, math.ceil(e.retry_after)))})
+
+def admit_client(request: Request, cost: int = 1):
+    """按客户端限流，超出限制时立即返回429。"""
+    try:
+        admission.check_client(request.client.host if request.client else None, cost)
+    except AdmissionRejected as e:
+        raise rejected(e)
+
+def resolve_output_format(requested, default: str) -> str:
+    """校验请求中指定的输出格式，未指定时使用配置文件中的输出格式。
+
+    可以用逗号分隔多个输出格式，一次爬取同时返回这些格式的内容。格式按名称排序去重，
+    使相同的格式组合共享结果缓存。
+    """
+    if requested is None:
+        return default
+    formats = sorted({name.strip() for name in requested.lower().split(",") if name.strip()})
+    invalid = [name for name in formats if name not in ConfigLoader.VALID_OUTPUT_FORMATS]
+    if invalid or not formats:
+        raise HTTPException(status_code=400, detail=f"Invalid output format: {requested}")
+    return ",".join(formats)
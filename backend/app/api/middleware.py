@@ -0,0 +1,242 @@
+import asyncio
+import time
+import zlib
+from typing import Optional
+from ..core.metrics import http_requests, http_request_seconds, http_response_bytes, stage_timer
+from ..dependencies import get_config_loader
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+def _add_vary(headers: list, field: bytes):
+    """把field合并到已有的Vary响应头中，没有Vary响应头时新增一个，已经包含field或为“*”时不做修改。"""
+    for index, (key, value) in enumerate(headers):
+        if key.lower() != b"vary":
+            continue
+        fields = [item.strip().lower() for item in value.split(b",")]
+        if field.lower() not in fields and b"*" not in fields:
+            headers[index] = (key, value + b", " + field if value.strip() else field)
+        return
+    headers.append((b"vary", field))
+
+
+def _route_template(scope) -> Optional[str]:
+    """获取请求匹配到的路由模板，包括include_router时添加的前缀。"""
+    route = scope.get("route")
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is None:
+        return None
+    path = scope["path"]
+    # 部分FastAPI版本中scope["route"]是未加前缀的原始路由，此时从请求路径中找出前缀
+    for index, char in enumerate(path):
+        if char == "/" and path_regex.match(path[index:]):
+            return path[:index] + route.path
+    return route.path
+
+
+class MetricsMiddleware:
+    """记录每个HTTP请求的数量、耗时与响应体字节数的ASGI中间件。
+
+    路径标签使用路由模板（例如/api/jobs/{job_id}），未匹配到路由的请求统一记为unmatched，避免标签数量无限增长。
+    流式响应的耗时从收到请求到最后一个分片发送完毕为止。
+    """
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message):
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            path = _route_template(scope) or "unmatched"
+            method = scope["method"]
+            http_requests.labels(method, path, str(status)).inc()
+            http_request_seconds.labels(method, path).observe(time.perf_counter() - started)
+            http_response_bytes.labels(path).observe(size)
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class _ZstdCompressor:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data) + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_FINISH)
+
+
+def _available_encodings() -> dict:
+    """当前环境可用的压缩算法，按服务端偏好排序，brotli和zstandard未安装时跳过。"""
+    encodings = {}
+    if zstandard is not None:
+        encodings["zstd"] = lambda settings: _ZstdCompressor(int(settings["zstd_level"]))
+    if brotli is not None:
+        encodings["br"] = lambda settings: _BrotliCompressor(int(settings["brotli_quality"]))
+    encodings["gzip"] = lambda settings: _GzipCompressor(int(settings["gzip_level"]))
+    return encodings
+
+
+ENCODINGS = _available_encodings()
+
+# 这些类型的响应体已经过压缩或压缩收益很小
+_INCOMPRESSIBLE_TYPES = ("image/", "video/", "audio/", "application/zip", "application/gzip", "application/octet-stream")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """根据Accept-Encoding请求头选择压缩算法，q值相同时按zstd、br、gzip的顺序优先。
+
+    Args:
+        accept_encoding (str): Accept-Encoding请求头的值。
+
+    Returns:
+        str: 选中的压缩算法，客户端不接受任何可用算法时返回None。
+    """
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if name:
+            weights[name] = weight
+    best, best_weight = None, 0.0
+    for name in ENCODINGS:
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+class CompressionMiddleware:
+    """按Accept-Encoding协商压缩响应体的ASGI中间件，支持gzip，安装brotli、zstandard后支持br和zstd。
+
+    小于minimum_size的完整响应不压缩；流式响应逐个分片压缩并立即刷新，客户端仍能及时收到每条记录。
+    较大的完整响应在线程中压缩，避免阻塞事件循环。配置从compression_config读取，修改后立即生效。
+    """
+    # 超过该字节数的完整响应体在线程中压缩
+    THREAD_THRESHOLD = 256 * 1024
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        settings = get_config_loader().snapshot.compression_config
+        accept_encoding = ""
+        for key, value in scope["headers"]:
+            if key == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+        encoding = negotiate_encoding(accept_encoding) if settings["enabled"] else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough
+            if message["type"] == "http.response.start":
+                headers = {key.lower(): value for key, value in message.get("headers", [])}
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                passthrough = (b"content-encoding" in headers or message["status"] in (204, 304)
+                               or content_type.startswith(_INCOMPRESSIBLE_TYPES))
+                if passthrough:
+                    await send(message)
+                else:
+                    # 等到第一个分片才能确定是否值得压缩
+                    start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start_message is not None:
+                if not more_body and len(body) < settings["minimum_size"]:
+                    passthrough = True
+                    await send(start_message)
+                    await send(message)
+                    return
+                compressor = ENCODINGS[encoding](settings)
+                headers = [(key, value) for key, value in start_message.get("headers", [])
+                           if key.lower() != b"content-length"]
+                headers.append((b"content-encoding", encoding.encode("latin-1")))
+                _add_vary(headers, b"Accept-Encoding")
+                if not more_body:
+                    data = await self._compress_all(compressor, body)
+                    headers.append((b"content-length", str(len(data)).encode("latin-1")))
+                    await send({**start_message, "headers": headers})
+                    await send({"type": "http.response.body", "body": data})
+                    return
+                await send({**start_message, "headers": headers})
+                start_message = None
+
+            data = compressor.compress(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_wrapper)
+
+    async def _compress_all(self, compressor, body: bytes) -> bytes:
+        """压缩完整的响应体。"""
+        with stage_timer("compression"):
+            if len(body) > self.THREAD_THRESHOLD:
+                return await asyncio.to_thread(lambda: compressor.compress(body) + compressor.finish())
+            return compressor.compress(body) + compressor.finish()
@@ -1,33 +1,435 @@
-from fastapi import APIRouter, Depends, HTTPException
-from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
-from ...core.crawler import main as crawl_main
-from ...dependencies import get_browser_config, get_crawler_config, get_output_format
-from ...models.schemas import CrawlResponse, CrawlRequest
+import json
+import time
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Iterator, List, Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from ...core.admission import admission, AdmissionRejected
+from ...core.browser_sessions import domain_sessions
+from ...core.config_loader import ConfigSnapshot
+from ...core.metrics import stage_timer
+from ...core.crawler import main as crawl_main, content_bytes, crawl_variants, iter_batch, HTML_OUTPUT_FORMATS
+from ...core.deep_crawl import iter_site
+from ...core.incremental import incremental
+from ...core.profiles import profile_factory
+from ...core.result_cache import result_cache
+from ...core.sinks import open_sink, ResultSink
+from ...core.single_flight import crawl_flights
+from ...dependencies import get_browser_config, get_config_snapshot, get_output_format, get_batch_config, get_stream_config, get_deep_crawl_config, get_profile_config, \
+    get_sink_config
+from ...models.schemas import CrawlResponse, CrawlRequest, BatchCrawlRequest, BatchCrawlResponse, BatchCrawlItem, SiteCrawlRequest, \
+    MarkdownProfile, VariantCrawlRequest, SinkRequest
 from ...utils.url_utils import URLUtils
+from ..common import admit_client, rejected, resolve_output_format
 
+if TYPE_CHECKING:
+    from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
 
-router = APIRouter()
 
-@router.get("/crawl", response_model=CrawlResponse)
+class TimedJSONResponse(JSONResponse):
+    """记录响应体序列化耗时的JSONResponse。"""
+    def render(self, content) -> bytes:
+        with stage_timer("serialization"):
+            return super().render(content)
+
+
+router = APIRouter(default_response_class=TimedJSONResponse)
+
+STREAM_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "sse": "text/event-stream",
+}
+
+def _apply_profile(snapshot: ConfigSnapshot, profile: Optional[MarkdownProfile]) -> "CrawlerRunConfig":
+    """取出应用了请求中内容过滤器与Markdown选项的爬虫运行配置，相同参数的配置只构建一次。"""
+    try:
+        return profile_factory.run_config(snapshot, profile)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _profiled_crawler_config(profile: MarkdownProfile = Depends(),
+                             snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> "CrawlerRunConfig":
+    """以查询参数的形式传入内容过滤器与Markdown选项，未传入时使用配置文件中的爬虫运行配置。"""
+    return _apply_profile(snapshot, profile)
+
+def _sink_output_format(output_format: str, sink: Optional[SinkRequest]) -> str:
+    """WARC输出保存页面的原始HTML，因此在请求的输出格式之外同时爬取html。"""
+    if sink is None or sink.format != "warc":
+        return output_format
+    return ",".join(sorted(set(output_format.split(",")) | {"html"}))
+
+def _open_sink(sink: Optional[SinkRequest], sink_config: dict, output_format: str, metadata: dict) -> Optional[ResultSink]:
+    """按请求打开结果输出文件，未请求输出文件时返回None。"""
+    if sink is None:
+        return None
+    if not sink_config["enabled"]:
+        raise HTTPException(status_code=403, detail="Output sinks are disabled")
+    try:
+        return open_sink(sink.format, sink.name, sink_config, {**metadata, "output_format": output_format})
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to open output files: {e}")
+
+def _without_content(response: CrawlResponse) -> CrawlResponse:
+    """结果已写入输出文件且请求不需要返回内容时，去掉响应中的页面内容。"""
+    return response.model_copy(update={"content": None, "contents": None})
+
+def _iter_records(url: str, response: CrawlResponse, chunk_size: int) -> Iterator[Dict]:
+    """将单个URL的爬取结果拆分为若干内容分片记录和一条结果记录，多个输出格式的分片带有format字段。"""
+    if response.contents is not None:
+        parts = response.contents.items()
+    else:
+        parts = ((None, response.content),)
+    chunk_size = max(1, int(chunk_size))
+    chunks = 0
+    for output_format, content in parts:
+        content = content or ""
+        for offset in range(0, len(content), chunk_size):
+            record = {"type": "chunk", "url": url, "index": chunks, "data": content[offset:offset + chunk_size]}
+            if output_format is not None:
+                record["format"] = output_format
+            yield record
+            chunks += 1
+    yield {"type": "result", "url": url, "success": response.success, "error_message": response.error_message,
+           "chunks": chunks, "unchanged": response.unchanged}
+
+def _encode_record(record: Dict, stream_format: str) -> str:
+    """按NDJSON或SSE格式编码一条记录。"""
+    with stage_timer("serialization"):
+        payload = json.dumps(record, ensure_ascii=False)
+    if stream_format == "sse":
+        return f"event: {record['type']}\ndata: {payload}\n\n"
+    return payload + "\n"
+
+async def _stream_batch(urls: List[str], errors: Dict[str, str], browser_config: "BrowserConfig",
+                        crawler_run_config: "CrawlerRunConfig", output_format: str, batch_config: dict,
+                        chunk_size: int, stream_format: str, max_age: Optional[float] = None,
+                        sink: Optional[ResultSink] = None, return_content: bool = True) -> AsyncIterator[str]:
+    """按URL完成顺序逐条产出编码后的记录，已发送的内容不在服务端保留。
+
+    指定了输出文件时，每个结果先写入输出文件再发送，最后产出一条sink记录说明写入的文件。
+    """
+    try:
+        for url, message in errors.items():
+            if sink is not None:
+                await sink.write(url, CrawlResponse(success=False, error_message=message), output_format)
+            yield _encode_record({"type": "result", "url": url, "success": False, "error_message": message, "chunks": 0}, stream_format)
+
+        async for index, response in iter_batch(
+            urls, browser_config, crawler_run_config, output_format,
+            max_concurrency=batch_config["max_concurrency"],
+            per_domain_concurrency=batch_config["per_domain_concurrency"],
+            max_age=max_age,
+        ):
+            if sink is not None:
+                await sink.write(urls[index], response, output_format)
+            for record in _iter_records(urls[index], response if return_content else _without_content(response), chunk_size):
+                yield _encode_record(record, stream_format)
+
+        if sink is not None:
+            summary = await sink.close()
+            yield _encode_record({"type": "sink", **summary.model_dump()}, stream_format)
+    finally:
+        # 客户端断开连接时，已缓冲的结果仍会写入输出文件
+        if sink is not None:
+            await sink.close()
+
+async def _stream_site(seed_url: str, browser_config: "BrowserConfig", crawler_run_config: "CrawlerRunConfig",
+                       output_format: str, settings: dict, chunk_size: int, stream_format: str,
+                       max_age: Optional[float] = None, sink: Optional[ResultSink] = None,
+                       return_content: bool = True) -> AsyncIterator[str]:
+    """按页面完成顺序逐条产出整站爬取的记录，指定了输出文件时产出一条sink记录，最后产出一条汇总记录。"""
+    pages = 0
+    total_bytes = 0
+    try:
+        async for url, depth, response in iter_site(seed_url, browser_config, crawler_run_config, output_format,
+                                                    settings, max_age):
+            pages += 1
+            total_bytes += content_bytes(response)
+            if sink is not None:
+                await sink.write(url, response, output_format, depth)
+            for record in _iter_records(url, response if return_content else _without_content(response), chunk_size):
+                if record["type"] == "result":
+                    record["depth"] = depth
+                yield _encode_record(record, stream_format)
+
+        if sink is not None:
+            summary = await sink.close()
+            yield _encode_record({"type": "sink", **summary.model_dump()}, stream_format)
+    finally:
+        if sink is not None:
+            await sink.close()
+
+    if pages >= settings["max_pages"]:
+        stopped_reason = "max_pages"
+    elif total_bytes >= settings["max_bytes"]:
+        stopped_reason = "max_bytes"
+    else:
+        stopped_reason = "completed"
+    yield _encode_record({"type": "summary", "pages": pages, "bytes": total_bytes, "stopped_reason": stopped_reason}, stream_format)
+
+def _raw_response(response: CrawlResponse, output_format: str) -> Response:
+    """直接返回页面内容，省去JSON包装和转义，爬取失败时返回502。"""
+    if not response.success:
+        raise HTTPException(status_code=502, detail=response.error_message or "Crawl failed")
+    media_type = "text/html" if output_format in HTML_OUTPUT_FORMATS or output_format == "fit_html" else "text/markdown"
+    headers = {}
+    if response.unchanged is not None:
+        headers["X-Crawl-Unchanged"] = str(response.unchanged).lower()
+    return Response(response.content or "", media_type=f"{media_type}; charset=utf-8", headers=headers)
+
+@router.get("/crawl", response_model=CrawlResponse, response_model_exclude={"links"})
 async def crawl(
+    http_request: Request,
     url: str, # 仅支持以查询参数的形式传入url
-    browser_config: BrowserConfig = Depends(get_browser_config), # 后端加载浏览器配置，前端无需传入
-    crawler_run_config: CrawlerRunConfig = Depends(get_crawler_config), # 后端加载爬虫运行配置，前端无需传入
+    max_age: Optional[float] = Query(None, ge=0), # 可接受的最大缓存时长（秒），0表示跳过缓存
+    requested_format: Optional[str] = Query(None, alias="output_format"), # 输出格式，多个格式以逗号分隔，未指定时使用配置文件中的格式
+    raw: bool = Query(False), # 为true时直接返回text/markdown或text/html内容，不包装为JSON
+    request_timeout: Optional[float] = Header(None, alias="X-Request-Timeout", gt=0), # 客户端可接受的最长排队时间（秒），越短越优先
+    browser_config: "BrowserConfig" = Depends(get_browser_config), # 后端加载浏览器配置，前端无需传入
+    crawler_run_config: "CrawlerRunConfig" = Depends(_profiled_crawler_config), # 后端加载爬虫运行配置，可通过查询参数覆盖内容过滤器与Markdown选项
     output_format: str = Depends(get_output_format) # 后端加载输出格式配置，前端无需传入
     ):
 
     try:
         # 验证并处理URL
-        processed_url = URLUtils.process_url(url)
+        with stage_timer("url_processing"):
+            processed_url = URLUtils.process_url(url)
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    output_format = resolve_output_format(requested_format, output_format)
+    if raw and "," in output_format:
+        raise HTTPException(status_code=400, detail="Raw responses support a single output format only")
+    admit_client(http_request)
 
     # 创建爬虫请求对象
-    request = CrawlRequest(url=processed_url, browser_config=browser_config, crawler_run_config=crawler_run_config, output_format=output_format)
+    deadline = None
+    if request_timeout is not None:
+        deadline = time.monotonic() + min(request_timeout, admission.queue_timeout)
+    request = CrawlRequest(url=processed_url, browser_config=browser_config, crawler_run_config=crawler_run_config, output_format=output_format, max_age=max_age, deadline=deadline)
     try:
         # 调用爬虫主函数
         response = await crawl_main(request)
-        return response
+    except AdmissionRejected as e:
+        # 队列已满或限流时快速失败，并告知客户端重试等待时间
+        raise rejected(e)
     except Exception as e:
         # 处理异常并返回错误信息
         raise HTTPException(status_code=500, detail=str(e))
+    if raw:
+        return _raw_response(response, output_format)
+    return response
+
+@router.post("/crawl/batch", response_model=BatchCrawlResponse)
+async def crawl_batch_urls(
+    http_request: Request,
+    body: BatchCrawlRequest, # 以JSON请求体的形式传入URL列表和可选的输出格式
+    browser_config: "BrowserConfig" = Depends(get_browser_config),
+    snapshot: ConfigSnapshot = Depends(get_config_snapshot),
+    output_format: str = Depends(get_output_format),
+    batch_config: dict = Depends(get_batch_config),
+    sink_config: dict = Depends(get_sink_config)
+    ):
+
+    if not body.urls:
+        raise HTTPException(status_code=400, detail="URL list must not be empty")
+    if len(body.urls) > batch_config["max_urls"]:
+        raise HTTPException(status_code=400, detail=f"At most {batch_config['max_urls']} URLs are allowed per batch")
+    output_format = _sink_output_format(resolve_output_format(body.output_format, output_format), body.sink)
+    crawler_run_config = _apply_profile(snapshot, body.markdown)
+    admit_client(http_request, len(body.urls))
+
+    # 一次性验证、处理并去重所有URL，无效URL直接作为失败结果返回
+    with stage_timer("url_processing"):
+        processed_urls, errors = URLUtils.process_urls(body.urls)
+    sink = _open_sink(body.sink, sink_config, output_format,
+                      {"kind": "batch", "urls": len(processed_urls), "config_version": snapshot.version})
+    results = [BatchCrawlItem(url=url, success=False, error_message=message) for url, message in errors.items()]
+    return_content = sink is None or body.sink.return_content
+
+    # 按完成顺序逐个写入输出文件，只保留转换后的结果条目，不在内存中同时持有整批爬取结果
+    items: List[Optional[BatchCrawlItem]] = [None] * len(processed_urls)
+    try:
+        if sink is not None:
+            for item in results:
+                await sink.write(item.url, CrawlResponse(success=False, error_message=item.error_message), output_format)
+        async for index, response in iter_batch(
+            processed_urls, browser_config, crawler_run_config, output_format,
+            max_concurrency=batch_config["max_concurrency"],
+            per_domain_concurrency=batch_config["per_domain_concurrency"],
+            max_age=body.max_age,
+        ):
+            if sink is not None:
+                await sink.write(processed_urls[index], response, output_format)
+            if not return_content:
+                response = _without_content(response)
+            items[index] = BatchCrawlItem(url=processed_urls[index], **response.model_dump())
+    finally:
+        summary = await sink.close() if sink is not None else None
+    results.extend(items)
+    return BatchCrawlResponse(results=results, sink=summary)
+
+@router.get("/crawl/stream")
+async def crawl_stream(
+    http_request: Request,
+    url: str, # 仅支持以查询参数的形式传入url
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"), # 流式返回格式
+    max_age: Optional[float] = Query(None, ge=0), # 可接受的最大缓存时长（秒）
+    requested_format: Optional[str] = Query(None, alias="output_format"), # 输出格式，多个格式以逗号分隔
+    browser_config: "BrowserConfig" = Depends(get_browser_config),
+    crawler_run_config: "CrawlerRunConfig" = Depends(_profiled_crawler_config),
+    output_format: str = Depends(get_output_format),
+    batch_config: dict = Depends(get_batch_config),
+    stream_config: dict = Depends(get_stream_config)
+    ):
+
+    try:
+        # 验证并处理URL
+        with stage_timer("url_processing"):
+            processed_url = URLUtils.process_url(url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    output_format = resolve_output_format(requested_format, output_format)
+    admit_client(http_request)
+
+    records = _stream_batch([processed_url], {}, browser_config, crawler_run_config, output_format,
+                            batch_config, stream_config["chunk_size"], stream_format, max_age)
+    return StreamingResponse(records, media_type=STREAM_MEDIA_TYPES[stream_format])
+
+@router.post("/crawl/stream")
+async def crawl_stream_batch(
+    http_request: Request,
+    body: BatchCrawlRequest,
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"), # 流式返回格式
+    browser_config: "BrowserConfig" = Depends(get_browser_config),
+    snapshot: ConfigSnapshot = Depends(get_config_snapshot),
+    output_format: str = Depends(get_output_format),
+    batch_config: dict = Depends(get_batch_config),
+    stream_config: dict = Depends(get_stream_config),
+    sink_config: dict = Depends(get_sink_config)
+    ):
+
+    if not body.urls:
+        raise HTTPException(status_code=400, detail="URL list must not be empty")
+    if len(body.urls) > batch_config["max_urls"]:
+        raise HTTPException(status_code=400, detail=f"At most {batch_config['max_urls']} URLs are allowed per batch")
+    output_format = _sink_output_format(resolve_output_format(body.output_format, output_format), body.sink)
+    crawler_run_config = _apply_profile(snapshot, body.markdown)
+    admit_client(http_request, len(body.urls))
+
+    with stage_timer("url_processing"):
+        processed_urls, errors = URLUtils.process_urls(body.urls)
+    sink = _open_sink(body.sink, sink_config, output_format,
+                      {"kind": "batch", "urls": len(processed_urls), "config_version": snapshot.version})
+    records = _stream_batch(processed_urls, errors, browser_config, crawler_run_config, output_format,
+                            batch_config, stream_config["chunk_size"], stream_format, body.max_age,
+                            sink, body.sink is None or body.sink.return_content)
+    return StreamingResponse(records, media_type=STREAM_MEDIA_TYPES[stream_format])
+
+@router.post("/crawl/site")
+async def crawl_site(
+    http_request: Request,
+    body: SiteCrawlRequest, # 以JSON请求体的形式传入起始URL和可选的爬取上限
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"), # 流式返回格式
+    browser_config: "BrowserConfig" = Depends(get_browser_config),
+    snapshot: ConfigSnapshot = Depends(get_config_snapshot),
+    output_format: str = Depends(get_output_format),
+    stream_config: dict = Depends(get_stream_config),
+    deep_crawl_config: dict = Depends(get_deep_crawl_config),
+    sink_config: dict = Depends(get_sink_config)
+    ):
+
+    try:
+        with stage_timer("url_processing"):
+            processed_url = URLUtils.process_url(body.url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    output_format = _sink_output_format(resolve_output_format(body.output_format, output_format), body.sink)
+    crawler_run_config = _apply_profile(snapshot, body.markdown)
+    admit_client(http_request)
+
+    # 请求中的上限只能收紧配置文件中的上限，不能放宽
+    settings = dict(deep_crawl_config)
+    for key in ("max_depth", "max_pages", "max_bytes"):
+        requested = getattr(body, key)
+        if requested is not None:
+            settings[key] = min(requested, deep_crawl_config[key])
+
+    sink = _open_sink(body.sink, sink_config, output_format, {
+        "kind": "site", "seed_url": processed_url, "max_depth": settings["max_depth"],
+        "max_pages": settings["max_pages"], "config_version": snapshot.version,
+    })
+    records = _stream_site(processed_url, browser_config, crawler_run_config, output_format,
+                           settings, stream_config["chunk_size"], stream_format, body.max_age,
+                           sink, body.sink is None or body.sink.return_content)
+    return StreamingResponse(records, media_type=STREAM_MEDIA_TYPES[stream_format])
+
+@router.post("/crawl/variants", response_model=CrawlResponse, response_model_exclude={"links"})
+async def crawl_variants_of_page(
+    http_request: Request,
+    body: VariantCrawlRequest, # 以JSON请求体的形式传入URL以及各个变体的内容过滤器与Markdown选项
+    browser_config: "BrowserConfig" = Depends(get_browser_config),
+    snapshot: ConfigSnapshot = Depends(get_config_snapshot),
+    output_format: str = Depends(get_output_format),
+    profile_config: dict = Depends(get_profile_config)
+    ):
+
+    if not body.variants:
+        raise HTTPException(status_code=400, detail="Variant list must not be empty")
+    if len(body.variants) > profile_config["max_variants"]:
+        raise HTTPException(status_code=400, detail=f"At most {profile_config['max_variants']} variants are allowed per request")
+    try:
+        with stage_timer("url_processing"):
+            processed_url = URLUtils.process_url(body.url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # 每个变体只需从缓存的工厂中取出对应的Markdown生成器，不重新解析配置文件
+    variants = {}
+    for name, variant in body.variants.items():
+        variant_format = resolve_output_format(variant.output_format, output_format)
+        if variant_format in HTML_OUTPUT_FORMATS or "," in variant_format:
+            raise HTTPException(status_code=400, detail=f"Variant {name} must use a single markdown output format")
+        try:
+            generator = profile_factory.markdown_generator(snapshot.data, variant)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        variants[name] = (generator, variant_format)
+    admit_client(http_request)
+
+    try:
+        return await crawl_variants(processed_url, browser_config, snapshot.crawler_run_config, variants, body.max_age)
+    except AdmissionRejected as e:
+        raise rejected(e)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/crawl/profiles")
+async def crawl_profile_stats():
+    # 返回请求级别过滤方案的构建与命中统计
+    return profile_factory.stats()
+
+@router.get("/crawl/cache")
+async def crawl_cache_stats():
+    # 返回结果缓存的命中统计与容量占用
+    return result_cache.stats()
+
+@router.get("/crawl/incremental")
+async def crawl_incremental_stats():
+    # 返回增量刷新的条件请求统计
+    return incremental.stats()
+
+@router.get("/crawl/sessions")
+async def crawl_session_stats():
+    # 返回按主机统计的资源拦截次数以及节省的耗时与字节数
+    return domain_sessions.stats()
+
+@router.get("/crawl/coalescing")
+async def crawl_coalescing_stats():
+    # 返回并发相同请求的合并统计
+    return crawl_flights.stats()
+
+@router.get("/crawl/admission")
+async def crawl_admission_stats():
+    # 返回准入控制的当前状态与拒绝统计
+    return admission.stats()
@@ -0,0 +1,24 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+from ...core.crawler_pool import pool_manager
+from ...core.readiness import readiness
+from ...core.worker_supervisor import worker_supervisor
+
+
+router = APIRouter()
+
+
+@router.get("/health")
+async def health():
+    # 存活检查：服务已开始接受请求即返回成功，不等待crawl4ai导入和浏览器预热
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+async def ready():
+    # 就绪检查：预热全部完成后返回200，否则返回503和各阶段的状态
+    status = readiness.status()
+    pool = pool_manager.current
+    status["browsers"] = {"idle": pool.idle, "in_use": pool.in_use, "size": pool.size} if pool is not None else None
+    status["workers"] = worker_supervisor.alive if worker_supervisor.enabled else None
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
@@ -0,0 +1,57 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request
+from ...core.job_worker import job_workers
+from ...core.metrics import stage_timer
+from ...dependencies import get_output_format, get_job_config
+from ...models.schemas import JobCreateRequest, JobResponse
+from ...utils.url_utils import URLUtils
+from ..common import admit_client, resolve_output_format
+
+
+router = APIRouter()
+
+def _get_store():
+    """获取任务队列，任务功能未启动时返回503。"""
+    if job_workers.store is None:
+        raise HTTPException(status_code=503, detail="Job queue is not available")
+    return job_workers.store
+
+@router.post("/jobs", response_model=JobResponse, status_code=202)
+async def create_job(
+    http_request: Request,
+    body: JobCreateRequest, # 以JSON请求体的形式传入url和可选的输出格式
+    output_format: str = Depends(get_output_format),
+    job_config: dict = Depends(get_job_config)
+    ):
+
+    try:
+        # 验证并处理URL
+        with stage_timer("url_processing"):
+            processed_url = URLUtils.process_url(body.url)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    output_format = resolve_output_format(body.output_format, output_format)
+    admit_client(http_request)
+
+    # 任务写入持久化队列后立即返回，由后台工作者执行爬取
+    job = await asyncio.to_thread(_get_store().create, processed_url, output_format, body.max_age,
+                                  int(job_config["max_attempts"]))
+    return JobResponse(**job)
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_job(job_id: str):
+    job = await asyncio.to_thread(_get_store().get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return JobResponse(**job)
+
+@router.delete("/jobs/{job_id}", response_model=JobResponse)
+async def cancel_job(job_id: str):
+    store = _get_store()
+    if not await asyncio.to_thread(store.cancel, job_id):
+        job = await asyncio.to_thread(store.get, job_id)
+        if job is None:
+            raise HTTPException(status_code=404, detail="Job not found")
+        raise HTTPException(status_code=409, detail=f"Job is already {job['status']}")
+    job_workers.cancel_local(job_id)
+    return JobResponse(**await asyncio.to_thread(store.get, job_id))
@@ -0,0 +1,65 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from ...core.admission import admission
+from ...core.crawler_pool import pool_manager
+from ...core.metrics import registry, CallbackMetric
+from ...core.result_cache import result_cache
+from ...core.single_flight import crawl_flights
+
+
+router = APIRouter()
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _pool_occupancy() -> dict:
+    """当前浏览器池中租借中和空闲的浏览器数量。"""
+    pool = pool_manager.current
+    if pool is None:
+        return {}
+    return {("in_use",): pool.in_use, ("idle",): pool.idle, ("size",): pool.size}
+
+
+def _cache_lookups() -> dict:
+    """结果缓存按命中层级统计的查找次数。"""
+    stats = result_cache.stats()
+    return {("memory_hit",): stats["memory_hits"], ("disk_hit",): stats["disk_hits"], ("miss",): stats["misses"]}
+
+
+def _cache_bytes() -> dict:
+    """结果缓存各层占用的字节数。"""
+    stats = result_cache.stats()
+    return {("memory",): stats["memory_bytes"], ("disk",): stats["disk_bytes"]}
+
+
+def _admission_rejections() -> dict:
+    """准入控制按原因统计的拒绝次数。"""
+    stats = admission.stats()
+    return {(key[len("rejected_"):],): value for key, value in stats.items() if key.startswith("rejected_")}
+
+
+# 以下指标在抓取时从各模块已有的统计中读取，不在热路径上额外计数
+registry.register(CallbackMetric(
+    "crawler_in_flight_crawls", "正在执行的爬取数量", "gauge", lambda: {(): admission.stats()["in_flight"]}))
+registry.register(CallbackMetric(
+    "crawler_admission_queue_length", "等待爬取名额的请求数量", "gauge",
+    lambda: {(): admission.stats()["queue_length"]}))
+registry.register(CallbackMetric(
+    "crawler_admission_rejections", "准入控制拒绝的请求数", "counter", _admission_rejections, ("reason",)))
+registry.register(CallbackMetric(
+    "crawler_browser_pool", "浏览器池占用情况", "gauge", _pool_occupancy, ("state",)))
+registry.register(CallbackMetric(
+    "crawler_result_cache_lookups", "结果缓存查找次数", "counter", _cache_lookups, ("result",)))
+registry.register(CallbackMetric(
+    "crawler_result_cache_hit_ratio", "结果缓存命中率", "gauge", lambda: {(): result_cache.stats()["hit_rate"]}))
+registry.register(CallbackMetric(
+    "crawler_result_cache_bytes", "结果缓存占用的字节数", "gauge", _cache_bytes, ("tier",)))
+registry.register(CallbackMetric(
+    "crawler_coalesced_requests", "被合并到进行中爬取的请求数", "counter",
+    lambda: {(): crawl_flights.stats()["coalesced"]}))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    # 以Prometheus文本格式导出指标
+    return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,268 @@
+import asyncio
+import heapq
+import itertools
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+
+class AdmissionRejected(Exception):
+    """请求未被准入时抛出的异常，携带应返回的HTTP状态码和建议的重试等待时间。"""
+    def __init__(self, status_code: int, retry_after: float, message: str):
+        """初始化AdmissionRejected实例。
+
+        Args:
+            status_code (int): HTTP状态码，429表示限流，503表示服务繁忙。
+            retry_after (float): 建议客户端等待的秒数。
+            message (str): 错误信息。
+        """
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.message = message
+
+
+class TokenBucket:
+    """令牌桶，按固定速率补充令牌，容量决定允许的突发数量。"""
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float):
+        """初始化TokenBucket实例。
+
+        Args:
+            rate (float): 每秒补充的令牌数。
+            capacity (float): 令牌桶容量。
+        """
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        """按经过的时间补充令牌。"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_take(self, cost: float = 1) -> float:
+        """尝试取出令牌。
+
+        Args:
+            cost (float): 需要的令牌数。
+
+        Returns:
+            float: 取出成功时返回0，否则返回令牌足够前需要等待的秒数。
+        """
+        self._refill(time.monotonic())
+        if self.tokens >= cost:
+            self.tokens -= cost
+            return 0.0
+        return (cost - self.tokens) / self.rate
+
+    def reserve(self) -> float:
+        """预留一个令牌，令牌不足时允许透支。
+
+        Returns:
+            float: 预留的令牌可用前需要等待的秒数。
+        """
+        self._refill(time.monotonic())
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def cancel_reservation(self):
+        """归还一个预留但未使用的令牌。"""
+        self.tokens = min(self.capacity, self.tokens + 1)
+
+    @property
+    def idle(self) -> bool:
+        """令牌桶已满，即长时间未被使用。"""
+        self._refill(time.monotonic())
+        return self.tokens >= self.capacity
+
+
+class AdmissionController:
+    """爬取请求的准入控制：限制同时进行的爬取数量，超出时进入按截止时间排序的有界队列，
+    并通过按客户端和按目标域名的令牌桶进行限流。"""
+    MAX_BUCKETS = 10000
+
+    def __init__(self):
+        self.max_in_flight = 8
+        self.max_queue = 64
+        self.queue_timeout = 30
+        self.client_rate = 0
+        self.client_burst = 0
+        self.domain_rate = 0
+        self.domain_burst = 0
+
+        self._in_flight = 0
+        self._queue = []
+        self._sequence = itertools.count()
+        self._client_buckets = {}
+        self._domain_buckets = {}
+        self._avg_duration = 1.0
+        self._stats = {"admitted": 0, "queued": 0, "rejected_queue_full": 0, "rejected_timeout": 0,
+                       "rejected_client_rate": 0, "rejected_domain_rate": 0}
+
+    def configure(self, settings: dict):
+        """应用准入控制配置，已有的令牌桶会按新配置重建。
+
+        Args:
+            settings (dict): 准入控制配置，见ConfigLoader.SETTINGS_SECTIONS中的admission_config。
+        """
+        self.max_in_flight = max(1, int(settings["max_in_flight"]))
+        self.max_queue = int(settings["max_queue"])
+        self.queue_timeout = settings["queue_timeout"]
+        if (settings["client_rate"], settings["client_burst"]) != (self.client_rate, self.client_burst):
+            self._client_buckets.clear()
+        if (settings["domain_rate"], settings["domain_burst"]) != (self.domain_rate, self.domain_burst):
+            self._domain_buckets.clear()
+        self.client_rate = settings["client_rate"]
+        self.client_burst = settings["client_burst"]
+        self.domain_rate = settings["domain_rate"]
+        self.domain_burst = settings["domain_burst"]
+
+    def handle_config_reload(self, old_snapshot, new_snapshot):
+        """配置变更监听器：应用新的准入控制配置，并在名额增加时唤醒排队中的请求。
+
+        需要在事件循环线程中执行，见ConfigLoader.add_loop_listener。
+
+        Args:
+            old_snapshot (ConfigSnapshot): 变更前的配置快照。
+            new_snapshot (ConfigSnapshot): 变更后的配置快照。
+        """
+        self.configure(new_snapshot.admission_config)
+        self._wake()
+
+    @staticmethod
+    def _bucket(buckets: dict, key: str, rate: float, burst: float) -> TokenBucket:
+        """获取或创建令牌桶，数量过多时清理空闲的令牌桶。"""
+        bucket = buckets.get(key)
+        if bucket is None:
+            if len(buckets) >= AdmissionController.MAX_BUCKETS:
+                for idle_key in [k for k, b in buckets.items() if b.idle]:
+                    del buckets[idle_key]
+            bucket = buckets[key] = TokenBucket(rate, burst or rate)
+        return bucket
+
+    def check_client(self, client: Optional[str], cost: int = 1):
+        """按客户端限流，令牌不足时立即拒绝。
+
+        Args:
+            client (str): 客户端标识，例如客户端IP。
+            cost (int): 本次请求消耗的令牌数，批量请求按URL数量计算。
+
+        Raises:
+            AdmissionRejected: 客户端请求过于频繁时抛出，状态码为429。
+        """
+        if not self.client_rate or client is None:
+            return
+        bucket = self._bucket(self._client_buckets, client, self.client_rate, self.client_burst)
+        wait = bucket.try_take(min(cost, bucket.capacity))
+        if wait > 0:
+            self._stats["rejected_client_rate"] += 1
+            raise AdmissionRejected(429, wait, "Too many requests from this client")
+
+    async def _polite_wait(self, domain: str, deadline: float):
+        """按目标域名限流，在截止时间内等待令牌，超出截止时间则拒绝。"""
+        if not self.domain_rate or not domain:
+            return
+        bucket = self._bucket(self._domain_buckets, domain, self.domain_rate, self.domain_burst)
+        wait = bucket.reserve()
+        if wait <= 0:
+            return
+        if time.monotonic() + wait > deadline:
+            bucket.cancel_reservation()
+            self._stats["rejected_domain_rate"] += 1
+            raise AdmissionRejected(429, wait, f"Too many requests to {domain}")
+        await asyncio.sleep(wait)
+
+    def _estimate_wait(self) -> float:
+        """按平均爬取耗时估算队列清空所需的时间。"""
+        return max(1.0, self._avg_duration * (len(self._queue) + 1) / self.max_in_flight)
+
+    async def _acquire(self, deadline: float):
+        """占用一个爬取名额，名额已满时按截止时间排队等待。"""
+        if self._in_flight < self.max_in_flight and not self._queue:
+            self._in_flight += 1
+            return
+        if len(self._queue) >= self.max_queue:
+            self._stats["rejected_queue_full"] += 1
+            raise AdmissionRejected(503, self._estimate_wait(), "Crawl queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (deadline, next(self._sequence), future)
+        heapq.heappush(self._queue, entry)
+        self._stats["queued"] += 1
+        # 使用asyncio.wait而不是wait_for：名额转交与取消同时发生时，wait_for可能吞掉取消
+        try:
+            done, _ = await asyncio.wait((future,), timeout=max(0.0, deadline - time.monotonic()))
+        except asyncio.CancelledError:
+            if future.done():
+                # 名额已经转交给当前请求但请求被取消，需要归还名额
+                self._release()
+            else:
+                # 仍在排队时被取消，移出队列，避免占用队列长度导致误拒绝
+                future.cancel()
+                self._dequeue(entry)
+            raise
+        if not done:
+            future.cancel()
+            self._dequeue(entry)
+            self._stats["rejected_timeout"] += 1
+            raise AdmissionRejected(503, self._estimate_wait(), "Timed out waiting in the crawl queue")
+
+    def _dequeue(self, entry: tuple):
+        """从队列中移除不再等待的排队请求。"""
+        if entry in self._queue:
+            self._queue.remove(entry)
+            heapq.heapify(self._queue)
+
+    def _release(self):
+        """归还爬取名额，并把名额转交给截止时间最早的排队请求。"""
+        self._in_flight -= 1
+        self._wake()
+
+    def _wake(self):
+        """在名额允许的范围内唤醒排队中的请求。"""
+        while self._queue and self._in_flight < self.max_in_flight:
+            _, _, future = heapq.heappop(self._queue)
+            if future.done():
+                continue
+            self._in_flight += 1
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, domain: str, deadline: Optional[float] = None):
+        """在准入控制下执行一次爬取。
+
+        Args:
+            domain (str): 目标域名，用于按域名限流。
+            deadline (float): 以time.monotonic()为基准的截止时间，默认为当前时间加上queue_timeout。
+
+        Raises:
+            AdmissionRejected: 队列已满、排队超时或目标域名限流时抛出。
+        """
+        if deadline is None:
+            deadline = time.monotonic() + self.queue_timeout
+        await self._polite_wait(domain, deadline)
+        await self._acquire(deadline)
+        self._stats["admitted"] += 1
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            self._avg_duration = 0.9 * self._avg_duration + 0.1 * (time.monotonic() - started)
+            self._release()
+
+    def stats(self) -> dict:
+        """返回准入控制的当前状态与拒绝统计。"""
+        return {
+            **self._stats,
+            "in_flight": self._in_flight,
+            "queue_length": len(self._queue),
+            "max_in_flight": self.max_in_flight,
+            "max_queue": self.max_queue,
+        }
+
+
+# 进程内共享的准入控制器
+admission = AdmissionController()
@@ -0,0 +1,272 @@
+import ipaddress
+import logging
+import random
+import time
+import weakref
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Optional
+from urllib.parse import urlparse
+from .metrics import blocked_requests
+
+logger = logging.getLogger(__name__)
+
+# 当前爬取的目标主机，浏览器上下文按主机区分
+_current_domain: ContextVar[Optional[str]] = ContextVar("current_domain", default=None)
+# 当前爬取的统计对象，在页面创建时绑定到页面上
+_current_visit: ContextVar[Optional["_Visit"]] = ContextVar("current_visit", default=None)
+
+# 形如example.com.cn、example.co.uk的二级域名后缀
+_SECOND_LEVEL_LABELS = {"co", "com", "net", "org", "gov", "edu", "ac"}
+
+
+def site_of(host: str) -> str:
+    """取主机名所属的站点（注册域名的近似值），同一站点下的子域名视为第一方。"""
+    try:
+        ipaddress.ip_address(host)
+        return host
+    except ValueError:
+        pass
+    labels = host.split(".")
+    count = 3 if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_LABELS else 2
+    return ".".join(labels[-count:])
+
+
+class _Visit:
+    """单次爬取中的传输字节数和被拦截的请求数。"""
+    __slots__ = ("domain", "baseline", "bytes", "blocked", "success", "__weakref__")
+
+    def __init__(self, domain: str, baseline: bool):
+        self.domain = domain
+        self.baseline = baseline
+        self.bytes = 0
+        self.blocked = Counter()
+        self.success = False
+
+    def on_response(self, response):
+        # 以Content-Length近似传输字节数，分块传输且没有该响应头的响应不计入
+        try:
+            self.bytes += int(response.headers.get("content-length") or 0)
+        except (ValueError, AttributeError):
+            pass
+
+
+class _DomainStats:
+    """单个主机的累计统计，分别记录拦截和不拦截（基准采样）两种情况下的页面数、耗时与字节数。"""
+    __slots__ = ("pages", "seconds", "bytes", "baseline_pages", "baseline_seconds", "baseline_bytes", "blocked")
+
+    def __init__(self):
+        self.pages = 0
+        self.seconds = 0.0
+        self.bytes = 0
+        self.baseline_pages = 0
+        self.baseline_seconds = 0.0
+        self.baseline_bytes = 0
+        self.blocked = Counter()
+
+    def to_dict(self) -> dict:
+        result = {
+            "pages": self.pages,
+            "baseline_pages": self.baseline_pages,
+            "blocked_requests": dict(self.blocked),
+            "avg_seconds": self.seconds / self.pages if self.pages else None,
+            "avg_bytes": self.bytes / self.pages if self.pages else None,
+            "baseline_avg_seconds": self.baseline_seconds / self.baseline_pages if self.baseline_pages else None,
+            "baseline_avg_bytes": self.baseline_bytes / self.baseline_pages if self.baseline_pages else None,
+            "seconds_saved": None,
+            "bytes_saved": None,
+        }
+        # 有基准采样时，以两种情况下的平均值之差估算拦截节省的总耗时和总字节数
+        if self.pages and self.baseline_pages:
+            result["seconds_saved"] = max(0.0, result["baseline_avg_seconds"] - result["avg_seconds"]) * self.pages
+            result["bytes_saved"] = int(max(0.0, result["baseline_avg_bytes"] - result["avg_bytes"]) * self.pages)
+        return result
+
+
+class DomainSessions:
+    """按主机复用浏览器上下文，并在网络层拦截不需要的资源。
+
+    crawl4ai在每个浏览器内按配置签名缓存浏览器上下文，这里把目标主机加入签名，
+    使同一主机的请求复用同一个上下文（连接、DNS、TLS会话、HTTP缓存和Cookie），不同主机之间互不影响；
+    上下文数量超过上限时由crawl4ai按最近最少使用淘汰空闲的上下文。
+    拦截规则通过on_page_context_created钩子在每个上下文上注册一次context.route，
+    按资源类型、分析统计类主机和第三方脚本中止请求，其余请求交给crawl4ai自身的路由处理。
+    """
+    def __init__(self):
+        self.enabled = False
+        self.resource_types = frozenset()
+        self.blocked_hosts = frozenset()
+        self.block_third_party_scripts = False
+        self.baseline_sample_rate = 0.0
+        self.max_tracked_domains = 1000
+
+        self._routed = weakref.WeakSet()
+        self._visits = weakref.WeakKeyDictionary()
+        self._domains = OrderedDict()
+
+    def configure(self, settings: dict):
+        """应用资源拦截配置，新规则对之后创建的页面生效。
+
+        Args:
+            settings (dict): 资源拦截配置，见ConfigLoader.SETTINGS_SECTIONS中的resource_blocking_config。
+        """
+        self.enabled = settings["enabled"]
+        self.resource_types = frozenset(name.lower() for name in settings["resource_types"])
+        self.blocked_hosts = frozenset(host.lower() for host in settings["blocked_hosts"])
+        self.block_third_party_scripts = settings["block_third_party_scripts"]
+        self.baseline_sample_rate = min(1.0, float(settings["baseline_sample_rate"]))
+        self.max_tracked_domains = max(1, int(settings["max_tracked_domains"]))
+
+    def handle_config_reload(self, old_snapshot, new_snapshot):
+        """配置变更监听器：应用新的资源拦截配置。
+
+        Args:
+            old_snapshot (ConfigSnapshot): 变更前的配置快照。
+            new_snapshot (ConfigSnapshot): 变更后的配置快照。
+        """
+        self.configure(new_snapshot.resource_blocking_config)
+
+    def install(self, crawler, domain_contexts: bool, max_contexts: int):
+        """为浏览器池中新启动的爬虫实例安装按主机区分的上下文和资源拦截钩子。
+
+        Args:
+            crawler (AsyncWebCrawler): 已启动的爬虫实例。
+            domain_contexts (bool): 是否按主机区分浏览器上下文。
+            max_contexts (int): 单个浏览器最多保留的上下文数量。
+        """
+        strategy = crawler.crawler_strategy
+        manager = getattr(strategy, "browser_manager", None)
+        if manager is None:
+            return
+        # 按主机区分上下文依赖crawl4ai浏览器管理器的内部属性，版本不兼容时退回共用上下文
+        if domain_contexts and not (hasattr(manager, "_make_config_signature") and hasattr(manager, "_max_contexts")):
+            logger.warning("当前crawl4ai版本的浏览器管理器不支持按主机区分浏览器上下文，将共用浏览器上下文")
+            domain_contexts = False
+        if domain_contexts:
+            make_signature = manager._make_config_signature
+
+            def signature(crawler_run_config):
+                domain = _current_domain.get()
+                base = make_signature(crawler_run_config)
+                return base if domain is None else f"{base}:{domain}"
+
+            manager._make_config_signature = signature
+            manager._max_contexts = max(1, int(max_contexts))
+        strategy.set_hook("on_page_context_created", self._on_page_created)
+
+    @contextmanager
+    def visit(self, url: str):
+        """标记一次爬取，期间创建的浏览器上下文按目标主机区分，结束后记录耗时与字节数。
+
+        Args:
+            url (str): 已经过处理的URL。
+
+        Yields:
+            _Visit: 本次爬取的统计对象，调用方在爬取成功时把success设为True。
+        """
+        domain = (urlparse(url).hostname or "").lower()
+        visit = _Visit(domain, self.enabled and random.random() < self.baseline_sample_rate)
+        domain_token = _current_domain.set(domain)
+        visit_token = _current_visit.set(visit)
+        started = time.perf_counter()
+        try:
+            yield visit
+        finally:
+            _current_visit.reset(visit_token)
+            _current_domain.reset(domain_token)
+            if visit.success:
+                self._record(visit, time.perf_counter() - started)
+
+    def _record(self, visit: _Visit, seconds: float):
+        stats = self._domains.get(visit.domain)
+        if stats is None:
+            stats = self._domains[visit.domain] = _DomainStats()
+            while len(self._domains) > self.max_tracked_domains:
+                self._domains.popitem(last=False)
+        else:
+            self._domains.move_to_end(visit.domain)
+        if visit.baseline:
+            stats.baseline_pages += 1
+            stats.baseline_seconds += seconds
+            stats.baseline_bytes += visit.bytes
+        else:
+            stats.pages += 1
+            stats.seconds += seconds
+            stats.bytes += visit.bytes
+        stats.blocked.update(visit.blocked)
+
+    async def _on_page_created(self, page, context=None, **kwargs):
+        """页面创建后绑定本次爬取的统计对象，并在上下文上注册一次拦截路由。"""
+        visit = _current_visit.get()
+        if visit is not None:
+            self._visits[page] = visit
+            page.on("response", visit.on_response)
+        if self.enabled and context is not None and context not in self._routed:
+            self._routed.add(context)
+            site = site_of(visit.domain) if visit is not None else None
+            await context.route("**/*", lambda route: self._route(route, site))
+        return page
+
+    def block_reason(self, resource_type: str, url: str, site: Optional[str]) -> Optional[str]:
+        """判断请求是否应被拦截。
+
+        Args:
+            resource_type (str): Playwright的资源类型，例如image、font、media、script。
+            url (str): 请求URL。
+            site (str): 页面所属的站点，用于判断第三方脚本。
+
+        Returns:
+            str: 拦截原因（资源类型、analytics或third_party_script），不拦截时返回None。
+        """
+        if resource_type == "document":
+            return None
+        if resource_type in self.resource_types:
+            return resource_type
+        host = (urlparse(url).hostname or "").lower()
+        parent = host
+        while parent:
+            if parent in self.blocked_hosts:
+                return "analytics"
+            parent = parent.partition(".")[2]
+        if self.block_third_party_scripts and resource_type == "script" and site is not None \
+                and host != site and not host.endswith("." + site):
+            return "third_party_script"
+        return None
+
+    async def _route(self, route, site: Optional[str]):
+        request = route.request
+        try:
+            visit = self._visits.get(request.frame.page)
+        except Exception:
+            # Service Worker等不属于页面的请求
+            visit = None
+        reason = None
+        if self.enabled and (visit is None or not visit.baseline):
+            # 未按主机区分上下文时，同一上下文会被不同站点的页面共用，优先使用页面自身的站点
+            page_site = site_of(visit.domain) if visit is not None else site
+            reason = self.block_reason(request.resource_type, request.url, page_site)
+        if reason is None:
+            await route.fallback()
+            return
+        if visit is not None:
+            visit.blocked[reason] += 1
+        blocked_requests.labels(reason).inc()
+        await route.abort("blockedbyclient")
+
+    def stats(self) -> dict:
+        """返回资源拦截的配置摘要与各主机的统计，主机按最近爬取时间倒序排列。"""
+        domains = {domain: stats.to_dict() for domain, stats in reversed(self._domains.items())}
+        seconds_saved = sum((item["seconds_saved"] or 0.0 for item in domains.values()), 0.0)
+        bytes_saved = sum(item["bytes_saved"] or 0 for item in domains.values())
+        return {
+            "enabled": self.enabled,
+            "baseline_sample_rate": self.baseline_sample_rate,
+            "seconds_saved": seconds_saved,
+            "bytes_saved": bytes_saved,
+            "domains": domains,
+        }
+
+
+# 进程内共享的按主机会话与资源拦截管理器
+domain_sessions = DomainSessions()
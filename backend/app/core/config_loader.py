@@ -1,25 +1,38 @@
+import asyncio
+import importlib
 import json
+import logging
 import os
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig, CacheMode
-from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
-from crawl4ai.content_filter_strategy import PruningContentFilter, BM25ContentFilter
+from typing import TYPE_CHECKING, Callable, Optional, Tuple
 from watchdog.observers import Observer
 from watchdog.events import FileSystemEventHandler
+from .metrics import stage_timer
+
+if TYPE_CHECKING:
+    from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+    from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+    from crawl4ai.content_filter_strategy import PruningContentFilter, BM25ContentFilter
+
+logger = logging.getLogger(__name__)
 
 class ConfigWatcher:
     """监控配置文件变化的类，当配置文件被修改时触发回调函数。"""
-    def __init__(self, config_path, callback):
+    def __init__(self, config_path, callback, debounce: float = 0.5):
         """初始化ConfigWatcher实例。
-        
+
         Args:
             config_path (str): 配置文件的路径。
             callback (function): 当配置文件被修改时触发的回调函数。
+            debounce (float): 防抖时间（秒），在此时间内的连续修改只触发一次回调。
         """
         self.config_path = config_path
         self.callback = callback
         self.observer = Observer()
-        self.event_handler = ConfigFileEventHandler(self.config_path, self.callback)
+        self.observer.daemon = True
+        self.event_handler = ConfigFileEventHandler(self.config_path, self.callback, debounce)
 
     def start(self):
         """启动文件监控，开始监听配置文件的变化。"""
@@ -28,32 +41,158 @@ class ConfigWatcher:
 
     def stop(self):
         """停止文件监控，释放资源。"""
+        self.event_handler.cancel()
         self.observer.stop()
         self.observer.join()
 
 class ConfigFileEventHandler(FileSystemEventHandler):
     """处理文件系统事件的类，用于监听配置文件的修改事件。"""
-    def __init__(self, config_path, callback):
+    def __init__(self, config_path, callback, debounce: float = 0.5):
         """初始化ConfigFileEventHandler实例。
-        
+
         Args:
             config_path (str): 配置文件的路径。
             callback (function): 当配置文件被修改时触发的回调函数。
+            debounce (float): 防抖时间（秒）。
         """
         self.config_path = config_path
         self.callback = callback
+        self.debounce = debounce
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def _schedule(self):
+        """重新计时，防抖时间结束后触发一次回调。"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(self.debounce, self.callback)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def cancel(self):
+        """取消尚未触发的回调。"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
 
     def on_modified(self, event):
         """当配置文件被修改时调用此方法。
-        
+
         Args:
             event (FileSystemEvent): 文件系统事件对象。
         """
         if event.src_path == str(self.config_path):
-            self.callback()
+            self._schedule()
+
+    def on_created(self, event):
+        """当配置文件被重新创建时调用此方法。"""
+        self.on_modified(event)
+
+    def on_moved(self, event):
+        """当配置文件被原子替换（先写临时文件再重命名）时调用此方法。"""
+        if getattr(event, "dest_path", None) == str(self.config_path):
+            self._schedule()
+
+
+# 多个线程同时首次导入crawl4ai的包和其子模块时，可能触发导入死锁检测而导致其中一方失败，因此首次导入串行进行
+_crawl4ai_import_lock = threading.Lock()
+
+
+def import_crawl4ai():
+    """导入crawl4ai（连同Playwright、Markdown生成器和内容过滤器），已导入时直接返回。
+
+    Returns:
+        module: crawl4ai模块。
+    """
+    with _crawl4ai_import_lock:
+        return importlib.import_module("crawl4ai")
+
+
+class _LazyCrawl4AIObjects:
+    """按需构建的crawl4ai配置对象。
+
+    构建BrowserConfig等对象需要导入crawl4ai（连同Playwright、Markdown生成器和内容过滤器），
+    耗时远超解析配置文件本身，因此推迟到首次访问时进行；同一快照只构建一次，之后的访问返回同一组对象。
+    """
+    def __init__(self, build: Callable[[], tuple]):
+        self._build = build
+        self._lock = threading.Lock()
+        self._objects = None
+
+    @property
+    def built(self) -> bool:
+        """是否已经构建。"""
+        return self._objects is not None
+
+    def get(self) -> Tuple["BrowserConfig", "CrawlerRunConfig", Optional["DefaultMarkdownGenerator"]]:
+        """返回(浏览器配置, 爬虫运行配置, Markdown生成器)，首次调用时构建。"""
+        objects = self._objects
+        if objects is None:
+            with self._lock:
+                if self._objects is None:
+                    self._objects = self._build()
+                objects = self._objects
+        return objects
+
+
+@dataclass(frozen=True)
+class SettingsSection:
+    """由简单设置项组成的配置项的定义。
+
+    Attributes:
+        description (str): 配置项说明，用于日志。
+        defaults (dict): 各个键的默认值，同时决定各个键的类型。
+        choices (dict): 取值受限的键及其合法值。
+    """
+    description: str
+    defaults: dict
+    choices: dict = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class ConfigSnapshot:
+    """一次解析配置文件得到的不可变配置快照。
+
+    Attributes:
+        version (int): 快照版本号，每次重新加载配置后递增。
+        data (dict): 配置文件的原始内容。
+        output_format (str): 输出格式。
+        browser_config (BrowserConfig): 浏览器配置对象，首次访问时构建。
+        crawler_run_config (CrawlerRunConfig): 爬虫运行配置对象，首次访问时构建。
+        markdown_generator (DefaultMarkdownGenerator): Markdown生成器，未配置时为None，首次访问时构建。
+        settings (dict): 由简单设置项组成的各个配置项，键见ConfigLoader.SETTINGS_SECTIONS，
+            也可以通过同名属性访问，例如snapshot.batch_config。
+    """
+    version: int
+    data: dict = field(repr=False)
+    output_format: str
+    settings: dict
+    crawl4ai_objects: _LazyCrawl4AIObjects = field(repr=False, compare=False)
+
+    def __getattr__(self, name: str):
+        # 只在常规属性查找失败时调用；反序列化等尚未设置settings的情况下直接报错，避免递归
+        settings = self.__dict__.get("settings")
+        if settings is not None and name in settings:
+            return settings[name]
+        raise AttributeError(f"'{type(self).__name__}' object has no attribute '{name}'")
+
+    @property
+    def browser_config(self) -> "BrowserConfig":
+        return self.crawl4ai_objects.get()[0]
+
+    @property
+    def crawler_run_config(self) -> "CrawlerRunConfig":
+        return self.crawl4ai_objects.get()[1]
+
+    @property
+    def markdown_generator(self) -> Optional["DefaultMarkdownGenerator"]:
+        return self.crawl4ai_objects.get()[2]
+
 
 class ConfigLoader:
-    """加载和验证配置文件的类，支持多种配置项的加载和缓存。"""
+    """加载和验证配置文件的类，配置文件只解析一次，变更时整体替换配置快照。"""
     VALID_OUTPUT_FORMATS = {
         "markdown",
         "fit_markdown",
@@ -65,283 +204,590 @@ class ConfigLoader:
         "fit_html",
     }
 
-    def __init__(self, config_path="./config/config.json"):
+    VALID_WORKER_MODES = {"inline", "multiprocess"}
+
+    VALID_PARQUET_COMPRESSIONS = {"none", "snappy", "gzip", "brotli", "zstd", "lz4"}
+
+    # 由简单设置项组成的配置项：配置项名称、说明、各个键的默认值以及取值受限的键，
+    # 均由_build_settings_section按同一规则解析，解析结果在配置快照中以同名属性访问
+    SETTINGS_SECTIONS = {
+        "crawler_pool_config": SettingsSection("浏览器池配置", {
+            "size": 2,
+            "max_pages_per_browser": 100,
+            "max_memory_mb": 0,
+            "health_check_interval": 30,
+            "domain_contexts": True,
+            "max_contexts_per_browser": 20,
+        }),
+        "batch_config": SettingsSection("批量爬取配置", {
+            "max_urls": 100,
+            "max_concurrency": 8,
+            "per_domain_concurrency": 2,
+        }),
+        "stream_config": SettingsSection("流式返回配置", {
+            "chunk_size": 65536,
+        }),
+        "result_cache_config": SettingsSection("结果缓存配置", {
+            "enabled": True,
+            "ttl_seconds": 3600,
+            "max_memory_bytes": 64 * 1024 * 1024,
+            "disk_path": "./cache/results.sqlite3",
+            "max_disk_bytes": 512 * 1024 * 1024,
+        }),
+        "admission_config": SettingsSection("准入控制配置", {
+            "max_in_flight": 8,
+            "max_queue": 64,
+            "queue_timeout": 30,
+            "client_rate": 5,
+            "client_burst": 20,
+            "domain_rate": 2,
+            "domain_burst": 4,
+        }),
+        "job_config": SettingsSection("异步任务配置", {
+            "workers": 2,
+            "db_path": "./cache/jobs.sqlite3",
+            "max_attempts": 3,
+            "backoff_base": 2,
+            "backoff_max": 300,
+            "lease_seconds": 60,
+            "poll_interval": 1,
+            "retention_seconds": 7 * 24 * 3600,
+        }),
+        "worker_config": SettingsSection("工作进程配置", {
+            "mode": "inline",
+            "processes": 0,
+            "offload_postprocessing": False,
+            "postprocess_workers": 0,
+        }, {"mode": VALID_WORKER_MODES}),
+        "deep_crawl_config": SettingsSection("整站爬取配置", {
+            "max_depth": 2,
+            "max_pages": 100,
+            "max_bytes": 50 * 1024 * 1024,
+            "max_concurrency": 4,
+            "per_host_concurrency": 2,
+            "visited_capacity": 1000000,
+            "visited_error_rate": 0.0001,
+        }),
+        "incremental_config": SettingsSection("增量刷新配置", {
+            "enabled": False,
+            "db_path": "./cache/validators.sqlite3",
+            "request_timeout": 10,
+            "max_body_bytes": 10 * 1024 * 1024,
+            "retention_seconds": 30 * 24 * 3600,
+            "static_hosts": [],
+        }),
+        "compression_config": SettingsSection("响应压缩配置", {
+            "enabled": True,
+            "minimum_size": 1024,
+            "gzip_level": 6,
+            "brotli_quality": 4,
+            "zstd_level": 3,
+        }),
+        "profile_config": SettingsSection("请求级别过滤方案配置", {
+            "max_variants": 8,
+            "max_cached_profiles": 256,
+        }),
+        "sink_config": SettingsSection("结果输出文件配置", {
+            "enabled": False,
+            "output_dir": "./output",
+            "buffer_records": 1000,
+            "buffer_bytes": 16 * 1024 * 1024,
+            "rotate_bytes": 512 * 1024 * 1024,
+            "parquet_compression": "zstd",
+            "warc_gzip": True,
+        }, {"parquet_compression": VALID_PARQUET_COMPRESSIONS}),
+        "resource_blocking_config": SettingsSection("资源拦截配置", {
+            "enabled": True,
+            "resource_types": ["image", "media", "font"],
+            "blocked_hosts": [
+                "google-analytics.com", "googletagmanager.com", "doubleclick.net", "googlesyndication.com",
+                "adservice.google.com", "connect.facebook.net", "hotjar.com", "segment.io", "segment.com",
+                "mixpanel.com", "nr-data.net", "scorecardresearch.com", "quantserve.com", "clarity.ms",
+                "hm.baidu.com", "cnzz.com", "umeng.com",
+            ],
+            "block_third_party_scripts": False,
+            "baseline_sample_rate": 0.05,
+            "max_tracked_domains": 1000,
+        }),
+        "startup_config": SettingsSection("启动与预热配置", {
+            "background_warmup": True,
+            "require_browser": True,
+        }),
+    }
+
+    @classmethod
+    def default_settings(cls, section: str) -> dict:
+        """返回配置项的默认值副本。
+
+        Args:
+            section (str): 配置项名称，见SETTINGS_SECTIONS。
+
+        Returns:
+            dict: 各个键的默认值。
+        """
+        return dict(cls.SETTINGS_SECTIONS[section].defaults)
+
+    def __init__(self, config_path="./config/config.json", watch: bool = True):
         """初始化ConfigLoader实例。
-        
+
         Args:
             config_path (str): 配置文件的路径，默认为"./config/config.json"。
+            watch (bool): 是否监听配置文件变化并自动重新加载。
         """
         current_file_path = Path(__file__)
         self.config_path = current_file_path.parent.parent.joinpath(config_path)
 
         self.config_path.parent.mkdir(parents=True, exist_ok=True)
-        self._watcher = ConfigWatcher(self.config_path, self._reload_config)
-        self._watcher.start()
 
-        self._config_cache = {}
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._snapshot = self._build_snapshot(version=1)
 
-        self.file_isJson_exist = self._validate_config_path()
+        self._watcher = None
+        if watch:
+            self._watcher = ConfigWatcher(self.config_path, self._reload_config)
+            self._watcher.start()
 
+    @property
+    def snapshot(self) -> ConfigSnapshot:
+        """当前生效的配置快照。"""
+        return self._snapshot
+
+    def add_listener(self, callback):
+        """注册配置变更监听器。
+
+        Args:
+            callback (function): 配置快照替换后调用，参数为(旧快照, 新快照)，在监听线程中执行。
+        """
+        self._listeners.append(callback)
+
+    def add_loop_listener(self, callback, loop: asyncio.AbstractEventLoop):
+        """注册在事件循环中执行的配置变更监听器。
+
+        监听器默认在配置监听线程中执行，只能在事件循环线程中修改的状态（例如排队中的请求、爬取时使用的存储）
+        需要通过call_soon_threadsafe交给事件循环应用；事件循环未运行时直接调用。
+
+        Args:
+            callback (function): 参数为(旧快照, 新快照)，在事件循环线程中执行。
+            loop (asyncio.AbstractEventLoop): 服务所在的事件循环。
+        """
+        def listener(old_snapshot, new_snapshot):
+            if loop.is_running():
+                loop.call_soon_threadsafe(callback, old_snapshot, new_snapshot)
+            else:
+                callback(old_snapshot, new_snapshot)
+
+        self.add_listener(listener)
+
+    def close(self):
+        """停止监听配置文件。"""
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
 
     def _reload_config(self):
-        """清空配置缓存，强制重新加载配置文件。"""
-        self._config_cache = {}
+        """重新解析配置文件，并原子地替换当前配置快照。"""
+        with self._lock:
+            old_snapshot = self._snapshot
+            new_snapshot = self._build_snapshot(version=old_snapshot.version + 1)
+            self._snapshot = new_snapshot
+        logger.info("配置文件已重新加载，当前配置版本为: %s", new_snapshot.version)
+        for callback in list(self._listeners):
+            try:
+                callback(old_snapshot, new_snapshot)
+            except Exception as e:
+                logger.warning("配置变更监听器执行失败: %s", e)
+
+    def _build_snapshot(self, version: int) -> ConfigSnapshot:
+        """解析配置文件并构建配置快照。
+
+        Args:
+            version (int): 新快照的版本号。
+
+        Returns:
+            ConfigSnapshot: 构建完成的配置快照。
+        """
+        with stage_timer("config_load"):
+            data = self._read_config()
+            return ConfigSnapshot(
+                version=version,
+                data=data or {},
+                output_format=self._build_output_format(data),
+                settings={section: self._build_settings_section(data, section) for section in self.SETTINGS_SECTIONS},
+                crawl4ai_objects=_LazyCrawl4AIObjects(lambda: self._build_crawl4ai_objects(data)),
+            )
+
+    def _build_crawl4ai_objects(self, data: Optional[dict]) -> tuple:
+        """构建浏览器配置、爬虫运行配置和Markdown生成器，在首次访问配置快照中的这些对象时调用。
+
+        Args:
+            data (dict): 配置文件内容。
+
+        Returns:
+            tuple: (浏览器配置, 爬虫运行配置, Markdown生成器)，未配置Markdown生成器时其为None。
+        """
+        import_crawl4ai()
+        with stage_timer("config_load"):
+            markdown_generator = None
+            if data is not None and isinstance(data.get("markdown_generator_config"), dict) \
+                    and not self._is_config_section_empty(data, "markdown_generator_config"):
+                markdown_generator = self._build_md_generator_config(data)
+            return (
+                self._build_browser_config(data),
+                self._build_crawler_config(data, markdown_generator),
+                markdown_generator,
+            )
 
     def _validate_config_path(self) -> bool:
         """验证配置文件是否存在，是否为JSON格式。"""
         if not self.config_path.exists():
-            print(f"配置文件未找到: {self.config_path}")
+            logger.error("配置文件未找到: %s", self.config_path)
             return False
         if self.config_path.suffix.lower() != '.json':
-            print("仅支持JSON格式配置文件")
+            logger.error("仅支持JSON格式配置文件")
             return False
         return True
 
-    def _validate_file(self) -> bool:
-        """验证配置文件内容是否有效。"""
-        if not self.file_isJson_exist:
-            return False
-        
+    def _read_config(self) -> Optional[dict]:
+        """读取并验证配置文件内容。
+
+        Returns:
+            dict: 配置文件内容，文件不存在或内容无效时返回None。
+        """
+        if not self._validate_config_path():
+            return None
+
         try:
             with open(self.config_path, 'r') as f:
                 if os.stat(self.config_path).st_size == 0:
-                    print("配置文件为空")
-                    return False
-                
+                    logger.error("配置文件为空")
+                    return None
+
                 full_config = json.load(f)
 
                 # 当json的根结构不是字典时，给出警告
                 if not isinstance(full_config, dict):
-                    print("配置文件根结构不是字典类型")
-                    return False
+                    logger.error("配置文件根结构不是字典类型")
+                    return None
         except json.JSONDecodeError as e:
-            print(f"配置文件JSON格式错误: {e}")
-            return False
+            logger.error("配置文件JSON格式错误: %s", e)
+            return None
         except (FileNotFoundError, PermissionError, IsADirectoryError) as e:
-            print(f"无法访问配置文件: {e}")
-            return False
+            logger.error("无法访问配置文件: %s", e)
+            return None
         except Exception as e:
-            print(f"未知错误: {e}")
-            return False
-        return True
+            logger.error("未知错误: %s", e)
+            return None
+        return full_config
 
     def load_output_format(self) -> str:
-        """加载并验证输出格式配置。
-        
+        """获取当前配置快照中的输出格式。
+
         Returns:
             str: 输出格式，默认为"markdown"。
         """
-        print("正在加载输出格式配置...")
-        if "output_format" not in self._config_cache:
-            if not self.file_isJson_exist or not self._validate_file():
-                print("警告: 输出格式加载失败，本次将使用默认的输出格式“markdown”")
-                return "markdown"
-
-            config_data = "markdown"
-            if not self._is_config_section_exist("output_format"):
-                print("警告: “output_format”配置项不存在, 将使用默认输出格式“markdown”")
-            elif self._is_config_section_empty("output_format"):
-                print("警告: “output_format”配置项为空, 将使用默认输出格式“markdown”")
-            else:
-                config_data = self._load_config_section("output_format").lower()
-                if config_data not in self.VALID_OUTPUT_FORMATS:
-                    print(f"警告: “output_format”配置项的值“{config_data}”无效, 将使用默认输出格式“markdown”")
-                    config_data = "markdown"
-            print(f"输出格式加载成功，当前输出格式为: {config_data}")
-            self._config_cache["output_format"] = config_data
-        return self._config_cache["output_format"]
-
-    def load_browser_config(self) -> BrowserConfig:
-        """加载浏览器配置。
-        
+        return self._snapshot.output_format
+
+    def load_crawler_pool_config(self) -> dict:
+        """获取当前配置快照中的浏览器池配置。
+
+        Returns:
+            dict: 浏览器池配置，包含size、max_pages_per_browser、max_memory_mb、health_check_interval、
+                domain_contexts和max_contexts_per_browser。
+        """
+        return self._snapshot.crawler_pool_config
+
+    def load_browser_config(self) -> "BrowserConfig":
+        """获取当前配置快照中的浏览器配置。
+
         Returns:
             BrowserConfig: 浏览器配置对象。
         """
-        print("正在加载浏览器配置...")
-        if "browser_config" not in self._config_cache:
-            if not self.file_isJson_exist or not self._validate_file():
-                print("警告: 浏览器配置加载失败，本次将不会使用此配置")
-                return BrowserConfig()
-
-            config_data = {}
-            if not self._is_config_section_exist("browser_config"):
-                print("警告: “browser_config”配置项不存在, 将不会使用浏览器配置")
-            elif self._is_config_section_empty("browser_config"):
-                print("警告: “browser_config”配置项为空, 将不会使用浏览器配置")
-            else:
-                config_data = self._load_config_section("browser_config")
-                print("浏览器配置加载成功")
-                
-            self._config_cache["browser_config"] = BrowserConfig(**config_data) if config_data else BrowserConfig()
-        return self._config_cache["browser_config"]
-
-    def load_crawler_config(self) -> CrawlerRunConfig:
-        """加载爬虫运行配置。
-        
+        return self._snapshot.browser_config
+
+    def load_crawler_config(self) -> "CrawlerRunConfig":
+        """获取当前配置快照中的爬虫运行配置。
+
         Returns:
             CrawlerRunConfig: 爬虫运行配置对象。
         """
-        print("正在加载爬虫配置...")
-        if "crawler_run_config" not in self._config_cache:
-            if not self.file_isJson_exist or not self._validate_file():
-                print("警告: 爬虫配置加载失败，本次将不会使用此配置")
-                return CrawlerRunConfig()
-                
-            config_data = {}
-            if not self._is_config_section_exist("crawler_run_config"):
-                print("警告: “crawler_run_config”配置项不存在, 将不会使用爬虫配置")
-            elif self._is_config_section_empty("crawler_run_config"):
-                print("警告: “crawler_run_config”配置项为空, 将不会使用爬虫配置")
+        return self._snapshot.crawler_run_config
+
+    def load_md_generator_config(self) -> Optional["DefaultMarkdownGenerator"]:
+        """获取当前配置快照中的Markdown生成器。
+
+        Returns:
+            DefaultMarkdownGenerator: Markdown生成器配置对象，未配置时为None。
+        """
+        return self._snapshot.markdown_generator
+
+    def _build_output_format(self, data: Optional[dict]) -> str:
+        """构建并验证输出格式配置。
+
+        Args:
+            data (dict): 配置文件内容。
+
+        Returns:
+            str: 输出格式，默认为"markdown"。
+        """
+        logger.debug("正在加载输出格式配置...")
+        if data is None:
+            logger.warning("输出格式加载失败，本次将使用默认的输出格式“markdown”")
+            return "markdown"
+
+        config_data = "markdown"
+        if not self._is_config_section_exist(data, "output_format"):
+            logger.warning("“output_format”配置项不存在, 将使用默认输出格式“markdown”")
+        elif self._is_config_section_empty(data, "output_format"):
+            logger.warning("“output_format”配置项为空, 将使用默认输出格式“markdown”")
+        else:
+            value = self._load_config_section(data, "output_format")
+            if not isinstance(value, str) or value.lower() not in self.VALID_OUTPUT_FORMATS:
+                logger.warning("“output_format”配置项的值“%s”无效, 将使用默认输出格式“markdown”", value)
             else:
-                config_data = self._load_config_section("crawler_run_config")
+                config_data = value.lower()
+        logger.info("输出格式加载成功，当前输出格式为: %s", config_data)
+        return config_data
 
-                if "cache_mode" in config_data:
-                    if config_data["cache_mode"] not in CacheMode.__members__:
-                        print(f"警告: “cache_mode”配置项的值“{config_data['cache_mode']}”无效, 将使用默认缓存模式“ENABLED”")
-                        config_data["cache_mode"] = CacheMode.ENABLED
-                    else : config_data["cache_mode"] = CacheMode[config_data["cache_mode"]]
+    def _build_settings_section(self, data: Optional[dict], section: str) -> dict:
+        """构建由简单设置项组成的配置项，类型无效、取值不在合法范围内或缺失的值使用默认值。
+
+        数值类设置项必须为非负数，布尔和字符串类设置项必须与默认值类型一致，列表类设置项必须为字符串列表。
+
+        Args:
+            data (dict): 配置文件内容。
+            section (str): 配置项名称，见SETTINGS_SECTIONS。
 
-                if not self._is_config_section_exist("markdown_generator_config"):
-                    print("爬虫配置加载成功")
+        Returns:
+            dict: 合并默认值后的配置。
+        """
+        definition = self.SETTINGS_SECTIONS[section]
+        logger.debug("正在加载%s...", definition.description)
+        config_data = dict(definition.defaults)
+        if data is not None and self._is_config_section_exist(data, section) \
+                and not self._is_config_section_empty(data, section):
+            section_value = self._load_config_section(data, section)
+            if not isinstance(section_value, dict):
+                logger.warning("“%s”配置项的值“%s”不是对象, 将使用默认配置", section, section_value)
+                return config_data
+            for key, default in definition.defaults.items():
+                value = section_value.get(key, default)
+                if isinstance(default, bool) or isinstance(default, str):
+                    valid = isinstance(value, type(default))
+                elif isinstance(default, list):
+                    valid = isinstance(value, list) and all(isinstance(item, str) for item in value)
                 else:
-                    if self._is_config_section_empty("markdown_generator_config"):
-                        print("警告: “markdown_generator_config”配置项为空, 将不使用此配置")
-                        print("爬虫配置加载成功，但未正确配置Markdown生成器")
-                    else:
-                        config_data["markdown_generator"] = self.load_md_generator_config()
-                        print("爬虫配置加载成功，已正确配置Markdown生成器")
-                
-            self._config_cache["crawler_run_config"] = CrawlerRunConfig(**config_data) if config_data else CrawlerRunConfig()
-        return self._config_cache["crawler_run_config"]
-
-    def load_md_generator_config(self) -> DefaultMarkdownGenerator:
-        """加载Markdown生成器配置。
-        
+                    valid = isinstance(value, (int, float)) and not isinstance(value, bool) and value >= 0
+                if valid and key in definition.choices:
+                    valid = value in definition.choices[key]
+                if not valid:
+                    logger.warning("“%s.%s”配置项的值“%s”无效, 将使用默认值“%s”", section, key, value, default)
+                    value = default
+                config_data[key] = value
+            logger.info("“%s”配置加载成功", section)
+        else:
+            logger.warning("“%s”配置项不存在或为空, 将使用默认配置", section)
+        return config_data
+
+    def _build_browser_config(self, data: Optional[dict]) -> "BrowserConfig":
+        """构建浏览器配置。
+
+        Args:
+            data (dict): 配置文件内容。
+
+        Returns:
+            BrowserConfig: 浏览器配置对象。
+        """
+        from crawl4ai.async_configs import BrowserConfig
+        logger.debug("正在加载浏览器配置...")
+        if data is None:
+            logger.warning("浏览器配置加载失败，本次将不会使用此配置")
+            return BrowserConfig()
+
+        config_data = {}
+        if not self._is_config_section_exist(data, "browser_config"):
+            logger.warning("“browser_config”配置项不存在, 将不会使用浏览器配置")
+        elif self._is_config_section_empty(data, "browser_config"):
+            logger.warning("“browser_config”配置项为空, 将不会使用浏览器配置")
+        elif not isinstance(data["browser_config"], dict):
+            logger.warning("“browser_config”配置项的值“%s”不是对象, 将不会使用浏览器配置", data["browser_config"])
+        else:
+            config_data = self._load_config_section(data, "browser_config")
+            logger.info("浏览器配置加载成功")
+
+        return BrowserConfig(**config_data) if config_data else BrowserConfig()
+
+    def _build_crawler_config(self, data: Optional[dict],
+                              markdown_generator: Optional["DefaultMarkdownGenerator"]) -> "CrawlerRunConfig":
+        """构建爬虫运行配置。
+
+        Args:
+            data (dict): 配置文件内容。
+            markdown_generator (DefaultMarkdownGenerator): 已构建的Markdown生成器，未配置时为None。
+
+        Returns:
+            CrawlerRunConfig: 爬虫运行配置对象。
+        """
+        from crawl4ai.async_configs import CacheMode, CrawlerRunConfig
+        logger.debug("正在加载爬虫配置...")
+        if data is None:
+            logger.warning("爬虫配置加载失败，本次将不会使用此配置")
+            return CrawlerRunConfig()
+
+        config_data = {}
+        if not self._is_config_section_exist(data, "crawler_run_config"):
+            logger.warning("“crawler_run_config”配置项不存在, 将不会使用爬虫配置")
+        elif self._is_config_section_empty(data, "crawler_run_config"):
+            logger.warning("“crawler_run_config”配置项为空, 将不会使用爬虫配置")
+        elif not isinstance(data["crawler_run_config"], dict):
+            logger.warning("“crawler_run_config”配置项的值“%s”不是对象, 将不会使用爬虫配置", data["crawler_run_config"])
+        else:
+            config_data = dict(self._load_config_section(data, "crawler_run_config"))
+
+            if "cache_mode" in config_data:
+                if not isinstance(config_data["cache_mode"], str) or config_data["cache_mode"] not in CacheMode.__members__:
+                    logger.warning("“cache_mode”配置项的值“%s”无效, 将使用默认缓存模式“ENABLED”", config_data['cache_mode'])
+                    config_data["cache_mode"] = CacheMode.ENABLED
+                else : config_data["cache_mode"] = CacheMode[config_data["cache_mode"]]
+
+            if not self._is_config_section_exist(data, "markdown_generator_config"):
+                logger.info("爬虫配置加载成功")
+            else:
+                if markdown_generator is None:
+                    logger.warning("“markdown_generator_config”配置项为空, 将不使用此配置")
+                    logger.info("爬虫配置加载成功，但未正确配置Markdown生成器")
+                else:
+                    config_data["markdown_generator"] = markdown_generator
+                    logger.info("爬虫配置加载成功，已正确配置Markdown生成器")
+
+        return CrawlerRunConfig(**config_data) if config_data else CrawlerRunConfig()
+
+    def _build_md_generator_config(self, data: dict) -> "DefaultMarkdownGenerator":
+        """构建Markdown生成器配置。
+
+        Args:
+            data (dict): 配置文件内容。
+
         Returns:
             DefaultMarkdownGenerator: Markdown生成器配置对象。
         """
-        print("正在加载Markdown生成器配置...")
-        if "markdown_generator_config" not in self._config_cache:
-            config_data = self._load_config_section("markdown_generator_config")
-            if not self._is_config_section_exist("content_filter_choice"):
-                print("Markdown生成器配置加载成功")
+        from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+        logger.debug("正在加载Markdown生成器配置...")
+        config_data = dict(self._load_config_section(data, "markdown_generator_config"))
+        if not self._is_config_section_exist(data, "content_filter_choice"):
+            logger.info("Markdown生成器配置加载成功")
+        else:
+            content_filter_choice = self._load_config_section(data, "content_filter_choice")
+            if self._is_config_section_empty(data, "content_filter_choice"):
+                logger.warning("“content_filter_choice”配置项为空, 将不使用内容过滤器")
+                logger.info("Markdown生成器配置加载成功，但未选择内容过滤器")
             else:
-                if self._is_config_section_empty("content_filter_choice"):
-                    print("警告: “content_filter_choice”配置项为空, 将不使用内容过滤器")
-                    print("Markdown生成器配置加载成功，但未选择内容过滤器")
+                if not isinstance(content_filter_choice, str) or content_filter_choice not in {"pruning","BM25"}:
+                    logger.warning("“content_filter_choice”配置项的值“%s”无效, 将不使用内容过滤器", content_filter_choice)
+                    logger.info("Markdown生成器配置加载成功，但未正确选择内容过滤器，目前仅支持pruning和BM25两种内容过滤器")
                 else:
-                    if self._load_config_section("content_filter_choice") not in {"pruning","BM25"}:
-                        print(f"警告: “content_filter_choice”配置项的值“{self._load_config_section('content_filter_choice')}”无效, 将不使用内容过滤器")
-                        print("Markdown生成器配置加载成功，但未正确选择内容过滤器，目前仅支持pruning和BM25两种内容过滤器")
+                    if content_filter_choice == "pruning":
+                        if not self._is_config_section_exist(data, "pruning_content_filter_config"):
+                            logger.warning("“pruning_content_filter_config”配置项不存在, 将不使用内容过滤器")
+                            logger.info("Markdown生成器配置加载成功，但未配置pruning内容过滤器")
+                        elif self._is_config_section_empty(data, "pruning_content_filter_config") \
+                                or not isinstance(data["pruning_content_filter_config"], dict):
+                            logger.warning("“pruning_content_filter_config”配置项为空或不是对象, 将不使用内容过滤器")
+                            logger.info("Markdown生成器配置加载成功，但未正确配置pruning内容过滤器")
+                        else:
+                            config_data["content_filter"] = self._build_pruning_content_filter_config(data)
+                            logger.info("Markdown生成器配置加载成功，已正确配置pruning内容过滤器")
                     else:
-                        if self._load_config_section("content_filter_choice") == "pruning":
-                            if not self._is_config_section_exist("pruning_content_filter_config"):
-                                print("警告: “pruning_content_filter_config”配置项不存在, 将不使用内容过滤器")
-                                print("Markdown生成器配置加载成功，但未配置pruning内容过滤器")
-                            elif self._is_config_section_empty("pruning_content_filter_config"):
-                                print("警告: “pruning_content_filter_config”配置项为空, 将不使用内容过滤器")
-                                print("Markdown生成器配置加载成功，但未正确配置pruning内容过滤器")
-                            else:
-                                config_data["content_filter"] = self.load_pruning_content_filter_config()
-                                print(f"Markdown生成器配置加载成功，已正确配置pruning内容过滤器")
+                        if not self._is_config_section_exist(data, "BM25_content_filter_config"):
+                            logger.warning("“BM25_content_filter_config”配置项不存在, 将不使用内容过滤器")
+                            logger.info("Markdown生成器配置加载成功，但未配置BM25内容过滤器")
+                        elif self._is_config_section_empty(data, "BM25_content_filter_config") \
+                                or not isinstance(data["BM25_content_filter_config"], dict):
+                            logger.warning("“BM25_content_filter_config”配置项为空或不是对象, 将不使用内容过滤器")
+                            logger.info("Markdown生成器配置加载成功，但未正确配置BM25内容过滤器")
                         else:
-                            if not self._is_config_section_exist("BM25_content_filter_config"):
-                                print("警告: “BM25_content_filter_config”配置项不存在, 将不使用内容过滤器")
-                                print("Markdown生成器配置加载成功，但未配置BM25内容过滤器")
-                            elif self._is_config_section_empty("BM25_content_filter_config"):
-                                print("警告: “BM25_content_filter_config”配置项为空, 将不使用内容过滤器")
-                                print("Markdown生成器配置加载成功，但未正确配置BM25内容过滤器")
-                            else:
-                                config_data["content_filter"] = self.load_BM25_content_filter_config()
-                                print(f"Markdown生成器配置加载成功，已正确配置BM25内容过滤器")
-
-            self._config_cache["markdown_generator_config"] = DefaultMarkdownGenerator(**config_data)
-        return self._config_cache["markdown_generator_config"]
-
-    def load_pruning_content_filter_config(self) -> PruningContentFilter:
-        """加载pruning内容过滤器配置。
-        
+                            config_data["content_filter"] = self._build_BM25_content_filter_config(data)
+                            logger.info("Markdown生成器配置加载成功，已正确配置BM25内容过滤器")
+
+        return DefaultMarkdownGenerator(**config_data)
+
+    def _build_pruning_content_filter_config(self, data: dict) -> "PruningContentFilter":
+        """构建pruning内容过滤器配置。
+
+        Args:
+            data (dict): 配置文件内容。
+
         Returns:
             PruningContentFilter: pruning内容过滤器对象。
         """
-        print("正在加载pruning内容过滤器配置...")
-        if "pruning_content_filter_config" not in self._config_cache:
-            config_data = self._load_config_section("pruning_content_filter_config")
-            print("pruning内容过滤器配置加载成功")
-            self._config_cache["pruning_content_filter_config"] = PruningContentFilter(**config_data)
-        return self._config_cache["pruning_content_filter_config"]
+        from crawl4ai.content_filter_strategy import PruningContentFilter
+        logger.debug("正在加载pruning内容过滤器配置...")
+        config_data = self._load_config_section(data, "pruning_content_filter_config")
+        logger.info("pruning内容过滤器配置加载成功")
+        return PruningContentFilter(**config_data)
 
-    def load_BM25_content_filter_config(self) -> BM25ContentFilter:
-        """加载BM25内容过滤器配置。
+    def _build_BM25_content_filter_config(self, data: dict) -> "BM25ContentFilter":
+        """构建BM25内容过滤器配置。
+
+        Args:
+            data (dict): 配置文件内容。
 
         Returns:
             BM25ContentFilter: BM25内容过滤器对象。
         """
-        print("正在加载BM25内容过滤器配置...")
-        if "BM25_content_filter_config" not in self._config_cache:
-            config_data = self._load_config_section("BM25_content_filter_config")
-            print("BM25内容过滤器配置加载成功")
-            self._config_cache["BM25_content_filter_config"] = BM25ContentFilter(**config_data)
-        return self._config_cache["BM25_content_filter_config"]
+        from crawl4ai.content_filter_strategy import BM25ContentFilter
+        logger.debug("正在加载BM25内容过滤器配置...")
+        config_data = self._load_config_section(data, "BM25_content_filter_config")
+        logger.info("BM25内容过滤器配置加载成功")
+        return BM25ContentFilter(**config_data)
 
 
-    def _is_config_section_exist(self, section: str) -> bool:
+    @staticmethod
+    def _is_config_section_exist(data: dict, section: str) -> bool:
         """检查配置项是否存在。
-        
+
         Args:
+            data (dict): 配置文件内容。
             section (str): 配置项名称。
-            
+
         Returns:
             bool: 如果配置项存在，返回True，否则返回False。
         """
-        with open(self.config_path, 'r') as f:
-            full_config = json.load(f)
-            if section not in full_config:
-                return False
-            return True
+        return section in data
 
-    def _is_config_section_empty(self, section: str) -> bool:
+    @staticmethod
+    def _is_config_section_empty(data: dict, section: str) -> bool:
         """检查配置项是否为空。
-        
+
         Args:
+            data (dict): 配置文件内容。
             section (str): 配置项名称。
-            
+
         Returns:
             bool: 如果配置项为空，返回True，否则返回False。
         """
-        with open(self.config_path, 'r') as f:
-            full_config = json.load(f)
-            if not full_config[section]:
-                return True
-            return False
+        return not data[section]
 
 
-    def _load_config_section(self, section: str):
+    @staticmethod
+    def _load_config_section(data: dict, section: str):
         """加载特定配置项的内容。
-        
+
         Args:
+            data (dict): 配置文件内容。
             section (str): 配置项名称。
-            
+
         Returns:
             dict or str: 配置项的内容，如果加载失败则返回默认值default_value。
         """
-        default_value = "" if section == "output_format" else {}
-        
-        try:
-            # 处理文件访问异常
-            with open(self.config_path, 'r') as f:
-                full_config = json.load(f)
-                
-                # 检查目标section的数据类型
-                section_value = full_config.get(section)
-                if isinstance(section_value, dict):
-                    return section_value
-                elif isinstance(section_value, str) or section_value is None:
-                    return section_value if section_value is not None else default_value
-                else:
-                    print(f"警告: “{section}”获取失败，配置项类型无效，应为字典或字符串，将使用默认空值")
-                    return default_value
-        # 捕获其他未知异常
-        except Exception as e:
-            print(f"未知错误: {e}")
-            return default_value
\ No newline at end of file
+        default_value = "" if section in {"output_format", "content_filter_choice"} else {}
+
+        # 检查目标section的数据类型
+        section_value = data.get(section)
+        if isinstance(section_value, dict):
+            return section_value
+        elif isinstance(section_value, str) or section_value is None:
+            return section_value if section_value is not None else default_value
+        else:
+            logger.warning("“%s”获取失败，配置项类型无效，应为字典或字符串，将使用默认空值", section)
+            return default_value
@@ -1,19 +1,268 @@
 import asyncio
-from crawl4ai import AsyncWebCrawler
+from typing import TYPE_CHECKING, AsyncIterator, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from .admission import admission
+from .browser_sessions import domain_sessions
+from .crawler_pool import pool_manager
+from .incremental import incremental
+from .metrics import crawl_results, stage_timer
+from .postprocess import markdown_offloader
+from .result_cache import result_cache
+from .single_flight import crawl_flights
+from .worker_supervisor import worker_supervisor
 from ..models.schemas import CrawlRequest, CrawlResponse
+from ..utils.fingerprint import request_fingerprint
 
+if TYPE_CHECKING:
+    from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+    from crawl4ai.markdown_generation_strategy import MarkdownGenerationStrategy
 
-async def main(request: CrawlRequest) -> CrawlResponse:
 
-    # 爬虫主逻辑
-    async with AsyncWebCrawler(config=request.browser_config) as crawler:
-        result = await crawler.arun(url=request.url, config=request.crawler_run_config)
+# 不需要生成Markdown的输出格式
+HTML_OUTPUT_FORMATS = {"html", "cleared_html"}
+
+
+def split_output_formats(output_format: str) -> List[str]:
+    """拆分以逗号分隔的多个输出格式。"""
+    return output_format.split(",")
+
+
+def content_bytes(response: CrawlResponse) -> int:
+    """计算爬取结果中所有内容的UTF-8字节数。"""
+    parts = response.contents.values() if response.contents is not None else (response.content,)
+    return sum(len((part or "").encode("utf-8")) for part in parts)
+
 
+def _select_content(result, output_format: str, markdown=None) -> str:
+    """从爬取结果中取出单个输出格式的内容。"""
+    if output_format in HTML_OUTPUT_FORMATS:
+        # cleared_html对应爬取结果中的cleaned_html
+        return getattr(result, "cleaned_html" if output_format == "cleared_html" else output_format)
+    if markdown is not None:
+        return getattr(markdown, "raw_markdown" if output_format == "markdown" else output_format)
+    if output_format != "markdown":
+        return getattr(result.markdown, output_format)
+    return result.markdown
+
+
+def _build_response(result, output_format: str, markdown=None) -> CrawlResponse:
+    """根据输出格式从爬取结果中取出返回内容，markdown不为None时使用进程池生成的Markdown结果。
+
+    output_format为以逗号分隔的多个输出格式时，一次爬取的结果按格式放入contents，不需要重复爬取。
+    """
     # 检查爬取是否成功并返回爬取结果
     if result.success:
-        if request.output_format not in {"markdown", "html", "cleared_html"}:
-            return CrawlResponse(success=True, content=getattr(result.markdown, request.output_format))
-        else:
-            return CrawlResponse(success=True, content=getattr(result, request.output_format))
+        links = [link["href"] for kind in ("internal", "external")
+                 for link in (result.links or {}).get(kind, []) if link.get("href")]
+        formats = split_output_formats(output_format)
+        if len(formats) == 1:
+            return CrawlResponse(success=True, content=_select_content(result, output_format, markdown), links=links)
+        contents = {name: _select_content(result, name, markdown) for name in formats}
+        return CrawlResponse(success=True, contents=contents, links=links)
     else:
-        return CrawlResponse(success=False, error_message=result.error_message)
\ No newline at end of file
+        return CrawlResponse(success=False, error_message=result.error_message)
+
+
+def _run_config(crawler_run_config: "CrawlerRunConfig") -> "CrawlerRunConfig":
+    """启用进程池后处理时，爬取阶段跳过Markdown生成，只在需要Markdown的输出格式下交给进程池生成；
+    否则在爬取过程中照常生成Markdown，并单独记录Markdown生成与内容过滤的耗时。"""
+    if markdown_offloader.enabled:
+        return markdown_offloader.deferred_config(crawler_run_config)
+    return markdown_offloader.timed_config(crawler_run_config)
+
+
+async def _finish(result, crawler_run_config: "CrawlerRunConfig", output_format: str) -> CrawlResponse:
+    """完成后处理并根据输出格式构建爬取结果。"""
+    markdown = None
+    needs_markdown = any(name not in HTML_OUTPUT_FORMATS for name in split_output_formats(output_format))
+    if markdown_offloader.enabled and result.success and needs_markdown:
+        markdown = await markdown_offloader.render(markdown_offloader.generator_of(crawler_run_config), result)
+    return _build_response(result, output_format, markdown)
+
+
+async def _fetch_local(url: str, browser_config: "BrowserConfig", crawler_run_config: "CrawlerRunConfig",
+                       output_format: str) -> CrawlResponse:
+    """在当前进程中使用浏览器池实际爬取单个URL。"""
+    # 从常驻的浏览器池中租借浏览器，避免每次请求都启动新的浏览器；同一主机的请求优先复用已有其浏览器上下文的浏览器
+    async with pool_manager.lease(browser_config, urlparse(url).hostname) as crawler:
+        with stage_timer("page_fetch"), domain_sessions.visit(url) as visit:
+            result = await crawler.arun(url=url, config=_run_config(crawler_run_config))
+            visit.success = result.success
+    return await _finish(result, crawler_run_config, output_format)
+
+
+async def _render_static(url: str, html: str, crawler_run_config: "CrawlerRunConfig", output_format: str) -> CrawlResponse:
+    """不启动浏览器，直接由HTTP请求得到的HTML生成爬取结果，用于被标记为静态页面的主机。"""
+    crawler = await incremental.static_crawler()
+    # 以原始URL作为基准地址，保证相对链接被正确解析
+    config = _run_config(crawler_run_config).clone(base_url=url)
+    with stage_timer("static_render"):
+        result = await crawler.arun(url="raw:" + html, config=config)
+    response = await _finish(result, crawler_run_config, output_format)
+    crawl_results.labels(str(response.success).lower()).inc()
+    return response
+
+
+async def _fetch(url: str, browser_config: "BrowserConfig", crawler_run_config: "CrawlerRunConfig",
+                 output_format: str) -> CrawlResponse:
+    """爬取单个URL，多进程模式下交给爬取工作进程执行。"""
+    if worker_supervisor.enabled:
+        with stage_timer("worker_dispatch"):
+            response = await worker_supervisor.dispatch(url, browser_config, crawler_run_config, output_format)
+    else:
+        response = await _fetch_local(url, browser_config, crawler_run_config, output_format)
+    crawl_results.labels(str(response.success).lower()).inc()
+    return response
+
+
+async def crawl_url(url: str, browser_config: "BrowserConfig", crawler_run_config: "CrawlerRunConfig",
+                    output_format: str, max_age: Optional[float] = None,
+                    deadline: Optional[float] = None) -> CrawlResponse:
+    """爬取单个URL，优先返回结果缓存中仍然有效的结果，并合并对同一URL和配置的并发爬取。
+
+    Args:
+        url (str): 已经过处理的URL。
+        browser_config (BrowserConfig): 浏览器配置。
+        crawler_run_config (CrawlerRunConfig): 爬虫运行配置。
+        output_format (str): 输出格式。
+        max_age (float): 可接受的最大缓存时长（秒），None表示使用全局TTL，0表示跳过缓存。
+        deadline (float): 以time.monotonic()为基准的排队截止时间，None表示使用准入控制的默认排队时长。
+
+    Returns:
+        CrawlResponse: 爬取结果。
+
+    Raises:
+        AdmissionRejected: 准入控制拒绝本次爬取时抛出。
+    """
+    fingerprint = request_fingerprint(browser_config, crawler_run_config)
+    cached = await result_cache.get(url, fingerprint, output_format, max_age)
+    if cached is not None:
+        return cached
+
+    async def fetch_and_store() -> CrawlResponse:
+        # 只有真正需要启动爬取的请求才经过准入控制，缓存命中和被合并的请求不占用名额
+        async with admission.slot(urlparse(url).netloc, deadline):
+            if incremental.enabled:
+                # 增量刷新：先发送条件请求，页面未变化时跳过渲染和Markdown生成
+                response = await incremental.fetch(
+                    url, result_cache.make_key(url, fingerprint, output_format), browser_config.user_agent,
+                    lambda: _fetch(url, browser_config, crawler_run_config, output_format),
+                    lambda html: _render_static(url, html, crawler_run_config, output_format),
+                    check_robots=bool(getattr(crawler_run_config, "check_robots_txt", False)),
+                )
+            else:
+                response = await _fetch(url, browser_config, crawler_run_config, output_format)
+        await result_cache.set(url, fingerprint, output_format, response)
+        return response
+
+    # 第一个请求负责爬取，同时到达的相同请求等待同一个结果
+    key = result_cache.make_key(url, fingerprint, output_format)
+    return await crawl_flights.do(key, fetch_and_store)
+
+
+async def iter_batch(urls: List[str], browser_config: "BrowserConfig", crawler_run_config: "CrawlerRunConfig",
+                     output_format: str, max_concurrency: int = 8, per_domain_concurrency: int = 2,
+                     max_age: Optional[float] = None) -> AsyncIterator[Tuple[int, CrawlResponse]]:
+    """以受限并发爬取一批URL，按完成顺序逐个产出结果，单个URL失败不影响其他URL。
+
+    Args:
+        urls (List[str]): 已经过处理的URL列表。
+        browser_config (BrowserConfig): 浏览器配置。
+        crawler_run_config (CrawlerRunConfig): 爬虫运行配置。
+        output_format (str): 输出格式。
+        max_concurrency (int): 全局最大并发数。
+        per_domain_concurrency (int): 单个域名的最大并发数。
+        max_age (float): 可接受的最大缓存时长（秒）。
+
+    Yields:
+        Tuple[int, CrawlResponse]: URL在urls中的下标及其爬取结果。
+    """
+    global_limit = asyncio.Semaphore(max(1, int(max_concurrency)))
+    domain_limits = {}
+
+    async def crawl_one(index: int, url: str) -> Tuple[int, CrawlResponse]:
+        domain = urlparse(url).netloc
+        if domain not in domain_limits:
+            domain_limits[domain] = asyncio.Semaphore(max(1, int(per_domain_concurrency)))
+        # 先占用域名名额再占用全局名额，避免同一域名的请求占满全局并发
+        async with domain_limits[domain], global_limit:
+            try:
+                return index, await crawl_url(url, browser_config, crawler_run_config, output_format, max_age)
+            except Exception as e:
+                return index, CrawlResponse(success=False, error_message=str(e))
+
+    tasks = [asyncio.create_task(crawl_one(index, url)) for index, url in enumerate(urls)]
+    try:
+        for task in asyncio.as_completed(tasks):
+            yield await task
+    finally:
+        # 调用方提前停止迭代（例如客户端断开连接）时，取消尚未完成的爬取
+        for task in tasks:
+            task.cancel()
+
+
+async def crawl_batch(urls: List[str], browser_config: "BrowserConfig", crawler_run_config: "CrawlerRunConfig",
+                      output_format: str, max_concurrency: int = 8, per_domain_concurrency: int = 2,
+                      max_age: Optional[float] = None) -> List[CrawlResponse]:
+    """以受限并发爬取一批URL，等待全部完成后一次性返回。
+
+    Args:
+        urls (List[str]): 已经过处理的URL列表。
+        browser_config (BrowserConfig): 浏览器配置。
+        crawler_run_config (CrawlerRunConfig): 爬虫运行配置。
+        output_format (str): 输出格式。
+        max_concurrency (int): 全局最大并发数。
+        per_domain_concurrency (int): 单个域名的最大并发数。
+        max_age (float): 可接受的最大缓存时长（秒）。
+
+    Returns:
+        List[CrawlResponse]: 与urls一一对应的爬取结果。
+    """
+    responses = [None] * len(urls)
+    async for index, response in iter_batch(urls, browser_config, crawler_run_config, output_format,
+                                            max_concurrency, per_domain_concurrency, max_age):
+        responses[index] = response
+    return responses
+
+
+async def crawl_variants(url: str, browser_config: "BrowserConfig", crawler_run_config: "CrawlerRunConfig",
+                         variants: Dict[str, Tuple["MarkdownGenerationStrategy", str]],
+                         max_age: Optional[float] = None) -> CrawlResponse:
+    """只爬取一次页面，再用不同的Markdown生成器和内容过滤器为同一份HTML生成多个变体。
+
+    页面的HTML与普通爬取共用结果缓存、请求合并和准入控制，各个变体在进程池或线程中并行生成。
+
+    Args:
+        url (str): 已经过处理的URL。
+        browser_config (BrowserConfig): 浏览器配置。
+        crawler_run_config (CrawlerRunConfig): 爬虫运行配置。
+        variants (Dict[str, Tuple[MarkdownGenerationStrategy, str]]): 变体名称到(Markdown生成器, 输出格式)的映射。
+        max_age (float): 可接受的最大缓存时长（秒）。
+
+    Returns:
+        CrawlResponse: 爬取结果，各个变体的内容位于contents中。
+    """
+    # 按生成器的content_source确定需要的HTML，fit_html来源与crawl4ai一样退回到cleaned_html
+    sources = {name: "html" if generator.content_source == "raw_html" else "cleared_html"
+               for name, (generator, _) in variants.items()}
+    html_formats = ",".join(sorted(set(sources.values())))
+    response = await crawl_url(url, browser_config, crawler_run_config, html_formats, max_age)
+    if not response.success:
+        return response
+    html = response.contents if response.contents is not None else {html_formats: response.content}
+
+    async def render(name: str) -> Optional[str]:
+        generator, output_format = variants[name]
+        markdown = await markdown_offloader.render_html(generator, html[sources[name]] or "", url)
+        return getattr(markdown, "raw_markdown" if output_format == "markdown" else output_format)
+
+    names = list(variants)
+    contents = await asyncio.gather(*(render(name) for name in names))
+    return CrawlResponse(success=True, contents=dict(zip(names, contents)), unchanged=response.unchanged)
+
+
+async def main(request: CrawlRequest) -> CrawlResponse:
+
+    # 爬虫主逻辑
+    return await crawl_url(request.url, request.browser_config, request.crawler_run_config, request.output_format,
+                           request.max_age, request.deadline)
@@ -0,0 +1,322 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Optional
+from .browser_sessions import domain_sessions
+from .metrics import browser_launches, stage_timer
+from ..utils.fingerprint import config_fingerprint
+
+if TYPE_CHECKING:
+    from crawl4ai import AsyncWebCrawler
+    from crawl4ai.async_configs import BrowserConfig
+
+try:
+    import psutil
+except ImportError:  # psutil为可选依赖，缺失时不做内存检查
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+
+class _PooledCrawler:
+    """池中的单个浏览器实例及其使用统计。"""
+    def __init__(self, crawler: "AsyncWebCrawler"):
+        self.crawler = crawler
+        self.pages = 0
+        self.healthy = True
+        self.domains = OrderedDict() # 最近在该浏览器中爬取过的主机，其浏览器上下文仍保留在浏览器中
+
+
+def _browser_tree_rss_mb() -> float:
+    """统计当前进程及其子进程（浏览器）的常驻内存，单位MB。"""
+    if psutil is None:
+        return 0.0
+    try:
+        process = psutil.Process()
+        rss = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return rss / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+class CrawlerPool:
+    """同一BrowserConfig下常驻的浏览器池，支持租借/归还、健康检查与定期回收。"""
+    def __init__(self, browser_config: "BrowserConfig", size: int = 2, max_pages_per_browser: int = 100,
+                 max_memory_mb: int = 0, health_check_interval: float = 30, domain_contexts: bool = True,
+                 max_contexts_per_browser: int = 20):
+        """初始化CrawlerPool实例。
+
+        Args:
+            browser_config (BrowserConfig): 池内所有浏览器共用的配置。
+            size (int): 池内浏览器的最大数量。
+            max_pages_per_browser (int): 单个浏览器爬取多少个页面后被回收，0表示不限制。
+            max_memory_mb (int): 浏览器进程树的内存上限，超过后归还的浏览器会被回收，0表示不限制。
+            health_check_interval (float): 空闲浏览器健康检查的间隔秒数，0表示不检查。
+            domain_contexts (bool): 是否为每个主机保留独立的浏览器上下文，并优先把同一主机的请求交给同一个浏览器。
+            max_contexts_per_browser (int): 单个浏览器最多保留的浏览器上下文数量。
+        """
+        self.browser_config = browser_config
+        self.fingerprint = config_fingerprint(browser_config)
+        self.size = max(1, size)
+        self.max_pages_per_browser = max_pages_per_browser
+        self.max_memory_mb = max_memory_mb
+        self.health_check_interval = health_check_interval
+        self.domain_contexts = domain_contexts
+        self.max_contexts_per_browser = max(1, int(max_contexts_per_browser))
+
+        self._slots = asyncio.Semaphore(self.size)
+        self._idle = []
+        self._in_use = 0
+        self._closed = False
+        self._drained = asyncio.Event()
+        self._drained.set()
+        self._health_task = None
+
+    @property
+    def in_use(self) -> int:
+        """当前被租借中的浏览器数量。"""
+        return self._in_use
+
+    @property
+    def idle(self) -> int:
+        """当前空闲的浏览器数量。"""
+        return len(self._idle)
+
+    async def start(self):
+        """预热浏览器池，并启动后台健康检查任务。"""
+        crawlers = await asyncio.gather(
+            *(self._launch() for _ in range(self.size)), return_exceptions=True
+        )
+        for item in crawlers:
+            if isinstance(item, _PooledCrawler):
+                self._idle.append(item)
+            else:
+                logger.warning("浏览器预热失败: %s", item)
+        if self.health_check_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _launch(self) -> _PooledCrawler:
+        """启动一个新的浏览器实例。"""
+        from crawl4ai import AsyncWebCrawler
+        crawler = AsyncWebCrawler(config=self.browser_config)
+        await crawler.start()
+        domain_sessions.install(crawler, self.domain_contexts, self.max_contexts_per_browser)
+        browser_launches.inc()
+        return _PooledCrawler(crawler)
+
+    async def _dispose(self, slot: _PooledCrawler):
+        """关闭浏览器实例，关闭过程中的异常不向外传播。"""
+        try:
+            await slot.crawler.close()
+        except Exception as e:
+            logger.warning("浏览器关闭失败: %s", e)
+
+    @staticmethod
+    def _is_alive(slot: _PooledCrawler) -> bool:
+        """检查浏览器实例是否仍然可用。"""
+        if not slot.healthy or not getattr(slot.crawler, "ready", True):
+            return False
+        browser_manager = getattr(slot.crawler.crawler_strategy, "browser_manager", None)
+        browser = getattr(browser_manager, "browser", None)
+        if browser is not None and hasattr(browser, "is_connected"):
+            return browser.is_connected()
+        return True
+
+    def _needs_recycle(self, slot: _PooledCrawler) -> bool:
+        """判断归还的浏览器是否需要回收。"""
+        if self._closed or not self._is_alive(slot):
+            return True
+        if self.max_pages_per_browser and slot.pages >= self.max_pages_per_browser:
+            return True
+        if self.max_memory_mb and _browser_tree_rss_mb() > self.max_memory_mb:
+            return True
+        return False
+
+    def _take_idle(self, domain: Optional[str]) -> _PooledCrawler:
+        """取出一个空闲浏览器，优先选择最近爬取过该主机的浏览器，使其浏览器上下文得到复用。"""
+        if domain is not None and self.domain_contexts:
+            for index in range(len(self._idle) - 1, -1, -1):
+                if domain in self._idle[index].domains:
+                    return self._idle.pop(index)
+        return self._idle.pop()
+
+    async def _acquire(self, domain: Optional[str] = None) -> _PooledCrawler:
+        """租借一个可用的浏览器，池内没有空闲浏览器时按需启动新实例。"""
+        if self._closed:
+            raise RuntimeError("浏览器池已关闭")
+        await self._slots.acquire()
+        try:
+            while self._idle:
+                slot = self._take_idle(domain)
+                if self._is_alive(slot):
+                    break
+                await self._dispose(slot)
+            else:
+                slot = await self._launch()
+        except BaseException:
+            self._slots.release()
+            raise
+        if domain is not None and self.domain_contexts:
+            # 与crawl4ai按最近最少使用淘汰上下文的数量保持一致
+            slot.domains[domain] = None
+            slot.domains.move_to_end(domain)
+            while len(slot.domains) > self.max_contexts_per_browser:
+                slot.domains.popitem(last=False)
+        self._in_use += 1
+        self._drained.clear()
+        return slot
+
+    async def _release(self, slot: _PooledCrawler):
+        """归还浏览器，按需回收后释放池内名额。"""
+        try:
+            slot.pages += 1
+            if self._needs_recycle(slot):
+                await self._dispose(slot)
+            else:
+                self._idle.append(slot)
+        finally:
+            self._in_use -= 1
+            if self._in_use == 0:
+                self._drained.set()
+            self._slots.release()
+
+    @asynccontextmanager
+    async def lease(self, domain: Optional[str] = None):
+        """以上下文管理器的形式租借浏览器，退出时自动归还。
+
+        Args:
+            domain (str): 目标主机，用于优先选择已有该主机浏览器上下文的浏览器。
+
+        Yields:
+            AsyncWebCrawler: 已启动的爬虫实例。
+        """
+        with stage_timer("browser_acquire"):
+            slot = await self._acquire(domain)
+        try:
+            yield slot.crawler
+        except Exception:
+            # 爬取过程中抛出异常的浏览器状态不可信，归还时直接回收
+            slot.healthy = False
+            raise
+        finally:
+            await self._release(slot)
+
+    async def _health_loop(self):
+        """定期检查空闲浏览器，移除已断开的实例，单次检查失败不会结束检查任务。"""
+        while not self._closed:
+            await asyncio.sleep(self.health_check_interval)
+            try:
+                for slot in list(self._idle):
+                    # 回收前一个浏览器期间，快照中的浏览器可能已被租出或回收
+                    if slot in self._idle and not self._is_alive(slot):
+                        self._idle.remove(slot)
+                        await self._dispose(slot)
+            except Exception:
+                logger.exception("浏览器池健康检查失败")
+
+    async def close(self, wait: bool = True):
+        """关闭浏览器池。
+
+        Args:
+            wait (bool): 是否等待租借中的浏览器全部归还后再返回。
+        """
+        self._closed = True
+        if self._health_task is not None:
+            self._health_task.cancel()
+        idle, self._idle = self._idle, []
+        await asyncio.gather(*(self._dispose(slot) for slot in idle))
+        if wait:
+            await self._drained.wait()
+
+
+class CrawlerPoolManager:
+    """按BrowserConfig指纹管理浏览器池，配置变更时切换到新池，旧池在请求完成后关闭。"""
+    def __init__(self):
+        self._pool = None
+        self._settings = {}
+        self._lock = asyncio.Lock()
+        self._retiring = set()
+
+    def configure(self, settings: dict):
+        """更新浏览器池参数，新参数在下一次创建浏览器池时生效。
+
+        Args:
+            settings (dict): 浏览器池配置，见ConfigLoader.load_crawler_pool_config。
+        """
+        self._settings = dict(settings)
+
+    @property
+    def current(self):
+        """当前正在使用的浏览器池，尚未创建时为None。"""
+        return self._pool
+
+    async def start(self, browser_config: "BrowserConfig"):
+        """按给定配置创建并预热浏览器池。
+
+        Args:
+            browser_config (BrowserConfig): 浏览器配置。
+        """
+        await self.get_pool(browser_config)
+
+    async def get_pool(self, browser_config: "BrowserConfig") -> CrawlerPool:
+        """获取与浏览器配置匹配的浏览器池，配置变化时替换旧池。
+
+        Args:
+            browser_config (BrowserConfig): 浏览器配置。
+
+        Returns:
+            CrawlerPool: 匹配的浏览器池。
+        """
+        pool = self._pool
+        if pool is not None and pool.fingerprint == config_fingerprint(browser_config):
+            return pool
+        async with self._lock:
+            pool = self._pool
+            if pool is not None and pool.fingerprint == config_fingerprint(browser_config):
+                return pool
+            new_pool = CrawlerPool(browser_config, **self._settings)
+            await new_pool.start()
+            self._pool = new_pool
+            if pool is not None:
+                logger.info("浏览器配置已变更，正在切换浏览器池")
+                self._retire(pool)
+            return new_pool
+
+    def _retire(self, pool: CrawlerPool):
+        """在后台关闭旧的浏览器池，进行中的爬取不受影响。"""
+        task = asyncio.create_task(pool.close(wait=True))
+        self._retiring.add(task)
+        task.add_done_callback(self._retiring.discard)
+
+    @asynccontextmanager
+    async def lease(self, browser_config: "BrowserConfig", domain: Optional[str] = None):
+        """从匹配配置的浏览器池中租借一个浏览器。
+
+        Args:
+            browser_config (BrowserConfig): 浏览器配置。
+            domain (str): 目标主机，用于优先选择已有该主机浏览器上下文的浏览器。
+
+        Yields:
+            AsyncWebCrawler: 已启动的爬虫实例。
+        """
+        pool = await self.get_pool(browser_config)
+        async with pool.lease(domain) as crawler:
+            yield crawler
+
+    async def close(self):
+        """关闭所有浏览器池，等待进行中的爬取结束。"""
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await pool.close(wait=True)
+        if self._retiring:
+            await asyncio.gather(*self._retiring, return_exceptions=True)
+
+
+# 进程内共享的浏览器池管理器
+pool_manager = CrawlerPoolManager()
@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import heapq
+import itertools
+import math
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator, Dict, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+from .crawler import content_bytes, crawl_url
+from ..models.schemas import CrawlResponse
+from ..utils.url_utils import URLUtils
+
+if TYPE_CHECKING:
+    from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+
+
+class BloomFilter:
+    """记录已访问URL的布隆过滤器，每个URL只占用固定的若干个比特，适合百万级别的URL。
+
+    存在极小的误判率（把未访问的URL判断为已访问），不会把已访问的URL判断为未访问，因此不会重复爬取。
+    """
+    def __init__(self, capacity: int = 1000000, error_rate: float = 0.0001):
+        """初始化BloomFilter实例。
+
+        Args:
+            capacity (int): 预计存放的URL数量。
+            error_rate (float): 达到预计数量时可接受的误判率。
+        """
+        capacity = max(1, int(capacity))
+        error_rate = min(max(error_rate, 1e-9), 0.5)
+        self.size = max(8, int(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, item: str):
+        """由一次blake2b摘要通过双重哈希得到各个比特位置。"""
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return ((first + index * second) % self.size for index in range(self.hashes))
+
+    def add(self, item: str) -> bool:
+        """加入一个元素。
+
+        Args:
+            item (str): 规范化后的URL。
+
+        Returns:
+            bool: 元素此前不存在时返回True。
+        """
+        added = False
+        for position in self._positions(item):
+            byte, bit = divmod(position, 8)
+            if not self._bits[byte] & (1 << bit):
+                self._bits[byte] |= 1 << bit
+                added = True
+        if added:
+            self.count += 1
+        return added
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position // 8] & (1 << (position % 8)) for position in self._positions(item))
+
+
+class Frontier:
+    """待爬取URL的队列：每个主机一个按深度排序的优先队列，主机之间轮流出队，并限制单个主机的并发数。"""
+    def __init__(self, per_host_concurrency: int = 2):
+        """初始化Frontier实例。
+
+        Args:
+            per_host_concurrency (int): 单个主机同时进行的爬取数量上限。
+        """
+        self.per_host_concurrency = max(1, int(per_host_concurrency))
+        self._queues: Dict[str, list] = {}
+        self._hosts = deque()
+        self._active: Dict[str, int] = {}
+        self._sequence = itertools.count()
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def push(self, url: str, depth: int):
+        """加入一个待爬取的URL，深度越小越先出队。"""
+        host = urlparse(url).netloc
+        queue = self._queues.get(host)
+        if queue is None:
+            queue = self._queues[host] = []
+            self._hosts.append(host)
+        heapq.heappush(queue, (depth, next(self._sequence), url))
+        self._size += 1
+
+    def pop(self) -> Optional[Tuple[str, int]]:
+        """按主机轮流取出下一个可以开始爬取的URL，所有主机都已达到并发上限时返回None。
+
+        Returns:
+            Tuple[str, int]: URL及其深度。
+        """
+        for _ in range(len(self._hosts)):
+            host = self._hosts[0]
+            self._hosts.rotate(-1)
+            if self._active.get(host, 0) >= self.per_host_concurrency:
+                continue
+            queue = self._queues[host]
+            depth, _, url = heapq.heappop(queue)
+            if not queue:
+                del self._queues[host]
+                self._hosts.remove(host)
+            self._active[host] = self._active.get(host, 0) + 1
+            self._size -= 1
+            return url, depth
+        return None
+
+    def done(self, url: str):
+        """标记URL爬取结束，释放其所在主机的并发名额。"""
+        host = urlparse(url).netloc
+        self._active[host] -= 1
+        if not self._active[host]:
+            del self._active[host]
+
+
+async def iter_site(seed_url: str, browser_config: "BrowserConfig", crawler_run_config: "CrawlerRunConfig",
+                    output_format: str, settings: dict,
+                    max_age: Optional[float] = None) -> AsyncIterator[Tuple[str, int, CrawlResponse]]:
+    """从起始URL开始按广度优先爬取整个站点，按完成顺序逐个产出结果。
+
+    链接在加入队列前经过URLUtils.normalize_urls规范化，并按规范化形式（排序查询参数、移除跟踪参数等）
+    通过布隆过滤器去重，同一页面的不同写法只会爬取一次；实际爬取时保留原始的查询字符串。robots.txt检查沿用爬虫运行配置；
+    爬虫运行配置启用exclude_external_links时只跟随与起始URL位于同一主机和端口的链接，否则也跟随其他站点的链接。
+
+    Args:
+        seed_url (str): 已经过处理的起始URL。
+        browser_config (BrowserConfig): 浏览器配置。
+        crawler_run_config (CrawlerRunConfig): 爬虫运行配置。
+        output_format (str): 输出格式。
+        settings (dict): 整站爬取配置，见ConfigLoader.SETTINGS_SECTIONS中的deep_crawl_config。
+        max_age (float): 可接受的最大缓存时长（秒）。
+
+    Yields:
+        Tuple[str, int, CrawlResponse]: 页面URL、深度及其爬取结果。
+    """
+    max_depth = int(settings["max_depth"])
+    max_pages = int(settings["max_pages"])
+    max_bytes = int(settings["max_bytes"])
+    max_concurrency = max(1, int(settings["max_concurrency"]))
+    seed = URLUtils.normalize(seed_url)
+    seed_origin = (seed.host, seed.port)
+    # 排除外部链接时只跟随与起始URL位于同一主机和端口的链接
+    same_origin = bool(getattr(crawler_run_config, "exclude_external_links", False))
+
+    visited = BloomFilter(settings["visited_capacity"], settings["visited_error_rate"])
+    frontier = Frontier(settings["per_host_concurrency"])
+    visited.add(seed.key)
+    frontier.push(seed_url, 0)
+
+    running: Dict[asyncio.Task, Tuple[str, int]] = {}
+    started = 0
+    total_bytes = 0
+
+    async def crawl_one(url: str) -> CrawlResponse:
+        try:
+            return await crawl_url(url, browser_config, crawler_run_config, output_format, max_age)
+        except Exception as e:
+            return CrawlResponse(success=False, error_message=str(e))
+
+    try:
+        while True:
+            # 在页面数和字节数预算内，尽量填满并发名额
+            while len(running) < max_concurrency and started < max_pages and total_bytes < max_bytes:
+                entry = frontier.pop()
+                if entry is None:
+                    break
+                url, depth = entry
+                running[asyncio.create_task(crawl_one(url))] = entry
+                started += 1
+            if not running:
+                return
+
+            finished, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                url, depth = running.pop(task)
+                frontier.done(url)
+                response = task.result()
+                total_bytes += content_bytes(response)
+                if response.success and depth < max_depth and response.links:
+                    # 一次性规范化页面中的全部链接，无效链接直接丢弃
+                    links, _ = URLUtils.normalize_urls([urljoin(url, link) for link in response.links])
+                    for link in links:
+                        if same_origin and (link.host, link.port) != seed_origin:
+                            continue
+                        if visited.add(link.key):
+                            frontier.push(link.url, depth + 1)
+                yield url, depth, response
+    finally:
+        # 调用方提前停止迭代（例如客户端断开连接）时，取消尚未完成的爬取
+        for task in running:
+            task.cancel()
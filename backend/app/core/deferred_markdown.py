@@ -0,0 +1,51 @@
+import time
+from crawl4ai.markdown_generation_strategy import MarkdownGenerationStrategy
+from crawl4ai.models import MarkdownGenerationResult
+from .metrics import stage_seconds
+
+
+class DeferredMarkdownGenerator(MarkdownGenerationStrategy):
+    """占位用的Markdown生成器：爬取时跳过Markdown生成与内容过滤，交由进程池在事件循环之外完成。"""
+    def generate_markdown(self, input_html: str, base_url: str = "", **kwargs) -> MarkdownGenerationResult:
+        return MarkdownGenerationResult(raw_markdown="", markdown_with_citations="", references_markdown="")
+
+
+class _TimedContentFilter:
+    """包装内容过滤器，累计本次Markdown生成中内容过滤的耗时，其余属性转发给原过滤器。"""
+    def __init__(self, content_filter):
+        self._content_filter = content_filter
+        self.seconds = 0.0
+
+    def filter_content(self, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return self._content_filter.filter_content(*args, **kwargs)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+    def __getattr__(self, name):
+        return getattr(self._content_filter, name)
+
+
+class TimedMarkdownGenerator(MarkdownGenerationStrategy):
+    """包装原始的Markdown生成器，在爬取过程中照常生成Markdown，同时分别记录Markdown生成与内容过滤的耗时。
+
+    原始生成器可能被多个请求共享，因此不替换其过滤方法，而是每次生成时传入一个新的计时包装。
+    """
+    def __init__(self, generator: MarkdownGenerationStrategy):
+        super().__init__(generator.content_filter, generator.options, generator.verbose, generator.content_source)
+        self.generator = generator
+
+    def generate_markdown(self, input_html: str, base_url: str = "", **kwargs) -> MarkdownGenerationResult:
+        content_filter = kwargs.get("content_filter") or self.generator.content_filter
+        timed_filter = _TimedContentFilter(content_filter) if content_filter is not None else None
+        if timed_filter is not None:
+            kwargs["content_filter"] = timed_filter
+        started = time.perf_counter()
+        markdown = self.generator.generate_markdown(input_html=input_html, base_url=base_url, **kwargs)
+        seconds = time.perf_counter() - started
+        if timed_filter is not None:
+            seconds -= timed_filter.seconds
+            stage_seconds.labels("content_filtering").observe(timed_filter.seconds)
+        stage_seconds.labels("markdown_generation").observe(seconds)
+        return markdown
@@ -0,0 +1,332 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
+from urllib.parse import urlparse
+from .metrics import incremental_checks
+from ..models.schemas import CrawlResponse
+
+if TYPE_CHECKING:
+    import aiohttp
+    from crawl4ai import AsyncWebCrawler
+    from crawl4ai.utils import RobotsParser
+
+logger = logging.getLogger(__name__)
+
+
+class _Record:
+    """某个URL在某个配置指纹和输出格式下最近一次的验证信息。"""
+    __slots__ = ("etag", "last_modified", "content_hash", "payload")
+
+    def __init__(self, etag: Optional[str], last_modified: Optional[str], content_hash: str, payload: bytes):
+        self.etag = etag
+        self.last_modified = last_modified
+        self.content_hash = content_hash
+        self.payload = payload
+
+
+class ValidatorStore:
+    """保存ETag、Last-Modified、原始响应体哈希以及对应输出结果的SQLite存储。
+
+    配置变更时存储可能在仍有爬取使用它的情况下被关闭，关闭后的读取返回空结果，写入被忽略。
+    """
+    def __init__(self, path: Path):
+        """初始化ValidatorStore实例。
+
+        Args:
+            path (Path): SQLite数据库文件路径。
+        """
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._closed = False
+        self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS validators ("
+            "key TEXT PRIMARY KEY, url TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+            "content_hash TEXT NOT NULL, checked REAL NOT NULL, payload BLOB NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS validators_checked ON validators (checked)")
+
+    def get(self, key: str) -> Optional[_Record]:
+        with self._lock:
+            if self._closed:
+                return None
+            row = self._db.execute(
+                "SELECT etag, last_modified, content_hash, payload FROM validators WHERE key = ?", (key,)
+            ).fetchone()
+        return _Record(*row) if row is not None else None
+
+    def put(self, key: str, url: str, etag: Optional[str], last_modified: Optional[str],
+            content_hash: str, payload: bytes):
+        with self._lock:
+            if self._closed:
+                return
+            self._db.execute(
+                "INSERT OR REPLACE INTO validators (key, url, etag, last_modified, content_hash, checked, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, url, etag, last_modified, content_hash, time.time(), payload),
+            )
+
+    def touch(self, key: str, etag: Optional[str], last_modified: Optional[str]):
+        """内容未变化时只更新验证信息和检查时间。"""
+        with self._lock:
+            if self._closed:
+                return
+            self._db.execute(
+                "UPDATE validators SET etag = COALESCE(?, etag), last_modified = COALESCE(?, last_modified), "
+                "checked = ? WHERE key = ?",
+                (etag, last_modified, time.time(), key),
+            )
+
+    def purge(self, retention_seconds: float) -> int:
+        """删除超过保留时长未被检查过的记录。"""
+        if not retention_seconds:
+            return 0
+        with self._lock:
+            if self._closed:
+                return 0
+            return self._db.execute(
+                "DELETE FROM validators WHERE checked < ?", (time.time() - retention_seconds,)
+            ).rowcount
+
+    def count(self) -> int:
+        with self._lock:
+            if self._closed:
+                return 0
+            return self._db.execute("SELECT COUNT(*) FROM validators").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            if not self._closed:
+                self._closed = True
+                self._db.close()
+
+
+class IncrementalRefresher:
+    """增量刷新：重新爬取前先发送条件请求，页面未变化时直接返回上次的结果，跳过浏览器渲染和Markdown生成。
+
+    每次需要实际爬取时，先以If-None-Match/If-Modified-Since发送一次轻量的HTTP请求：
+    服务端返回304，或响应体的哈希与上次相同时，视为未变化；否则重新渲染并记录新的验证信息。
+    static_hosts中的主机被视为静态页面，直接用这次HTTP请求得到的HTML生成结果，不启动浏览器。
+    爬虫运行配置启用了check_robots_txt时，条件请求前先按robots.txt检查，与浏览器渲染的规则一致。
+    """
+    def __init__(self):
+        self.enabled = False
+        self.request_timeout = 10
+        self.max_body_bytes = 0
+        self.retention_seconds = 0
+        self.static_hosts = frozenset()
+
+        self._store: Optional[ValidatorStore] = None
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._static_crawler: Optional["AsyncWebCrawler"] = None
+        self._static_lock: Optional[asyncio.Lock] = None
+        self._robots: Optional["RobotsParser"] = None
+        self._stats = {"not_modified": 0, "unchanged": 0, "changed": 0, "new": 0, "errors": 0, "static_renders": 0,
+                       "robots_blocked": 0}
+
+    def configure(self, settings: dict):
+        """应用增量刷新配置，数据库路径变化时重新打开存储。
+
+        Args:
+            settings (dict): 增量刷新配置，见ConfigLoader.SETTINGS_SECTIONS中的incremental_config。
+        """
+        self.enabled = settings["enabled"]
+        self.request_timeout = settings["request_timeout"]
+        self.max_body_bytes = settings["max_body_bytes"]
+        self.retention_seconds = settings["retention_seconds"]
+        self.static_hosts = frozenset(host.lower() for host in settings["static_hosts"])
+
+        path = Path(__file__).parent.parent.joinpath(settings["db_path"]) if self.enabled else None
+        if self._store is not None and self._store.path != path:
+            self._store.close()
+            self._store = None
+        if path is not None and self._store is None:
+            try:
+                self._store = ValidatorStore(path)
+            except sqlite3.Error as e:
+                logger.warning("增量刷新存储打开失败，将关闭增量刷新: %s", e)
+                self.enabled = False
+        if self._store is not None:
+            removed = self._store.purge(self.retention_seconds)
+            if removed:
+                logger.info("已清除%s条过期的增量刷新记录", removed)
+
+    def handle_config_reload(self, old_snapshot, new_snapshot):
+        """配置变更监听器：应用新的增量刷新配置。
+
+        需要在事件循环线程中执行，避免在爬取过程中替换存储，见ConfigLoader.add_loop_listener。
+
+        Args:
+            old_snapshot (ConfigSnapshot): 变更前的配置快照。
+            new_snapshot (ConfigSnapshot): 变更后的配置快照。
+        """
+        self.configure(new_snapshot.incremental_config)
+
+    def is_static(self, url: str) -> bool:
+        """判断URL是否属于被标记为静态页面的主机（包括其子域名）。"""
+        host = (urlparse(url).hostname or "").lower()
+        while host:
+            if host in self.static_hosts:
+                return True
+            host = host.partition(".")[2]
+        return False
+
+    async def _get_session(self) -> "aiohttp.ClientSession":
+        import aiohttp
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def static_crawler(self) -> "AsyncWebCrawler":
+        """返回不启动浏览器、只做HTML解析和Markdown生成的爬虫实例。"""
+        if self._static_lock is None:
+            self._static_lock = asyncio.Lock()
+        async with self._static_lock:
+            if self._static_crawler is None:
+                from crawl4ai import AsyncWebCrawler
+                from crawl4ai.async_crawler_strategy import AsyncHTTPCrawlerStrategy
+                crawler = AsyncWebCrawler(crawler_strategy=AsyncHTTPCrawlerStrategy())
+                await crawler.start()
+                self._static_crawler = crawler
+        return self._static_crawler
+
+    async def _robots_allowed(self, url: str, user_agent: Optional[str]) -> bool:
+        """按robots.txt检查是否允许爬取，使用与crawl4ai相同的解析器和缓存。"""
+        if self._robots is None:
+            from crawl4ai.utils import RobotsParser
+            self._robots = RobotsParser()
+        return await self._robots.can_fetch(url, user_agent or "*")
+
+    async def _conditional_get(self, url: str, record: Optional[_Record], user_agent: Optional[str]):
+        """发送条件请求。
+
+        Returns:
+            tuple: (状态码, 响应头, 响应体)，304时响应体为None。
+        """
+        headers = {"Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8"}
+        if user_agent:
+            headers["User-Agent"] = user_agent
+        if record is not None:
+            if record.etag:
+                headers["If-None-Match"] = record.etag
+            if record.last_modified:
+                headers["If-Modified-Since"] = record.last_modified
+        import aiohttp
+        session = await self._get_session()
+        timeout = aiohttp.ClientTimeout(total=self.request_timeout or None)
+        async with session.get(url, headers=headers, timeout=timeout) as response:
+            if response.status == 304:
+                return 304, response.headers, None
+            if self.max_body_bytes and (response.content_length or 0) > self.max_body_bytes:
+                return response.status, response.headers, None
+            body = await response.read()
+            if self.max_body_bytes and len(body) > self.max_body_bytes:
+                body = None
+            return response.status, response.headers, body
+
+    async def fetch(self, url: str, key: str, user_agent: Optional[str],
+                    render_browser: Callable[[], Awaitable[CrawlResponse]],
+                    render_static: Callable[[str], Awaitable[CrawlResponse]],
+                    check_robots: bool = False) -> CrawlResponse:
+        """按增量刷新的规则爬取单个URL。
+
+        条件请求失败、返回非200状态码或响应体过大时，退回到浏览器渲染，且不记录验证信息。
+
+        Args:
+            url (str): 已经过处理的URL。
+            key (str): 由URL、有效配置指纹和输出格式生成的键，见ResultCache.make_key。
+            user_agent (str): 条件请求使用的User-Agent，与浏览器配置保持一致。
+            render_browser (Callable): 使用浏览器渲染页面的函数。
+            render_static (Callable): 由HTML直接生成结果的函数。
+            check_robots (bool): 是否在条件请求前按robots.txt检查，与爬虫运行配置的check_robots_txt一致。
+
+        Returns:
+            CrawlResponse: 爬取结果，页面未变化时unchanged为True。
+        """
+        import aiohttp
+        # 配置变更可能在爬取过程中替换存储，整个过程使用同一个存储
+        store = self._store
+        if store is None:
+            return await render_browser()
+        if check_robots and not await self._robots_allowed(url, user_agent):
+            self._count("robots_blocked")
+            return CrawlResponse(success=False, error_message="Access denied by robots.txt")
+        record = await asyncio.to_thread(store.get, key)
+        try:
+            status, headers, body = await self._conditional_get(url, record, user_agent)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            logger.debug("条件请求失败，退回到浏览器渲染: %s %s", url, e)
+            self._count("errors")
+            return await render_browser()
+
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if status == 304 and record is not None:
+            self._count("not_modified")
+            await asyncio.to_thread(store.touch, key, etag, last_modified)
+            return CrawlResponse.model_validate_json(record.payload).model_copy(update={"unchanged": True})
+        if status != 200 or body is None:
+            self._count("errors")
+            return await render_browser()
+
+        content_hash = hashlib.sha256(body).hexdigest()
+        if record is not None and record.content_hash == content_hash:
+            # 服务端不支持条件请求，但内容与上次完全相同
+            self._count("unchanged")
+            await asyncio.to_thread(store.touch, key, etag, last_modified)
+            return CrawlResponse.model_validate_json(record.payload).model_copy(update={"unchanged": True})
+
+        self._count("changed" if record is not None else "new")
+        if self.is_static(url):
+            self._stats["static_renders"] += 1
+            charset = headers.get("Content-Type", "").partition("charset=")[2].split(";")[0].strip() or "utf-8"
+            try:
+                html = body.decode(charset, errors="replace")
+            except LookupError:
+                html = body.decode("utf-8", errors="replace")
+            response = await render_static(html)
+        else:
+            response = await render_browser()
+        if response.success:
+            await asyncio.to_thread(store.put, key, url, etag, last_modified, content_hash,
+                                    response.model_dump_json().encode("utf-8"))
+        return response.model_copy(update={"unchanged": False})
+
+    def _count(self, outcome: str):
+        self._stats[outcome] += 1
+        incremental_checks.labels(outcome).inc()
+
+    def stats(self) -> dict:
+        """返回增量刷新的检查统计。"""
+        checks = self._stats["not_modified"] + self._stats["unchanged"] + self._stats["changed"]
+        skipped = self._stats["not_modified"] + self._stats["unchanged"]
+        store = self._store
+        return {
+            "enabled": self.enabled,
+            **self._stats,
+            "skip_ratio": skipped / checks if checks else 0.0,
+            "records": store.count() if store is not None else 0,
+        }
+
+    async def close(self):
+        """关闭HTTP会话、静态页面爬虫和存储。"""
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+        if self._static_crawler is not None:
+            await self._static_crawler.close()
+            self._static_crawler = None
+        if self._store is not None:
+            self._store.close()
+            self._store = None
+
+
+# 进程内共享的增量刷新器
+incremental = IncrementalRefresher()
@@ -0,0 +1,231 @@
+import json
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Optional
+
+# 任务状态
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+FINISHED_STATUSES = {SUCCEEDED, FAILED, CANCELLED}
+
+
+class JobStore:
+    """基于SQLite的持久化任务队列。
+
+    任务通过租约（lease）分配给工作者，租约过期的任务会被其他工作者重新领取，
+    因此进程崩溃或重启后未完成的任务可以继续执行，多个uvicorn进程也可以共享同一个队列文件。
+    """
+    def __init__(self, db_path: Path):
+        """初始化JobStore实例。
+
+        Args:
+            db_path (Path): SQLite数据库文件路径。
+        """
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(str(db_path), check_same_thread=False, isolation_level=None, timeout=30)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            "id TEXT PRIMARY KEY, status TEXT NOT NULL, url TEXT NOT NULL, output_format TEXT NOT NULL, "
+            "max_age REAL, attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL, "
+            "next_run_at REAL NOT NULL, lease_owner TEXT, lease_expires REAL, "
+            "result TEXT, error_message TEXT, created_at REAL NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS jobs_runnable ON jobs (status, next_run_at)")
+
+    def close(self):
+        """关闭数据库连接。"""
+        with self._lock:
+            self._db.close()
+
+    @staticmethod
+    def _to_dict(row: Optional[sqlite3.Row]) -> Optional[dict]:
+        """将数据库行转换为字典，并解析结果字段。"""
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
+    def create(self, url: str, output_format: str, max_age: Optional[float], max_attempts: int) -> dict:
+        """创建新任务。
+
+        Args:
+            url (str): 经过处理的URL。
+            output_format (str): 输出格式。
+            max_age (float): 可接受的最大缓存时长（秒）。
+            max_attempts (int): 最大尝试次数。
+
+        Returns:
+            dict: 新创建的任务。
+        """
+        now = time.time()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._db.execute(
+                "INSERT INTO jobs (id, status, url, output_format, max_age, max_attempts, next_run_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, QUEUED, url, output_format, max_age, max(1, max_attempts), now, now, now),
+            )
+            return self._to_dict(self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def get(self, job_id: str) -> Optional[dict]:
+        """查询任务。
+
+        Args:
+            job_id (str): 任务ID。
+
+        Returns:
+            dict: 任务信息，不存在时返回None。
+        """
+        with self._lock:
+            return self._to_dict(self._db.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def cancel(self, job_id: str) -> bool:
+        """取消尚未结束的任务。
+
+        Args:
+            job_id (str): 任务ID。
+
+        Returns:
+            bool: 任务被取消时返回True，任务不存在或已结束时返回False。
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, lease_owner = NULL, lease_expires = NULL, updated_at = ? "
+                "WHERE id = ? AND status IN (?, ?)",
+                (CANCELLED, time.time(), job_id, QUEUED, RUNNING),
+            )
+            return cursor.rowcount > 0
+
+    def lease(self, owner: str, lease_seconds: float) -> Optional[dict]:
+        """领取一个可执行的任务，包括到期的排队任务和租约已过期的运行中任务。
+
+        租约过期的运行中任务只有在尝试次数未达到上限时才会被重新领取，已用完尝试次数的任务标记为失败。
+
+        Args:
+            owner (str): 工作者标识。
+            lease_seconds (float): 租约时长（秒）。
+
+        Returns:
+            dict: 领取到的任务，没有可执行的任务时返回None。
+        """
+        now = time.time()
+        with self._lock:
+            # 使用IMMEDIATE事务保证多个进程不会领取到同一个任务
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                # 执行中反复导致进程崩溃的任务不会无限次地被重新领取
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, error_message = ?, lease_owner = NULL, lease_expires = NULL, "
+                    "updated_at = ? WHERE status = ? AND lease_expires < ? AND attempts >= max_attempts",
+                    (FAILED, "Lease expired after the maximum number of attempts", now, RUNNING, now),
+                )
+                row = self._db.execute(
+                    "SELECT id FROM jobs WHERE (status = ? AND next_run_at <= ?) "
+                    "OR (status = ? AND lease_expires < ? AND attempts < max_attempts) ORDER BY next_run_at LIMIT 1",
+                    (QUEUED, now, RUNNING, now),
+                ).fetchone()
+                if row is None:
+                    self._db.execute("COMMIT")
+                    return None
+                self._db.execute(
+                    "UPDATE jobs SET status = ?, lease_owner = ?, lease_expires = ?, attempts = attempts + 1, "
+                    "updated_at = ? WHERE id = ?",
+                    (RUNNING, owner, now + lease_seconds, now, row["id"]),
+                )
+                job = self._db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+            return self._to_dict(job)
+
+    def renew(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """续期租约。
+
+        Args:
+            job_id (str): 任务ID。
+            owner (str): 工作者标识。
+            lease_seconds (float): 新的租约时长（秒）。
+
+        Returns:
+            bool: 续期成功时返回True；任务已被取消或租约已被其他工作者接管时返回False。
+        """
+        now = time.time()
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (now + lease_seconds, now, job_id, RUNNING, owner),
+            )
+            return cursor.rowcount > 0
+
+    def complete(self, job_id: str, owner: str, result: dict) -> bool:
+        """标记任务成功并保存结果。
+
+        Args:
+            job_id (str): 任务ID。
+            owner (str): 工作者标识。
+            result (dict): 爬取结果。
+
+        Returns:
+            bool: 仍持有租约并成功更新时返回True。
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, result = ?, error_message = NULL, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (SUCCEEDED, json.dumps(result, ensure_ascii=False), time.time(), job_id, RUNNING, owner),
+            )
+            return cursor.rowcount > 0
+
+    def fail(self, job_id: str, owner: str, error_message: str, retry_delay: Optional[float]) -> bool:
+        """记录一次失败，可重试时重新排队，否则标记任务失败。
+
+        Args:
+            job_id (str): 任务ID。
+            owner (str): 工作者标识。
+            error_message (str): 错误信息。
+            retry_delay (float): 距离下次重试的秒数，None表示不再重试。
+
+        Returns:
+            bool: 仍持有租约并成功更新时返回True。
+        """
+        now = time.time()
+        if retry_delay is None:
+            status, next_run_at = FAILED, now
+        else:
+            status, next_run_at = QUEUED, now + retry_delay
+        with self._lock:
+            cursor = self._db.execute(
+                "UPDATE jobs SET status = ?, error_message = ?, next_run_at = ?, lease_owner = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ? AND status = ? AND lease_owner = ?",
+                (status, error_message, next_run_at, now, job_id, RUNNING, owner),
+            )
+            return cursor.rowcount > 0
+
+    def purge(self, older_than: float) -> int:
+        """删除结束时间早于指定时间的任务。
+
+        Args:
+            older_than (float): Unix时间戳。
+
+        Returns:
+            int: 删除的任务数量。
+        """
+        with self._lock:
+            cursor = self._db.execute(
+                f"DELETE FROM jobs WHERE status IN ({', '.join('?' * len(FINISHED_STATUSES))}) AND updated_at < ?",
+                (*FINISHED_STATUSES, older_than),
+            )
+            return cursor.rowcount
@@ -0,0 +1,148 @@
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional
+from .admission import AdmissionRejected
+from .crawler import crawl_url
+from .job_store import JobStore
+
+logger = logging.getLogger(__name__)
+
+
+class JobWorkerPool:
+    """从持久化任务队列中领取并执行爬取任务的工作者池。"""
+    def __init__(self):
+        self.store: Optional[JobStore] = None
+        self.settings = {}
+        self._snapshot_provider = None
+        self._tasks = []
+        self._running = {}
+        self._owner_prefix = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._stopping = asyncio.Event()
+
+    def configure(self, settings: dict):
+        """应用任务队列配置，数据库路径变化时重新打开任务队列。
+
+        Args:
+            settings (dict): 任务队列配置，见ConfigLoader.SETTINGS_SECTIONS中的job_config。
+        """
+        self.settings = dict(settings)
+        db_path = Path(__file__).parent.parent.joinpath(settings["db_path"])
+        if self.store is None or self.store.db_path != db_path:
+            if self.store is not None:
+                self.store.close()
+            self.store = JobStore(db_path)
+
+    async def start(self, snapshot_provider: Callable):
+        """启动工作者。
+
+        Args:
+            snapshot_provider (Callable): 返回当前配置快照的函数，任务执行时使用最新的配置。
+        """
+        self._snapshot_provider = snapshot_provider
+        self._stopping.clear()
+        retention = self.settings["retention_seconds"]
+        if retention:
+            await asyncio.to_thread(self.store.purge, time.time() - retention)
+        self._tasks = [
+            asyncio.create_task(self._worker(f"{self._owner_prefix}:{index}"))
+            for index in range(int(self.settings["workers"]))
+        ]
+
+    async def stop(self):
+        """停止工作者。进行中的任务被中断后租约会过期，由下次启动的工作者继续执行。"""
+        self._stopping.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.store is not None:
+            self.store.close()
+            self.store = None
+
+    def _retry_delay(self, attempts: int, max_attempts: int) -> Optional[float]:
+        """按指数退避计算下次重试的等待时间，已达到最大尝试次数时返回None。"""
+        if attempts >= max_attempts:
+            return None
+        delay = self.settings["backoff_base"] * (2 ** (attempts - 1))
+        return min(delay, self.settings["backoff_max"])
+
+    async def _worker(self, owner: str):
+        """单个工作者的主循环：领取任务、执行、记录结果。"""
+        while not self._stopping.is_set():
+            try:
+                job = await asyncio.to_thread(self.store.lease, owner, self.settings["lease_seconds"])
+            except Exception as e:
+                logger.warning("领取任务失败: %s", e)
+                job = None
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.settings["poll_interval"])
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job, owner)
+
+    async def _run(self, job: dict, owner: str):
+        """执行单个任务，执行期间定期续约，并在任务被取消时中断爬取。"""
+        snapshot = self._snapshot_provider()
+        crawl = asyncio.create_task(crawl_url(
+            job["url"], snapshot.browser_config, snapshot.crawler_run_config, job["output_format"], job["max_age"]
+        ))
+        heartbeat = asyncio.create_task(self._heartbeat(job["id"], owner, crawl))
+        self._running[job["id"]] = crawl
+        try:
+            response = await crawl
+        except asyncio.CancelledError:
+            if self._stopping.is_set():
+                raise
+            # 心跳发现任务已被取消或租约已被接管
+            return
+        except AdmissionRejected as e:
+            # 服务繁忙时按退避时间和Retry-After中较长的一个重新排队
+            delay = self._retry_delay(job["attempts"], job["max_attempts"])
+            if delay is not None:
+                delay = max(delay, e.retry_after)
+            await asyncio.to_thread(self.store.fail, job["id"], owner, e.message, delay)
+            return
+        except Exception as e:
+            await asyncio.to_thread(self.store.fail, job["id"], owner, str(e),
+                                    self._retry_delay(job["attempts"], job["max_attempts"]))
+            return
+        finally:
+            heartbeat.cancel()
+            self._running.pop(job["id"], None)
+
+        if response.success:
+            await asyncio.to_thread(self.store.complete, job["id"], owner, response.model_dump(exclude={"links"}))
+        else:
+            await asyncio.to_thread(self.store.fail, job["id"], owner, response.error_message,
+                                    self._retry_delay(job["attempts"], job["max_attempts"]))
+
+    def cancel_local(self, job_id: str):
+        """立即中断本进程中正在执行的任务，其他进程中的任务由心跳在下次续约时发现并中断。
+
+        Args:
+            job_id (str): 任务ID。
+        """
+        crawl = self._running.get(job_id)
+        if crawl is not None:
+            crawl.cancel()
+
+    async def _heartbeat(self, job_id: str, owner: str, crawl: asyncio.Task):
+        """定期续期租约，续期失败（任务被取消或被接管）时取消爬取。"""
+        interval = max(1.0, self.settings["lease_seconds"] / 3)
+        while True:
+            await asyncio.sleep(interval)
+            renewed = await asyncio.to_thread(self.store.renew, job_id, owner, self.settings["lease_seconds"])
+            if not renewed:
+                crawl.cancel()
+                return
+
+
+# 进程内共享的任务工作者池
+job_workers = JobWorkerPool()
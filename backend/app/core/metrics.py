@@ -0,0 +1,255 @@
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+# 默认的耗时直方图分桶（秒），覆盖从URL处理的微秒级到页面渲染的数十秒
+DEFAULT_TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+# 响应字节数直方图分桶
+DEFAULT_SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+
+def _format_value(value: float) -> str:
+    """按Prometheus文本格式输出数值。"""
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value)
+
+
+def _escape(value) -> str:
+    """转义标签值中的特殊字符。"""
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    """拼接标签部分，例如{method="GET",status="200"}。"""
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    """指标基类，按标签值组合保存子指标。"""
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children = {}
+        # 无标签的指标在首次记录前也以0值导出
+        if not self.labelnames and type(self)._new_child is not _Metric._new_child:
+            self.labels()
+
+    def labels(self, *values):
+        """获取指定标签值组合的子指标，子指标会被缓存，热路径上只有一次字典查找。"""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"{self.name}需要{len(self.labelnames)}个标签值")
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        """按Prometheus文本格式输出指标。"""
+        return [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type_name}", *self._samples()]
+
+
+class _Value:
+    """计数器或仪表盘的单个取值。"""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(_Metric):
+    """单调递增的计数器。"""
+    type_name = "counter"
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1):
+        """无标签计数器加上指定值。"""
+        self.labels().inc(amount)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}_total{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+                for values, child in self._children.items()]
+
+
+class Gauge(_Metric):
+    """可增可减的仪表盘。"""
+    type_name = "gauge"
+
+    def _new_child(self):
+        return _Value()
+
+    def set(self, value: float):
+        """设置无标签仪表盘的值。"""
+        self.labels().set(value)
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+                for values, child in self._children.items()]
+
+
+class _HistogramValue:
+    """直方图的单个标签组合：各分桶的计数、总和与总数。"""
+    __slots__ = ("upper_bounds", "counts", "sum", "count")
+
+    def __init__(self, upper_bounds: Tuple[float, ...]):
+        self.upper_bounds = upper_bounds
+        self.counts = [0] * len(upper_bounds)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """记录一次观测值。"""
+        index = bisect.bisect_left(self.upper_bounds, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Histogram(_Metric):
+    """直方图，用于记录耗时与响应大小的分布。"""
+    type_name = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DEFAULT_TIME_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        """无标签直方图记录一次观测值。"""
+        self.labels().observe(value)
+
+    def _samples(self) -> List[str]:
+        lines = []
+        inf = 'le="+Inf"'
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, child.counts):
+                cumulative += count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, inf)} {child.count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, values)} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, values)} {child.count}")
+        return lines
+
+
+class CallbackMetric(_Metric):
+    """在抓取指标时才调用回调函数取值的指标，用于导出缓存、浏览器池等模块已有的统计数据。"""
+    def __init__(self, name: str, documentation: str, type_name: str,
+                 callback: Callable[[], Dict[Tuple, float]], labelnames: Iterable[str] = ()):
+        """初始化CallbackMetric实例。
+
+        Args:
+            name (str): 指标名称。
+            documentation (str): 指标说明。
+            type_name (str): 指标类型，counter或gauge。
+            callback (Callable): 返回{标签值元组: 数值}的函数，无标签时键为空元组。
+            labelnames (Iterable[str]): 标签名称。
+        """
+        super().__init__(name, documentation, labelnames)
+        self.type_name = type_name
+        self._callback = callback
+
+    def _samples(self) -> List[str]:
+        suffix = "_total" if self.type_name == "counter" else ""
+        return [f"{self.name}{suffix}{_format_labels(self.labelnames, values)} {_format_value(float(value))}"
+                for values, value in self._callback().items()]
+
+
+class MetricsRegistry:
+    """进程内的指标注册表。"""
+    def __init__(self):
+        self._metrics = {}
+
+    def register(self, metric: _Metric) -> _Metric:
+        """注册指标，同名指标只保留第一个。
+
+        Args:
+            metric (_Metric): 要注册的指标。
+
+        Returns:
+            _Metric: 注册表中的指标。
+        """
+        return self._metrics.setdefault(metric.name, metric)
+
+    def render(self) -> str:
+        """按Prometheus文本格式输出所有指标，单个回调指标出错时跳过该指标。"""
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception:
+                continue
+        return "\n".join(lines) + "\n"
+
+
+# 进程内共享的指标注册表
+registry = MetricsRegistry()
+
+http_requests = registry.register(Counter(
+    "crawler_http_requests", "HTTP请求数", ("method", "path", "status")))
+http_request_seconds = registry.register(Histogram(
+    "crawler_http_request_seconds", "HTTP请求处理耗时（秒）", ("method", "path")))
+http_response_bytes = registry.register(Histogram(
+    "crawler_http_response_bytes", "HTTP响应体字节数", ("path",), buckets=DEFAULT_SIZE_BUCKETS))
+stage_seconds = registry.register(Histogram(
+    "crawler_stage_seconds", "各处理阶段的耗时（秒）", ("stage",)))
+browser_launches = registry.register(Counter(
+    "crawler_browser_launches", "启动的浏览器实例数量"))
+crawl_results = registry.register(Counter(
+    "crawler_crawl_results", "实际执行的爬取次数（不含缓存命中和被合并的请求）", ("success",)))
+incremental_checks = registry.register(Counter(
+    "crawler_incremental_checks", "增量刷新的条件请求结果", ("outcome",)))
+sink_records = registry.register(Counter(
+    "crawler_sink_records", "写入输出文件的爬取结果数", ("format",)))
+sink_bytes = registry.register(Counter(
+    "crawler_sink_bytes", "写入输出文件的字节数", ("format",)))
+blocked_requests = registry.register(Counter(
+    "crawler_blocked_requests", "资源拦截策略中止的浏览器请求数", ("reason",)))
+
+
+@contextmanager
+def stage_timer(stage: str, histogram: Optional[Histogram] = None):
+    """记录一个处理阶段的耗时，可用于同步和异步代码中的with语句。
+
+    Args:
+        stage (str): 阶段名称，例如url_processing、browser_acquire、page_fetch。
+        histogram (Histogram): 记录到的直方图，默认为crawler_stage_seconds。
+    """
+    child = (histogram or stage_seconds).labels(stage)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        child.observe(time.perf_counter() - started)
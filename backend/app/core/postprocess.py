@@ -0,0 +1,164 @@
+import asyncio
+import time
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Optional, Tuple
+from .metrics import stage_seconds
+
+if TYPE_CHECKING:
+    from crawl4ai.async_configs import CrawlerRunConfig
+    from crawl4ai.markdown_generation_strategy import MarkdownGenerationStrategy
+    from crawl4ai.models import MarkdownGenerationResult
+
+
+def render_markdown(generator: "MarkdownGenerationStrategy", input_html: str, base_url: str) -> Tuple[dict, float, float]:
+    """在子进程中执行HTML到Markdown的转换以及内容过滤。
+
+    Args:
+        generator (MarkdownGenerationStrategy): 原始的Markdown生成器，包含内容过滤器。
+        input_html (str): 按生成器的content_source选出的HTML。
+        base_url (str): 用于拼接相对链接的基础URL。
+
+    Returns:
+        Tuple[dict, float, float]: MarkdownGenerationResult的各个字段、Markdown生成耗时与内容过滤耗时（秒）。
+    """
+    filter_seconds = 0.0
+    content_filter = getattr(generator, "content_filter", None)
+    if content_filter is not None:
+        # 生成器是传入子进程的副本，可以直接替换其过滤方法来单独统计内容过滤的耗时
+        filter_content = content_filter.filter_content
+
+        def timed_filter_content(*args, **kwargs):
+            nonlocal filter_seconds
+            started = time.perf_counter()
+            try:
+                return filter_content(*args, **kwargs)
+            finally:
+                filter_seconds += time.perf_counter() - started
+
+        content_filter.filter_content = timed_filter_content
+    started = time.perf_counter()
+    fields = generator.generate_markdown(input_html=input_html, base_url=base_url).model_dump()
+    return fields, time.perf_counter() - started - filter_seconds, filter_seconds
+
+
+class MarkdownOffloader:
+    """把Markdown生成和内容过滤等CPU密集的后处理放到进程池中执行，避免阻塞事件循环。"""
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # 以原始爬虫运行配置为键缓存替换了Markdown生成器的配置副本
+        self._deferred_configs = weakref.WeakKeyDictionary()
+        self._timed_configs = weakref.WeakKeyDictionary()
+
+    @property
+    def enabled(self) -> bool:
+        """是否已启用进程池后处理。"""
+        return self._executor is not None
+
+    def start(self, workers: int = 0):
+        """启动进程池。
+
+        Args:
+            workers (int): 进程数量，0表示使用CPU核心数。
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=workers or None)
+
+    def close(self):
+        """关闭进程池。"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    def deferred_config(self, crawler_run_config: "CrawlerRunConfig") -> "CrawlerRunConfig":
+        """返回跳过Markdown生成的爬虫运行配置副本。
+
+        Args:
+            crawler_run_config (CrawlerRunConfig): 原始爬虫运行配置。
+
+        Returns:
+            CrawlerRunConfig: Markdown生成器被替换为DeferredMarkdownGenerator的配置。
+        """
+        config = self._deferred_configs.get(crawler_run_config)
+        if config is None:
+            from .deferred_markdown import DeferredMarkdownGenerator
+            generator = self.generator_of(crawler_run_config)
+            config = crawler_run_config.clone(
+                markdown_generator=DeferredMarkdownGenerator(content_source=generator.content_source)
+            )
+            self._deferred_configs[crawler_run_config] = config
+        return config
+
+    def timed_config(self, crawler_run_config: "CrawlerRunConfig") -> "CrawlerRunConfig":
+        """返回在爬取过程中照常生成Markdown、同时记录Markdown生成与内容过滤耗时的爬虫运行配置副本。
+
+        Args:
+            crawler_run_config (CrawlerRunConfig): 原始爬虫运行配置。
+
+        Returns:
+            CrawlerRunConfig: Markdown生成器被TimedMarkdownGenerator包装的配置。
+        """
+        config = self._timed_configs.get(crawler_run_config)
+        if config is None:
+            from .deferred_markdown import TimedMarkdownGenerator
+            generator = TimedMarkdownGenerator(self.generator_of(crawler_run_config))
+            config = crawler_run_config.clone(markdown_generator=generator)
+            self._timed_configs[crawler_run_config] = config
+        return config
+
+    @staticmethod
+    def generator_of(crawler_run_config: "CrawlerRunConfig") -> "MarkdownGenerationStrategy":
+        """获取爬虫运行配置实际使用的Markdown生成器。"""
+        from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+        return crawler_run_config.markdown_generator or DefaultMarkdownGenerator()
+
+    async def render_html(self, generator: "MarkdownGenerationStrategy", input_html: str,
+                          base_url: str) -> "MarkdownGenerationResult":
+        """由HTML生成Markdown，启用进程池时在进程池中执行，否则在线程中执行。
+
+        Args:
+            generator (MarkdownGenerationStrategy): Markdown生成器。
+            input_html (str): 按生成器的content_source选出的HTML。
+            base_url (str): 用于拼接相对链接的基础URL。
+
+        Returns:
+            MarkdownGenerationResult: Markdown生成结果。
+        """
+        if self.enabled:
+            from crawl4ai.models import MarkdownGenerationResult
+            loop = asyncio.get_running_loop()
+            fields, markdown_seconds, filter_seconds = await loop.run_in_executor(
+                self._executor, render_markdown, generator, input_html, base_url
+            )
+            stage_seconds.labels("markdown_generation").observe(markdown_seconds)
+            if generator.content_filter is not None:
+                stage_seconds.labels("content_filtering").observe(filter_seconds)
+            return MarkdownGenerationResult(**fields)
+
+        def generate() -> Tuple["MarkdownGenerationResult", float]:
+            # 生成器可能被多个请求共享，这里不替换其过滤方法，内容过滤耗时计入Markdown生成
+            started = time.perf_counter()
+            markdown = generator.generate_markdown(input_html=input_html, base_url=base_url)
+            return markdown, time.perf_counter() - started
+        markdown, seconds = await asyncio.to_thread(generate)
+        stage_seconds.labels("markdown_generation").observe(seconds)
+        return markdown
+
+    async def render(self, generator: "MarkdownGenerationStrategy", result) -> "MarkdownGenerationResult":
+        """在进程池中为爬取结果生成Markdown。
+
+        Args:
+            generator (MarkdownGenerationStrategy): 原始的Markdown生成器。
+            result (CrawlResult): 使用DeferredMarkdownGenerator得到的爬取结果。
+
+        Returns:
+            MarkdownGenerationResult: Markdown生成结果。
+        """
+        # 爬取结果中不包含fit_html来源，此时与crawl4ai一样退回到cleaned_html
+        input_html = result.html if generator.content_source == "raw_html" else result.cleaned_html
+        base_url = getattr(result, "redirected_url", None) or result.url
+        return await self.render_html(generator, input_html or "", base_url)
+
+
+# 进程内共享的后处理进程池
+markdown_offloader = MarkdownOffloader()
@@ -0,0 +1,212 @@
+import importlib
+import json
+import logging
+import threading
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+from ..models.schemas import MarkdownProfile
+
+if TYPE_CHECKING:
+    from crawl4ai.async_configs import CrawlerRunConfig
+    from crawl4ai.content_filter_strategy import RelevantContentFilter
+    from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+
+logger = logging.getLogger(__name__)
+
+# 内容过滤器名称及其对应的类名（位于crawl4ai.content_filter_strategy，首次构建时才导入）、配置项名称和可由请求覆盖的参数
+CONTENT_FILTERS = {
+    "pruning": ("PruningContentFilter", "pruning_content_filter_config",
+                ("user_query", "min_word_threshold", "threshold_type", "threshold")),
+    "bm25": ("BM25ContentFilter", "BM25_content_filter_config", ("user_query", "bm25_threshold")),
+}
+
+# 可由请求覆盖的Markdown生成选项
+MARKDOWN_OPTIONS = ("ignore_links", "ignore_images")
+
+
+class _LRU:
+    """按条目数量限制容量的简单LRU缓存。"""
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._items = OrderedDict()
+
+    def get(self, key):
+        value = self._items.get(key)
+        if value is not None:
+            self._items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self._items[key] = value
+        self._items.move_to_end(key)
+        while self.capacity and len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+class ProfileFactory:
+    """按参数缓存预先构建的内容过滤器、Markdown生成器以及替换了生成器的爬虫运行配置。
+
+    请求级别的内容过滤器和Markdown选项在配置文件的基础上覆盖，相同参数只构建一次，
+    之后切换过滤方案只需一次字典查找；替换后的爬虫运行配置同样被缓存，其配置指纹也随之复用。
+    """
+    def __init__(self, capacity: int = 256):
+        """初始化ProfileFactory实例。
+
+        Args:
+            capacity (int): 每类对象最多缓存的数量。
+        """
+        self._lock = threading.Lock()
+        self._filters = _LRU(capacity)
+        self._generators = _LRU(capacity)
+        # 以配置快照中的原始爬虫运行配置为键，配置变更后旧配置的副本随之释放
+        self._run_configs = weakref.WeakKeyDictionary()
+        self._stats = {"hits": 0, "builds": 0}
+
+    def configure(self, settings: dict):
+        """应用配置。
+
+        Args:
+            settings (dict): 见ConfigLoader.SETTINGS_SECTIONS中的profile_config。
+        """
+        with self._lock:
+            self._filters.capacity = int(settings["max_cached_profiles"])
+            self._generators.capacity = int(settings["max_cached_profiles"])
+
+    def handle_config_reload(self, old_snapshot, new_snapshot):
+        """配置变更监听器：应用新的缓存容量。
+
+        Args:
+            old_snapshot (ConfigSnapshot): 变更前的配置快照。
+            new_snapshot (ConfigSnapshot): 变更后的配置快照。
+        """
+        self.configure(new_snapshot.profile_config)
+
+    @staticmethod
+    def _key(params: dict) -> str:
+        return json.dumps(params, sort_keys=True, default=str)
+
+    def content_filter(self, name: str, params: dict) -> "RelevantContentFilter":
+        """返回指定参数的内容过滤器，相同参数只构建一次。
+
+        Args:
+            name (str): 内容过滤器名称，pruning或bm25。
+            params (dict): 构造参数。
+
+        Returns:
+            RelevantContentFilter: 内容过滤器。
+        """
+        key = (name, self._key(params))
+        with self._lock:
+            content_filter = self._filters.get(key)
+            if content_filter is None:
+                filter_class = getattr(importlib.import_module("crawl4ai.content_filter_strategy"), CONTENT_FILTERS[name][0])
+                content_filter = filter_class(**params)
+                self._filters.put(key, content_filter)
+        return content_filter
+
+    @staticmethod
+    def _configured_filter(data: dict) -> str:
+        """返回配置文件中选择的内容过滤器名称，配置值无效时与ConfigLoader一致，不使用内容过滤器。"""
+        choice = data.get("content_filter_choice")
+        if not choice:
+            return "none"
+        if not isinstance(choice, str) or choice.lower() not in CONTENT_FILTERS:
+            logger.warning("“content_filter_choice”配置项的值“%s”无效, 将不使用内容过滤器", choice)
+            return "none"
+        return choice.lower()
+
+    def markdown_generator(self, data: dict, profile: MarkdownProfile) -> "DefaultMarkdownGenerator":
+        """在配置文件中的Markdown生成器配置上应用请求覆盖项，返回对应的Markdown生成器。
+
+        Args:
+            data (dict): 配置文件内容。
+            profile (MarkdownProfile): 请求中的内容过滤器与Markdown选项。
+
+        Returns:
+            DefaultMarkdownGenerator: Markdown生成器。
+
+        Raises:
+            ValueError: 请求中的内容过滤器名称无效时抛出。
+        """
+        generator_params = dict(data.get("markdown_generator_config") or {})
+        options = dict(generator_params.get("options") or {})
+        for option in MARKDOWN_OPTIONS:
+            value = getattr(profile, option)
+            if value is not None:
+                options[option] = value
+        if options:
+            generator_params["options"] = options
+
+        if profile.content_filter is not None:
+            name = profile.content_filter.lower()
+            if name != "none" and name not in CONTENT_FILTERS:
+                raise ValueError(f"Invalid content filter: {profile.content_filter}")
+        else:
+            name = self._configured_filter(data)
+        filter_key = None
+        if name != "none":
+            _, section, overridable = CONTENT_FILTERS[name]
+            filter_params = dict(data.get(section) or {})
+            for param in overridable:
+                value = getattr(profile, param)
+                if value is not None:
+                    filter_params[param] = value
+            filter_key = (name, filter_params)
+
+        key = self._key({"generator": generator_params, "filter": filter_key})
+        with self._lock:
+            generator = self._generators.get(key)
+            if generator is not None:
+                self._stats["hits"] += 1
+                return generator
+        from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+        content_filter = self.content_filter(*filter_key) if filter_key is not None else None
+        generator = DefaultMarkdownGenerator(content_filter=content_filter, **generator_params)
+        with self._lock:
+            self._generators.put(key, generator)
+            self._stats["builds"] += 1
+        return generator
+
+    def run_config(self, snapshot, profile: Optional[MarkdownProfile]) -> "CrawlerRunConfig":
+        """返回应用了请求覆盖项的爬虫运行配置，未指定任何覆盖项时直接返回配置文件中的配置。
+
+        Args:
+            snapshot (ConfigSnapshot): 当前配置快照。
+            profile (MarkdownProfile): 请求中的内容过滤器与Markdown选项。
+
+        Returns:
+            CrawlerRunConfig: 爬虫运行配置。
+
+        Raises:
+            ValueError: 请求中的内容过滤器名称无效时抛出。
+        """
+        overrides = profile.model_dump(exclude_none=True) if profile is not None else {}
+        if not overrides:
+            return snapshot.crawler_run_config
+        key = self._key(overrides)
+        with self._lock:
+            configs = self._run_configs.get(snapshot.crawler_run_config)
+            if configs is None:
+                configs = self._run_configs[snapshot.crawler_run_config] = _LRU(self._generators.capacity)
+            config = configs.get(key)
+            if config is not None:
+                self._stats["hits"] += 1
+                return config
+        generator = self.markdown_generator(snapshot.data, profile)
+        config = snapshot.crawler_run_config.clone(markdown_generator=generator)
+        with self._lock:
+            configs.put(key, config)
+        return config
+
+    def stats(self) -> dict:
+        """返回缓存的构建与命中统计。"""
+        with self._lock:
+            return {**self._stats, "filters": len(self._filters), "generators": len(self._generators)}
+
+
+# 进程内共享的过滤方案工厂
+profile_factory = ProfileFactory()
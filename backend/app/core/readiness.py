@@ -0,0 +1,78 @@
+import time
+from contextlib import asynccontextmanager
+from typing import Optional
+
+# 进程开始导入本模块的时间，近似为应用开始启动的时间
+_PROCESS_STARTED = time.monotonic()
+
+
+class Readiness:
+    """记录启动预热各阶段的完成情况，供/ready判断爬虫是否已经可以处理请求。
+
+    预热分为导入crawl4ai、构建crawl4ai配置对象和启动浏览器池（或爬取工作进程）三个阶段，
+    全部完成且没有失败时进程才算就绪；存活检查（/health）不依赖这些阶段，服务开始接受请求即返回成功。
+    """
+    STAGES = ("crawl4ai_import", "crawler_config", "browser_pool")
+
+    def __init__(self):
+        self.mode: Optional[str] = None
+        self._stages = {}
+        self._errors = {}
+        self._started: Optional[float] = None
+        self._ready_at: Optional[float] = None
+
+    def begin(self, mode: str):
+        """开始一次预热，清除之前的记录。
+
+        Args:
+            mode (str): 预热方式，background表示在后台预热，blocking表示启动时等待预热完成。
+        """
+        self.mode = mode
+        self._stages = {}
+        self._errors = {}
+        self._started = time.monotonic()
+        self._ready_at = None
+
+    @asynccontextmanager
+    async def stage(self, name: str):
+        """记录一个预热阶段的耗时，阶段抛出异常时记录为失败并继续抛出。
+
+        Args:
+            name (str): 阶段名称，见STAGES。
+        """
+        started = time.monotonic()
+        try:
+            yield
+        except Exception as e:
+            self._errors[name] = str(e) or type(e).__name__
+            raise
+        self._stages[name] = time.monotonic() - started
+        if self._ready_at is None and self.ready:
+            self._ready_at = time.monotonic()
+
+    @property
+    def ready(self) -> bool:
+        """所有预热阶段都已完成且没有失败。"""
+        return not self._errors and all(name in self._stages for name in self.STAGES)
+
+    def status(self) -> dict:
+        """返回各预热阶段的状态与耗时，以及进程启动到就绪所用的时间。"""
+        stages = {}
+        for name in self.STAGES:
+            if name in self._errors:
+                stages[name] = {"status": "failed", "error": self._errors[name]}
+            elif name in self._stages:
+                stages[name] = {"status": "done", "seconds": round(self._stages[name], 3)}
+            else:
+                stages[name] = {"status": "pending" if self._started is not None else "not_started"}
+        return {
+            "ready": self.ready,
+            "mode": self.mode,
+            "stages": stages,
+            "uptime_seconds": round(time.monotonic() - _PROCESS_STARTED, 3),
+            "seconds_to_ready": round(self._ready_at - _PROCESS_STARTED, 3) if self._ready_at is not None else None,
+        }
+
+
+# 进程内共享的就绪状态
+readiness = Readiness()
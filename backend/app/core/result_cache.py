@@ -0,0 +1,310 @@
+import asyncio
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+from ..models.schemas import CrawlResponse
+from ..utils.fingerprint import request_fingerprint
+from ..utils.url_utils import URLUtils
+
+logger = logging.getLogger(__name__)
+
+
+class _MemoryEntry:
+    """内存缓存中的单个条目。"""
+    __slots__ = ("fingerprint", "created", "payload")
+
+    def __init__(self, fingerprint: str, created: float, payload: bytes):
+        self.fingerprint = fingerprint
+        self.created = created
+        self.payload = payload
+
+
+class ResultCache:
+    """爬取结果缓存，由按字节数限制容量的内存LRU层和SQLite磁盘层组成。
+
+    缓存键由处理后的URL、有效配置指纹和输出格式组成。请求级别的过滤方案和多格式变体会由同一份配置派生出不同的指纹，
+    因此记录当前配置下写入过的所有指纹，配置变更后使这些指纹下的条目全部失效。
+    """
+    def __init__(self):
+        self.enabled = False
+        self.ttl_seconds = 0
+        self.max_memory_bytes = 0
+        self.max_disk_bytes = 0
+        self.disk_path = None
+
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()
+        self._memory_bytes = 0
+        self._db = None
+        self._disk_bytes = 0
+        # 当前配置下写入过的有效配置指纹，配置变更时一并失效
+        self._fingerprints = set()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "stores": 0, "evictions": 0, "invalidations": 0}
+
+    def configure(self, settings: dict):
+        """应用缓存配置，磁盘路径变化时重新打开磁盘层。
+
+        Args:
+            settings (dict): 结果缓存配置，见ConfigLoader.SETTINGS_SECTIONS中的result_cache_config。
+        """
+        with self._lock:
+            self.enabled = settings["enabled"]
+            self.ttl_seconds = settings["ttl_seconds"]
+            self.max_memory_bytes = settings["max_memory_bytes"]
+            self.max_disk_bytes = settings["max_disk_bytes"]
+
+            disk_path = None
+            if settings["disk_path"]:
+                disk_path = Path(__file__).parent.parent.joinpath(settings["disk_path"])
+            if disk_path != self.disk_path:
+                self._close_db()
+                self.disk_path = disk_path
+                if disk_path is not None:
+                    self._open_db(disk_path)
+            self._evict_memory()
+            self._purge_expired_disk()
+            self._evict_disk()
+
+    def _open_db(self, path: Path):
+        """打开SQLite磁盘层，并统计已占用的字节数。"""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, created REAL NOT NULL, "
+                "accessed REAL NOT NULL, size INTEGER NOT NULL, payload BLOB NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_fingerprint ON results (fingerprint)")
+            self._db.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        except sqlite3.Error as e:
+            logger.warning("结果缓存磁盘层打开失败，将只使用内存缓存: %s", e)
+            self._close_db()
+
+    def _close_db(self):
+        """关闭SQLite磁盘层。"""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+        self._disk_bytes = 0
+
+    @staticmethod
+    def make_key(url: str, fingerprint: str, output_format: str) -> str:
+        """生成缓存键。
+
+        Args:
+            url (str): 经过URLUtils.process_url处理的URL，按其规范化形式（移除跟踪参数、排序查询参数）生成缓存键。
+            fingerprint (str): 有效配置指纹。
+            output_format (str): 输出格式。
+
+        Returns:
+            str: 缓存键。
+        """
+        url = URLUtils.cache_key(url)
+        return hashlib.sha1(f"{url}\0{fingerprint}\0{output_format}".encode("utf-8")).hexdigest()
+
+    def _is_fresh(self, created: float, now: float, max_age: Optional[float]) -> bool:
+        """判断条目是否仍在有效期内，max_age比全局TTL更严格时以max_age为准。"""
+        age = now - created
+        if self.ttl_seconds and age > self.ttl_seconds:
+            return False
+        if max_age is not None and age > max_age:
+            return False
+        return True
+
+    def _get_sync(self, key: str, max_age: Optional[float]) -> Optional[bytes]:
+        """同步查找缓存，先查内存层，未命中时查磁盘层并提升到内存层。"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if self._is_fresh(entry.created, now, max_age):
+                    self._memory.move_to_end(key)
+                    self._stats["memory_hits"] += 1
+                    return entry.payload
+                if not self._is_fresh(entry.created, now, None):
+                    self._drop_memory(key)
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT fingerprint, created, payload FROM results WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None:
+                    fingerprint, created, payload = row
+                    if self._is_fresh(created, now, max_age):
+                        self._db.execute("UPDATE results SET accessed = ? WHERE key = ?", (now, key))
+                        self._put_memory(key, _MemoryEntry(fingerprint, created, payload))
+                        self._stats["disk_hits"] += 1
+                        return payload
+
+            self._stats["misses"] += 1
+            return None
+
+    def _set_sync(self, key: str, fingerprint: str, payload: bytes):
+        """同步写入内存层和磁盘层。"""
+        now = time.time()
+        with self._lock:
+            self._fingerprints.add(fingerprint)
+            self._put_memory(key, _MemoryEntry(fingerprint, now, payload))
+            if self._db is not None:
+                old = self._db.execute("SELECT size FROM results WHERE key = ?", (key,)).fetchone()
+                self._db.execute(
+                    "INSERT OR REPLACE INTO results (key, fingerprint, created, accessed, size, payload) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, fingerprint, now, now, len(payload), payload),
+                )
+                self._disk_bytes += len(payload) - (old[0] if old else 0)
+                self._evict_disk()
+            self._stats["stores"] += 1
+
+    def _put_memory(self, key: str, entry: _MemoryEntry):
+        """写入内存层，超过字节预算时按LRU顺序淘汰。"""
+        if self.max_memory_bytes and len(entry.payload) > self.max_memory_bytes:
+            return
+        self._drop_memory(key)
+        self._memory[key] = entry
+        self._memory_bytes += len(entry.payload)
+        self._evict_memory()
+
+    def _drop_memory(self, key: str):
+        """从内存层移除条目。"""
+        entry = self._memory.pop(key, None)
+        if entry is not None:
+            self._memory_bytes -= len(entry.payload)
+
+    def _evict_memory(self):
+        """淘汰最久未使用的内存条目，直到满足字节预算。"""
+        while self.max_memory_bytes and self._memory_bytes > self.max_memory_bytes and self._memory:
+            _, entry = self._memory.popitem(last=False)
+            self._memory_bytes -= len(entry.payload)
+            self._stats["evictions"] += 1
+
+    def _purge_expired_disk(self):
+        """删除磁盘层中已超过TTL的条目。"""
+        if self._db is None or not self.ttl_seconds:
+            return
+        self._db.execute("DELETE FROM results WHERE created < ?", (time.time() - self.ttl_seconds,))
+        self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+
+    def _evict_disk(self):
+        """淘汰最久未访问的磁盘条目，直到满足字节预算。"""
+        if self._db is None:
+            return
+        while self.max_disk_bytes and self._disk_bytes > self.max_disk_bytes:
+            rows = self._db.execute("SELECT key, size FROM results ORDER BY accessed LIMIT 64").fetchall()
+            if not rows:
+                break
+            self._db.executemany("DELETE FROM results WHERE key = ?", [(key,) for key, _ in rows])
+            self._disk_bytes -= sum(size for _, size in rows)
+            self._stats["evictions"] += len(rows)
+
+    async def get(self, url: str, fingerprint: str, output_format: str,
+                  max_age: Optional[float] = None) -> Optional[CrawlResponse]:
+        """查找缓存的爬取结果。
+
+        Args:
+            url (str): 经过处理的URL。
+            fingerprint (str): 有效配置指纹。
+            output_format (str): 输出格式。
+            max_age (float): 本次请求可接受的最大缓存时长（秒），为0时跳过缓存。
+
+        Returns:
+            CrawlResponse: 命中时返回缓存的结果，否则返回None。
+        """
+        if not self.enabled or max_age == 0:
+            return None
+        key = self.make_key(url, fingerprint, output_format)
+        payload = await asyncio.to_thread(self._get_sync, key, max_age)
+        if payload is None:
+            return None
+        return CrawlResponse.model_validate_json(payload)
+
+    async def set(self, url: str, fingerprint: str, output_format: str, response: CrawlResponse):
+        """写入爬取结果，只缓存成功的结果。
+
+        Args:
+            url (str): 经过处理的URL。
+            fingerprint (str): 有效配置指纹。
+            output_format (str): 输出格式。
+            response (CrawlResponse): 爬取结果。
+        """
+        if not self.enabled or not response.success:
+            return
+        key = self.make_key(url, fingerprint, output_format)
+        payload = response.model_dump_json().encode("utf-8")
+        await asyncio.to_thread(self._set_sync, key, fingerprint, payload)
+
+    def invalidate_fingerprint(self, fingerprint: str) -> int:
+        """使某个配置指纹下的所有条目失效。
+
+        Args:
+            fingerprint (str): 需要失效的有效配置指纹。
+
+        Returns:
+            int: 失效的条目数量。
+        """
+        with self._lock:
+            keys = [key for key, entry in self._memory.items() if entry.fingerprint == fingerprint]
+            for key in keys:
+                self._drop_memory(key)
+            removed = len(keys)
+            if self._db is not None:
+                size = self._db.execute(
+                    "SELECT COALESCE(SUM(size), 0), COUNT(*) FROM results WHERE fingerprint = ?", (fingerprint,)
+                ).fetchone()
+                self._db.execute("DELETE FROM results WHERE fingerprint = ?", (fingerprint,))
+                self._disk_bytes -= size[0]
+                removed = max(removed, size[1])
+            self._stats["invalidations"] += removed
+            return removed
+
+    def handle_config_reload(self, old_snapshot, new_snapshot):
+        """配置变更监听器：应用新的缓存配置，爬虫配置发生变化时使旧配置派生出的所有指纹下的条目失效。
+
+        除默认的请求指纹外，旧配置下按请求级别过滤方案或多格式变体写入的条目同样失效。
+
+        Args:
+            old_snapshot (ConfigSnapshot): 变更前的配置快照。
+            new_snapshot (ConfigSnapshot): 变更后的配置快照。
+        """
+        self.configure(new_snapshot.result_cache_config)
+        old_fingerprint = request_fingerprint(old_snapshot.browser_config, old_snapshot.crawler_run_config)
+        new_fingerprint = request_fingerprint(new_snapshot.browser_config, new_snapshot.crawler_run_config)
+        if old_fingerprint != new_fingerprint:
+            with self._lock:
+                fingerprints, self._fingerprints = self._fingerprints | {old_fingerprint}, set()
+            removed = sum(self.invalidate_fingerprint(fingerprint) for fingerprint in fingerprints)
+            logger.info("爬虫配置已变更，已清除%s条旧配置下的缓存结果", removed)
+
+    def stats(self) -> dict:
+        """返回缓存的命中统计与容量占用。"""
+        with self._lock:
+            hits = self._stats["memory_hits"] + self._stats["disk_hits"]
+            lookups = hits + self._stats["misses"]
+            return {
+                **self._stats,
+                "hit_rate": hits / lookups if lookups else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+                "disk_bytes": self._disk_bytes,
+            }
+
+    def close(self):
+        """关闭磁盘层并清空内存层。"""
+        with self._lock:
+            self._close_db()
+            self.disk_path = None
+            self._memory.clear()
+            self._memory_bytes = 0
+            self._fingerprints.clear()
+
+
+# 进程内共享的结果缓存
+result_cache = ResultCache()
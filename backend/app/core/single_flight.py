@@ -0,0 +1,59 @@
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """合并并发的相同请求：同一个键同时只执行一次，其余调用方等待同一个结果。"""
+    def __init__(self):
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+        self._stats = {"executed": 0, "coalesced": 0}
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[T]]) -> T:
+        """执行或加入键对应的调用。
+
+        共享的调用在独立的任务中运行，并通过asyncio.shield等待，
+        因此某个调用方被取消（例如客户端断开连接）时不会取消其他调用方仍在等待的调用。
+
+        Args:
+            key (Hashable): 用于合并请求的键。
+            factory (Callable[[], Awaitable[T]]): 没有进行中的调用时，用于创建新调用的函数。
+
+        Returns:
+            T: 调用的结果，调用抛出的异常会传递给所有调用方。
+        """
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.create_task(factory())
+            self._calls[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+            self._stats["executed"] += 1
+        else:
+            self._stats["coalesced"] += 1
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task):
+        """调用结束后移除记录，并取出异常，避免所有调用方都已离开时出现未处理异常的警告。"""
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    @property
+    def in_flight(self) -> int:
+        """当前进行中的调用数量。"""
+        return len(self._calls)
+
+    def stats(self) -> dict:
+        """返回实际执行次数与被合并的调用次数。"""
+        total = self._stats["executed"] + self._stats["coalesced"]
+        return {
+            **self._stats,
+            "in_flight": len(self._calls),
+            "coalesced_ratio": self._stats["coalesced"] / total if total else 0.0,
+        }
+
+
+# 进程内共享的爬取请求合并器
+crawl_flights = SingleFlight()
@@ -0,0 +1,375 @@
+import asyncio
+import base64
+import gzip
+import hashlib
+import json
+import logging
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List, Optional
+from .crawler import content_bytes, split_output_formats, HTML_OUTPUT_FORMATS
+from .metrics import sink_bytes, sink_records, stage_seconds
+from ..models.schemas import CrawlResponse, SinkSummary
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+logger = logging.getLogger(__name__)
+
+# 每条记录除内容以外的字段估算占用的字节数，用于控制缓冲区大小
+RECORD_OVERHEAD_BYTES = 256
+
+
+class ResultSink:
+    """把爬取结果写入文件的输出端基类。
+
+    结果先放入内存缓冲区，记录数或字节数达到上限后整批交给后台线程写入，写入期间可以继续缓冲下一批；
+    下一批也满时等待上一批写完，因此无论爬取多少页面，内存中最多只有两批结果。
+    文件大小超过rotate_bytes后切换到下一个编号的文件。
+    """
+    format = ""
+    extension = ""
+
+    def __init__(self, directory: Path, name: str, settings: dict, metadata: dict):
+        """初始化ResultSink实例。
+
+        Args:
+            directory (Path): 输出文件所在目录。
+            name (str): 输出文件名前缀。
+            settings (dict): 输出配置，见ConfigLoader.SETTINGS_SECTIONS中的sink_config。
+            metadata (dict): 写入文件的爬取信息，例如爬取类型和输出格式。
+        """
+        directory.mkdir(parents=True, exist_ok=True)
+        self.directory = directory
+        self.name = name
+        self.metadata = metadata
+        self.buffer_records = max(1, int(settings["buffer_records"]))
+        self.buffer_bytes = int(settings["buffer_bytes"])
+        self.rotate_bytes = int(settings["rotate_bytes"])
+
+        self.files: List[Path] = []
+        self.records = 0
+        self.bytes = 0
+        self._buffer: List[dict] = []
+        self._buffered_bytes = 0
+        self._pending: Optional[asyncio.Future] = None
+        self._closing: Optional[asyncio.Task] = None
+        self._file = None
+        self._file_bytes = 0
+
+    async def write(self, url: str, response: CrawlResponse, output_format: str, depth: Optional[int] = None):
+        """缓冲一条爬取结果，缓冲区已满时整批写入。
+
+        Args:
+            url (str): 页面URL。
+            response (CrawlResponse): 爬取结果。
+            output_format (str): 输出格式，多个格式以逗号分隔。
+            depth (int): 整站爬取中页面的深度。
+        """
+        if response.contents is not None:
+            contents = dict(response.contents)
+        else:
+            contents = {output_format: response.content}
+        self._buffer.append({
+            "url": url,
+            "depth": depth,
+            "success": response.success,
+            "error_message": response.error_message,
+            "unchanged": response.unchanged,
+            "crawled_at": time.time(),
+            "contents": contents,
+        })
+        self._buffered_bytes += content_bytes(response) + RECORD_OVERHEAD_BYTES
+        self.records += 1
+        sink_records.labels(self.format).inc()
+        if len(self._buffer) >= self.buffer_records or (self.buffer_bytes and self._buffered_bytes >= self.buffer_bytes):
+            await self.flush()
+
+    async def flush(self):
+        """把缓冲区中的结果交给后台线程写入，上一批尚未写完时先等待其完成。"""
+        await self._wait_pending()
+        if not self._buffer:
+            return
+        batch, self._buffer, self._buffered_bytes = self._buffer, [], 0
+        self._pending = asyncio.ensure_future(asyncio.to_thread(self._write_batch, batch))
+
+    async def _wait_pending(self):
+        if self._pending is None:
+            return
+        pending, self._pending = self._pending, None
+        written, seconds = await pending
+        # 指标只在事件循环中更新
+        self.bytes += written
+        sink_bytes.labels(self.format).inc(written)
+        stage_seconds.labels("sink_write").observe(seconds)
+
+    async def close(self) -> SinkSummary:
+        """写入剩余结果并关闭文件。
+
+        调用方被取消（例如客户端断开连接）时，已缓冲的结果仍会在后台写完。
+
+        Returns:
+            SinkSummary: 输出文件与写入统计。
+        """
+        if self._closing is None:
+            self._closing = asyncio.ensure_future(self._close())
+        await asyncio.shield(self._closing)
+        return self.summary()
+
+    async def _close(self):
+        try:
+            await self.flush()
+            await self._wait_pending()
+        finally:
+            self.bytes += await asyncio.to_thread(self._close_file)
+
+    def summary(self) -> SinkSummary:
+        """返回输出文件与写入统计。"""
+        return SinkSummary(format=self.format, directory=str(self.directory),
+                           files=[path.name for path in self.files], records=self.records, bytes=self.bytes)
+
+    def _write_batch(self, batch: List[dict]):
+        """在后台线程中写入一批结果。
+
+        Returns:
+            tuple: (写入的字节数, 耗时秒数)。
+        """
+        started = time.perf_counter()
+        written = 0
+        chunks = []
+        for record in batch:
+            data = self._encode(record)
+            if self._file is None or (self.rotate_bytes and self._file_bytes
+                                      and self._file_bytes + len(data) > self.rotate_bytes):
+                if chunks:
+                    self._file.write(b"".join(chunks))
+                    chunks = []
+                written += self._open_next()
+            chunks.append(data)
+            self._file_bytes += len(data)
+            written += len(data)
+        if chunks:
+            self._file.write(b"".join(chunks))
+        self._file.flush()
+        return written, time.perf_counter() - started
+
+    def _open_next(self) -> int:
+        """关闭当前文件并打开下一个编号的文件。
+
+        Returns:
+            int: 关闭旧文件和写入新文件开头时写入的字节数。
+        """
+        written = self._close_file()
+        index = len(self.files) + 1
+        while True:
+            path = self.directory / f"{self.name}-{index:05d}{self.extension}"
+            try:
+                self._file = open(path, "xb")
+                break
+            except FileExistsError:
+                # 同名的输出已存在时继续编号，不覆盖之前的文件
+                index += 1
+        self.files.append(path)
+        self._file_bytes = 0
+        header = self._header(path)
+        if header:
+            self._file.write(header)
+            self._file_bytes += len(header)
+        return written + len(header)
+
+    def _header(self, path: Path) -> bytes:
+        """每个文件开头写入的内容。"""
+        return b""
+
+    def _encode(self, record: dict) -> bytes:
+        """编码一条结果。"""
+        raise NotImplementedError
+
+    def _close_file(self) -> int:
+        """关闭当前文件，返回关闭时额外写入的字节数。"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        return 0
+
+
+class JSONLSink(ResultSink):
+    """每行一条JSON记录的追加写入输出，记录格式与/api/crawl/batch的结果相同，另含深度和爬取时间。"""
+    format = "jsonl"
+    extension = ".jsonl"
+
+    def _encode(self, record: dict) -> bytes:
+        item = dict(record)
+        contents = item.pop("contents")
+        if len(contents) == 1:
+            item["content"] = next(iter(contents.values()))
+        else:
+            item["contents"] = contents
+        return (json.dumps(item, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+class ParquetSink(ResultSink):
+    """列式存储的Parquet输出，每个输出格式一列，每批结果写为一个行组，爬取信息写入文件元数据。"""
+    format = "parquet"
+    extension = ".parquet"
+
+    def __init__(self, directory: Path, name: str, settings: dict, metadata: dict):
+        if pyarrow is None:
+            raise ValueError("Parquet output requires the pyarrow package")
+        super().__init__(directory, name, settings, metadata)
+        compression = settings["parquet_compression"]
+        self.compression = None if compression == "none" else compression
+        self.output_formats = split_output_formats(metadata["output_format"])
+        fields = [
+            ("url", pyarrow.string()),
+            ("depth", pyarrow.int32()),
+            ("success", pyarrow.bool_()),
+            ("error_message", pyarrow.string()),
+            ("unchanged", pyarrow.bool_()),
+            ("crawled_at", pyarrow.timestamp("ms", tz="UTC")),
+        ]
+        fields.extend((output_format, pyarrow.large_string()) for output_format in self.output_formats)
+        self.schema = pyarrow.schema(fields, metadata={
+            "crawl4ai_api": json.dumps(metadata, ensure_ascii=False, default=str),
+        })
+        self._writer = None
+
+    def _write_batch(self, batch: List[dict]):
+        started = time.perf_counter()
+        written = 0
+        if self._file is None or (self.rotate_bytes and self._file_bytes >= self.rotate_bytes):
+            written += self._open_next()
+        columns = {name: [record[name] for record in batch]
+                   for name in ("url", "depth", "success", "error_message", "unchanged")}
+        columns["crawled_at"] = [int(record["crawled_at"] * 1000) for record in batch]
+        for output_format in self.output_formats:
+            columns[output_format] = [record["contents"].get(output_format) for record in batch]
+        self._writer.write_table(pyarrow.Table.from_pydict(columns, schema=self.schema))
+        written += self._file.tell() - self._file_bytes
+        self._file_bytes = self._file.tell()
+        return written, time.perf_counter() - started
+
+    def _open_next(self) -> int:
+        written = super()._open_next()
+        self._writer = pyarrow.parquet.ParquetWriter(self._file, self.schema, compression=self.compression)
+        return written
+
+    def _close_file(self) -> int:
+        written = 0
+        if self._writer is not None:
+            # 关闭时写入文件尾部的元数据
+            self._writer.close()
+            self._writer = None
+            written = self._file.tell() - self._file_bytes
+        return written + super()._close_file()
+
+
+class WARCSink(ResultSink):
+    """WARC 1.1格式的输出。
+
+    页面的原始HTML写为resource记录，其他输出格式写为引用该记录的conversion记录，
+    爬取失败的页面写为metadata记录。启用warc_gzip时每条记录单独压缩，即通用的.warc.gz格式。
+    """
+    format = "warc"
+
+    def __init__(self, directory: Path, name: str, settings: dict, metadata: dict):
+        self.gzip = bool(settings["warc_gzip"])
+        self.extension = ".warc.gz" if self.gzip else ".warc"
+        super().__init__(directory, name, settings, metadata)
+
+    @staticmethod
+    def _record(warc_type: str, headers: Dict[str, str], block: bytes, record_id: Optional[str] = None) -> bytes:
+        lines = [
+            "WARC/1.1",
+            f"WARC-Type: {warc_type}",
+            f"WARC-Record-ID: {record_id or _record_id()}",
+            *(f"{key}: {value}" for key, value in headers.items()),
+            f"WARC-Block-Digest: sha1:{base64.b32encode(hashlib.sha1(block).digest()).decode('ascii')}",
+            f"Content-Length: {len(block)}",
+        ]
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8") + block + b"\r\n\r\n"
+
+    def _compress(self, data: bytes) -> bytes:
+        return gzip.compress(data, compresslevel=6, mtime=0) if self.gzip else data
+
+    def _header(self, path: Path) -> bytes:
+        fields = {"software": "crawl4ai-api", "format": "WARC File Format 1.1"}
+        for key, value in self.metadata.items():
+            fields[key] = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+        block = "".join(f"{key}: {value}\r\n" for key, value in fields.items()).encode("utf-8")
+        return self._compress(self._record("warcinfo", {
+            "WARC-Date": _warc_date(time.time()),
+            "WARC-Filename": path.name,
+            "Content-Type": "application/warc-fields",
+        }, block))
+
+    def _encode(self, record: dict) -> bytes:
+        date = _warc_date(record["crawled_at"])
+        common = {"WARC-Target-URI": record["url"], "WARC-Date": date}
+        if not record["success"]:
+            block = f"error: {record['error_message'] or ''}\r\n".encode("utf-8")
+            return self._compress(self._record("metadata", {**common, "Content-Type": "application/warc-fields"}, block))
+
+        parts = []
+        refers_to = None
+        for output_format, content in sorted(record["contents"].items(), key=lambda item: item[0] != "html"):
+            if content is None:
+                continue
+            block = content.encode("utf-8")
+            is_html = output_format in HTML_OUTPUT_FORMATS or output_format == "fit_html"
+            headers = {**common, "Content-Type": f"{'text/html' if is_html else 'text/markdown'}; charset=utf-8"}
+            if output_format == "html":
+                refers_to = _record_id()
+                data = self._record("resource", headers, block, refers_to)
+            else:
+                headers["WARC-Profile-Format"] = output_format
+                if refers_to is not None:
+                    headers["WARC-Refers-To"] = refers_to
+                data = self._record("conversion", headers, block)
+            parts.append(self._compress(data))
+        return b"".join(parts)
+
+
+def _record_id() -> str:
+    return f"<urn:uuid:{uuid.uuid4()}>"
+
+
+def _warc_date(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(timestamp))
+
+
+# 输出端名称及其对应的类
+SINKS = {
+    "jsonl": JSONLSink,
+    "parquet": ParquetSink,
+    "warc": WARCSink,
+}
+
+
+def open_sink(sink_format: str, name: Optional[str], settings: dict, metadata: dict) -> ResultSink:
+    """创建一个输出端，输出文件位于output_dir下以名称命名的目录中。
+
+    Args:
+        sink_format (str): 输出端格式，jsonl、parquet或warc。
+        name (str): 输出名称，未指定时由时间和随机后缀生成。
+        settings (dict): 输出配置，见ConfigLoader.SETTINGS_SECTIONS中的sink_config。
+        metadata (dict): 写入文件的爬取信息。
+
+    Returns:
+        ResultSink: 输出端。
+
+    Raises:
+        ValueError: 输出端格式无效或缺少可选依赖时抛出。
+    """
+    if sink_format not in SINKS:
+        raise ValueError(f"Invalid sink format: {sink_format}")
+    name = name or f"crawl-{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    directory = Path(__file__).parent.parent.joinpath(settings["output_dir"], name)
+    metadata = {**metadata, "name": name, "created_at": time.time()}
+    sink = SINKS[sink_format](directory, name, settings, metadata)
+    logger.info("爬取结果将写入: %s", directory)
+    return sink
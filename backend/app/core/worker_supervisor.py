@@ -0,0 +1,237 @@
+import asyncio
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Optional
+from ..models.schemas import CrawlResponse
+from ..utils.fingerprint import config_fingerprint
+
+if TYPE_CHECKING:
+    from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+
+logger = logging.getLogger(__name__)
+
+# 工作进程发往主进程的消息类型
+_ACK = "ack"
+_RESULT = "result"
+
+# 工作进程中按配置指纹缓存的配置对象数量上限
+_CONFIG_CACHE_SIZE = 64
+
+# 等待工作进程返回结果时，在页面超时之外额外留出的时间（秒），覆盖排队、启动浏览器和后处理的耗时
+_DISPATCH_TIMEOUT_MARGIN = 30.0
+
+
+def _worker_main(request_queue, response_queue, pool_settings: dict, blocking_settings: dict):
+    """爬取工作进程的入口：拥有独立的事件循环和浏览器池，从请求队列领取爬取任务。
+
+    Args:
+        request_queue (multiprocessing.Queue): 主进程发来的爬取请求。
+        response_queue (multiprocessing.SimpleQueue): 发回主进程的确认与结果。
+        pool_settings (dict): 浏览器池配置。
+        blocking_settings (dict): 资源拦截配置。
+    """
+    from .browser_sessions import domain_sessions
+    from .crawler import _fetch_local
+    from .crawler_pool import pool_manager
+    from ..utils.log_utils import setup_logging
+
+    setup_logging()
+    pool_manager.configure(pool_settings)
+    domain_sessions.configure(blocking_settings)
+    # 相同指纹的配置复用同一个对象，使浏览器池和指纹缓存按对象身份命中；按最近使用淘汰，避免配置频繁变化时无限增长
+    configs = OrderedDict()
+
+    async def handle(request_id: int, url: str, fingerprint: str, browser_config, crawler_run_config, output_format):
+        browser_config, crawler_run_config = configs.setdefault(fingerprint, (browser_config, crawler_run_config))
+        configs.move_to_end(fingerprint)
+        while len(configs) > _CONFIG_CACHE_SIZE:
+            configs.popitem(last=False)
+        try:
+            response = await _fetch_local(url, browser_config, crawler_run_config, output_format)
+        except Exception as e:
+            response = CrawlResponse(success=False, error_message=str(e))
+        response_queue.put((_RESULT, request_id, response.model_dump()))
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        # 只领取浏览器池能够同时处理的请求数量，其余请求留在共享队列中由空闲的工作进程领取
+        slots = asyncio.Semaphore(max(1, int(pool_settings["size"])))
+        tasks = set()
+        while True:
+            await slots.acquire()
+            message = await loop.run_in_executor(None, request_queue.get)
+            if message is None:
+                break
+            response_queue.put((_ACK, message[0], os.getpid()))
+            task = asyncio.create_task(handle(*message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            task.add_done_callback(lambda _: slots.release())
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await pool_manager.close()
+
+    asyncio.run(run())
+
+
+class WorkerSupervisor:
+    """多进程模式下的爬取工作进程管理器：启动N个工作进程，通过进程间队列分发爬取请求并收集结果，
+    工作进程异常退出时重启进程，并使其正在处理的请求失败返回。"""
+    def __init__(self):
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = []
+        self._request_queue = None
+        self._response_queue = None
+        self._pending = {}
+        self._owners = {}
+        self._ids = itertools.count()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reader = None
+        self._monitor = None
+        self._stopping = threading.Event()
+        self._pool_settings = {}
+        self._blocking_settings = {}
+
+    @property
+    def enabled(self) -> bool:
+        """是否已启动多进程模式。"""
+        return bool(self._processes)
+
+    @property
+    def alive(self) -> int:
+        """存活的工作进程数量。"""
+        return sum(process.is_alive() for process in self._processes)
+
+    def start(self, processes: int, pool_settings: dict, blocking_settings: dict):
+        """启动工作进程。
+
+        Args:
+            processes (int): 工作进程数量，0表示使用CPU核心数。
+            pool_settings (dict): 每个工作进程中浏览器池的配置。
+            blocking_settings (dict): 每个工作进程中资源拦截的配置。
+        """
+        self._loop = asyncio.get_running_loop()
+        self._pool_settings = dict(pool_settings)
+        self._blocking_settings = dict(blocking_settings)
+        self._request_queue = self._context.Queue()
+        # 确认消息需要在工作进程崩溃前同步写出，因此使用不经过后台发送线程的SimpleQueue
+        self._response_queue = self._context.SimpleQueue()
+        self._stopping.clear()
+        for _ in range(processes or os.cpu_count() or 1):
+            self._processes.append(self._spawn())
+        self._reader = threading.Thread(target=self._read_responses, name="crawl-worker-reader", daemon=True)
+        self._reader.start()
+        self._monitor = threading.Thread(target=self._monitor_processes, name="crawl-worker-monitor", daemon=True)
+        self._monitor.start()
+        logger.info("已启动%s个爬取工作进程", len(self._processes))
+
+    def _spawn(self):
+        """启动一个工作进程。"""
+        process = self._context.Process(
+            target=_worker_main,
+            args=(self._request_queue, self._response_queue, self._pool_settings, self._blocking_settings),
+            name="crawl-worker",
+            daemon=True,
+        )
+        process.start()
+        return process
+
+    def _read_responses(self):
+        """在后台线程中读取工作进程发回的消息，并在事件循环中完成对应的请求。"""
+        while True:
+            try:
+                message = self._response_queue.get()
+            except (EOFError, OSError):
+                break
+            if message is None:
+                break
+            kind, request_id, payload = message
+            if kind == _ACK:
+                self._owners[request_id] = payload
+            else:
+                self._owners.pop(request_id, None)
+                self._loop.call_soon_threadsafe(self._resolve, request_id, CrawlResponse(**payload))
+
+    def _monitor_processes(self):
+        """在后台线程中检查工作进程，重启异常退出的进程。"""
+        while not self._stopping.wait(1.0):
+            for index, process in enumerate(list(self._processes)):
+                if process.is_alive():
+                    continue
+                logger.warning("爬取工作进程%s异常退出（退出码%s），正在重启", process.pid, process.exitcode)
+                lost = [request_id for request_id, pid in list(self._owners.items()) if pid == process.pid]
+                for request_id in lost:
+                    self._owners.pop(request_id, None)
+                    self._loop.call_soon_threadsafe(
+                        self._resolve, request_id,
+                        CrawlResponse(success=False, error_message="Crawl worker process exited unexpectedly"),
+                    )
+                self._processes[index] = self._spawn()
+
+    def _resolve(self, request_id: int, response: CrawlResponse):
+        """在事件循环线程中完成等待中的请求。"""
+        future = self._pending.pop(request_id, None)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def _fail_pending(self, message: str):
+        """在事件循环线程中使所有等待中的请求失败返回。"""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result(CrawlResponse(success=False, error_message=message))
+        self._pending.clear()
+
+    async def dispatch(self, url: str, browser_config: "BrowserConfig", crawler_run_config: "CrawlerRunConfig",
+                       output_format: str) -> CrawlResponse:
+        """把爬取请求交给工作进程执行。
+
+        Args:
+            url (str): 已经过处理的URL。
+            browser_config (BrowserConfig): 浏览器配置。
+            crawler_run_config (CrawlerRunConfig): 爬虫运行配置。
+            output_format (str): 输出格式。
+
+        Returns:
+            CrawlResponse: 工作进程返回的爬取结果，超过页面超时加上余量仍未返回时为失败结果。
+        """
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        fingerprint = config_fingerprint(browser_config) + config_fingerprint(crawler_run_config)
+        self._request_queue.put((request_id, url, fingerprint, browser_config, crawler_run_config, output_format))
+        timeout = (getattr(crawler_run_config, "page_timeout", None) or 60000) / 1000 + _DISPATCH_TIMEOUT_MARGIN
+        try:
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            logger.warning("爬取工作进程在%.0f秒内未返回%s的结果", timeout, url)
+            return CrawlResponse(success=False, error_message=f"Crawl worker did not respond within {timeout:.0f} seconds")
+        finally:
+            # 超时后工作进程返回的结果找不到等待中的请求，会被直接丢弃
+            self._pending.pop(request_id, None)
+            self._owners.pop(request_id, None)
+
+    def stop(self):
+        """通知所有工作进程处理完手头的请求后退出。
+
+        可以在事件循环之外的线程中调用（例如通过asyncio.to_thread），等待中的请求在事件循环线程中失败返回。
+        """
+        if not self._processes:
+            return
+        self._stopping.set()
+        for _ in self._processes:
+            self._request_queue.put(None)
+        for process in self._processes:
+            process.join(timeout=30)
+            if process.is_alive():
+                process.terminate()
+        self._processes = []
+        self._response_queue.put(None)
+        self._reader.join()
+        self._loop.call_soon_threadsafe(self._fail_pending, "Crawl workers are shutting down")
+
+
+# 进程内共享的工作进程管理器
+worker_supervisor = WorkerSupervisor()
@@ -1,14 +1,51 @@
-from .core.config_loader import ConfigLoader
-from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+import os
+from functools import lru_cache
+from typing import TYPE_CHECKING
+from fastapi import Depends
+from .core.config_loader import ConfigLoader, ConfigSnapshot
 
-def get_browser_config() -> BrowserConfig:
-    config_loader = ConfigLoader()
-    return config_loader.load_browser_config()
+if TYPE_CHECKING:
+    from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
 
-def get_crawler_config() -> CrawlerRunConfig:
-    config_loader = ConfigLoader()
-    return config_loader.load_crawler_config()
+@lru_cache(maxsize=None)
+def get_config_loader() -> ConfigLoader:
+    # 进程内共享同一个ConfigLoader，配置文件只解析一次，且只启动一个监听线程
+    # 可通过环境变量CRAWLER_CONFIG_PATH指定其他配置文件，例如基准测试使用的临时配置
+    return ConfigLoader(os.environ.get("CRAWLER_CONFIG_PATH", "./config/config.json"))
 
-def get_output_format() -> str:
-    config_loader = ConfigLoader()
-    return config_loader.load_output_format()
+def get_config_snapshot() -> ConfigSnapshot:
+    # 同一请求内的所有依赖共享同一个配置快照，避免请求处理过程中配置被替换导致前后不一致
+    return get_config_loader().snapshot
+
+def get_browser_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> "BrowserConfig":
+    return snapshot.browser_config
+
+def get_crawler_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> "CrawlerRunConfig":
+    return snapshot.crawler_run_config
+
+def get_output_format(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> str:
+    return snapshot.output_format
+
+def get_crawler_pool_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> dict:
+    return snapshot.crawler_pool_config
+
+def get_batch_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> dict:
+    return snapshot.batch_config
+
+def get_stream_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> dict:
+    return snapshot.stream_config
+
+def get_job_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> dict:
+    return snapshot.job_config
+
+def get_worker_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> dict:
+    return snapshot.worker_config
+
+def get_deep_crawl_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> dict:
+    return snapshot.deep_crawl_config
+
+def get_profile_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> dict:
+    return snapshot.profile_config
+
+def get_sink_config(snapshot: ConfigSnapshot = Depends(get_config_snapshot)) -> dict:
+    return snapshot.sink_config
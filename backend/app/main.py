@@ -1,6 +1,27 @@
+import asyncio
+import logging
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from .api.routers import crawl
+from .api.middleware import CompressionMiddleware, MetricsMiddleware
+from .api.routers import crawl, health, jobs, metrics
+from .core.admission import admission
+from .core.browser_sessions import domain_sessions
+from .core.config_loader import import_crawl4ai
+from .core.crawler_pool import pool_manager
+from .core.incremental import incremental
+from .core.job_worker import job_workers
+from .core.postprocess import markdown_offloader
+from .core.profiles import profile_factory
+from .core.readiness import readiness
+from .core.result_cache import result_cache
+from .core.worker_supervisor import worker_supervisor
+from .dependencies import get_config_loader
+from .utils.log_utils import setup_logging
+
+# 日志级别和格式通过环境变量CRAWLER_LOG_LEVEL和CRAWLER_LOG_FORMAT设置
+setup_logging()
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
@@ -13,6 +34,124 @@ app.add_middleware(
     allow_headers=["*"], # 允许所有请求头
 )
 
+# 按Accept-Encoding压缩响应体，大页面的HTML和Markdown可以显著减少传输字节数
+app.add_middleware(CompressionMiddleware)
+
+# 记录请求数量、耗时与压缩后的响应大小，通过/metrics导出
+app.add_middleware(MetricsMiddleware)
+
+# 启动时应用资源拦截策略，配置文件变更时热更新，新规则对之后创建的页面生效
+@app.on_event("startup")
+async def start_resource_blocking():
+    config_loader = get_config_loader()
+    domain_sessions.configure(config_loader.snapshot.resource_blocking_config)
+    config_loader.add_listener(domain_sessions.handle_config_reload)
+
+async def warm_up(snapshot, require_browser: bool):
+    """导入crawl4ai、构建crawl4ai配置对象并预热浏览器池，各阶段的进度通过/ready查询。
+
+    导入和构建配置对象在线程中进行，不阻塞事件循环；预热失败只记录日志，之后的请求仍会按需启动浏览器。
+    """
+    try:
+        async with readiness.stage("crawl4ai_import"):
+            await asyncio.to_thread(import_crawl4ai)
+        async with readiness.stage("crawler_config"):
+            await asyncio.to_thread(snapshot.crawl4ai_objects.get)
+        async with readiness.stage("browser_pool"):
+            # 多进程模式下浏览器池位于各个爬取工作进程中，由工作进程自行预热
+            if not worker_supervisor.enabled:
+                await pool_manager.start(snapshot.browser_config)
+                if require_browser and not pool_manager.current.idle:
+                    raise RuntimeError("浏览器预热失败，没有可用的浏览器")
+        logger.info("预热完成，爬虫已就绪")
+    except Exception as e:
+        logger.warning("预热失败: %s", e)
+
+# 启动时预热浏览器池，避免首个请求承担crawl4ai导入和浏览器启动的开销
+# 默认在后台预热，服务启动后立即响应存活检查（/health），预热完成后就绪检查（/ready）才返回200；
+# startup_config.background_warmup为false时，启动过程等待预热完成后才开始接受请求
+@app.on_event("startup")
+async def start_crawler_pool():
+    snapshot = get_config_loader().snapshot
+    worker_config = snapshot.worker_config
+    startup_config = snapshot.startup_config
+    # 请求分发方式在启动时即确定，预热完成前到达的请求等待同一个浏览器池启动
+    if worker_config["mode"] == "multiprocess":
+        worker_supervisor.start(int(worker_config["processes"]), snapshot.crawler_pool_config,
+                                snapshot.resource_blocking_config)
+    else:
+        pool_manager.configure(snapshot.crawler_pool_config)
+        # 单进程模式下可以把Markdown生成和内容过滤放到进程池中执行，避免阻塞事件循环
+        if worker_config["offload_postprocessing"]:
+            markdown_offloader.start(int(worker_config["postprocess_workers"]))
+    background = startup_config["background_warmup"]
+    readiness.begin("background" if background else "blocking")
+    if background:
+        app.state.warmup_task = asyncio.create_task(warm_up(snapshot, startup_config["require_browser"]))
+    else:
+        await warm_up(snapshot, startup_config["require_browser"])
+
+# 启动时打开结果缓存，并在配置变更时只清除受影响的缓存条目
+@app.on_event("startup")
+async def start_result_cache():
+    config_loader = get_config_loader()
+    result_cache.configure(config_loader.snapshot.result_cache_config)
+    config_loader.add_listener(result_cache.handle_config_reload)
+
+# 启动时应用请求级别过滤方案的缓存容量
+@app.on_event("startup")
+async def start_profile_factory():
+    config_loader = get_config_loader()
+    profile_factory.configure(config_loader.snapshot.profile_config)
+    config_loader.add_listener(profile_factory.handle_config_reload)
+
+# 启动时打开增量刷新存储，配置文件变更时热更新
+@app.on_event("startup")
+async def start_incremental_refresh():
+    config_loader = get_config_loader()
+    incremental.configure(config_loader.snapshot.incremental_config)
+    config_loader.add_loop_listener(incremental.handle_config_reload, asyncio.get_running_loop())
+
+# 启动时应用准入控制配置，配置文件变更时热更新并发上限、队列长度与限流参数
+@app.on_event("startup")
+async def start_admission_control():
+    config_loader = get_config_loader()
+    admission.configure(config_loader.snapshot.admission_config)
+    config_loader.add_loop_listener(admission.handle_config_reload, asyncio.get_running_loop())
+
+# 启动后台任务工作者，继续执行上次进程退出时未完成的任务
+@app.on_event("startup")
+async def start_job_workers():
+    config_loader = get_config_loader()
+    job_workers.configure(config_loader.snapshot.job_config)
+    await job_workers.start(lambda: config_loader.snapshot)
+
+# 关闭时先停止任务工作者，未完成的任务在租约过期后由下次启动的工作者继续执行
+@app.on_event("shutdown")
+async def stop_job_workers():
+    await job_workers.stop()
+
+# 关闭时等待预热、进行中的爬取结束并释放所有浏览器
+# 中途取消预热会留下启动到一半的浏览器，因此等待预热结束后再关闭浏览器池
+@app.on_event("shutdown")
+async def close_crawler_pool():
+    warmup_task = getattr(app.state, "warmup_task", None)
+    if warmup_task is not None:
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    await asyncio.to_thread(worker_supervisor.stop)
+    await pool_manager.close()
+    markdown_offloader.close()
+
+@app.on_event("shutdown")
+async def close_result_cache():
+    result_cache.close()
+    await incremental.close()
+
+# 最后停止配置文件监听
+@app.on_event("shutdown")
+async def close_config_loader():
+    get_config_loader().close()
+
 # 定义根路由
 @app.get("/")
 async def root():
@@ -21,6 +160,15 @@ async def root():
 # 定义爬虫路由
 app.include_router(crawl.router, prefix="/api")
 
+# 定义异步任务路由
+app.include_router(jobs.router, prefix="/api")
+
+# 定义Prometheus指标路由
+app.include_router(metrics.router)
+
+# 定义存活检查与就绪检查路由
+app.include_router(health.router)
+
 
 # 启动应用
 if __name__ == "__main__":
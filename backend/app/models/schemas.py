@@ -1,15 +1,111 @@
-from pydantic import BaseModel
-from typing import Optional, Dict
-from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+import importlib
+from pydantic import AfterValidator, BaseModel, Field
+from typing import Annotated, Any, Optional, Dict, List
+
+
+def _instance_of(module: str, name: str) -> AfterValidator:
+    """校验字段值是指定类的实例，类在首次校验时才导入，导入本模块时不加载crawl4ai。"""
+    def validate(value):
+        cls = getattr(importlib.import_module(module), name)
+        if not isinstance(value, cls):
+            raise ValueError(f"Input should be an instance of {name}")
+        return value
+    return AfterValidator(validate)
+
 
 class CrawlRequest(BaseModel):
-    model_config = {"arbitrary_types_allowed": True}
     url: str
-    browser_config: BrowserConfig
-    crawler_run_config: CrawlerRunConfig
+    browser_config: Annotated[Any, _instance_of("crawl4ai.async_configs", "BrowserConfig")]
+    crawler_run_config: Annotated[Any, _instance_of("crawl4ai.async_configs", "CrawlerRunConfig")]
     output_format: str
+    max_age: Optional[float] = None
+    deadline: Optional[float] = None
 
 class CrawlResponse(BaseModel):
     success: bool
     content: Optional[str] = None
-    error_message: Optional[str] = None
\ No newline at end of file
+    error_message: Optional[str] = None
+    contents: Optional[Dict[str, Optional[str]]] = None # 同时请求多个输出格式时，各个格式的内容
+    links: Optional[List[str]] = None # 页面中的链接，供整站爬取使用，单页爬取接口不返回
+    unchanged: Optional[bool] = None # 启用增量刷新时，页面自上次爬取后未变化则为True
+
+# 请求级别的内容过滤器与Markdown选项，未指定的项使用配置文件中的值
+class MarkdownProfile(BaseModel):
+    content_filter: Optional[str] = None # 内容过滤器：pruning、BM25或none
+    user_query: Optional[str] = None
+    threshold: Optional[float] = Field(default=None, ge=0) # 仅pruning
+    threshold_type: Optional[str] = Field(default=None, pattern="^(fixed|dynamic)$") # 仅pruning
+    min_word_threshold: Optional[int] = Field(default=None, ge=0) # 仅pruning
+    bm25_threshold: Optional[float] = Field(default=None, ge=0) # 仅BM25
+    ignore_links: Optional[bool] = None
+    ignore_images: Optional[bool] = None
+
+# 把爬取结果直接写入服务端文件的输出选项
+class SinkRequest(BaseModel):
+    format: str = Field(pattern="^(jsonl|parquet|warc)$") # 输出文件格式
+    name: Optional[str] = Field(default=None, pattern="^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$") # 输出目录和文件名前缀，未指定时自动生成
+    return_content: bool = True # 为false时响应中不返回页面内容，只写入文件
+
+class SinkSummary(BaseModel):
+    format: str
+    directory: str
+    files: List[str]
+    records: int
+    bytes: int
+
+class BatchCrawlRequest(BaseModel):
+    urls: List[str]
+    output_format: Optional[str] = None
+    max_age: Optional[float] = Field(default=None, ge=0)
+    markdown: Optional[MarkdownProfile] = None
+    sink: Optional[SinkRequest] = None
+
+class BatchCrawlItem(BaseModel):
+    url: str
+    success: bool
+    content: Optional[str] = None
+    error_message: Optional[str] = None
+    contents: Optional[Dict[str, Optional[str]]] = None
+    unchanged: Optional[bool] = None
+
+class BatchCrawlResponse(BaseModel):
+    results: List[BatchCrawlItem]
+    sink: Optional[SinkSummary] = None
+
+
+class JobCreateRequest(BaseModel):
+    url: str
+    output_format: Optional[str] = None
+    max_age: Optional[float] = Field(default=None, ge=0)
+
+class JobResponse(BaseModel):
+    id: str
+    status: str
+    url: str
+    output_format: str
+    attempts: int
+    max_attempts: int
+    created_at: float
+    updated_at: float
+    result: Optional[CrawlResponse] = None
+    error_message: Optional[str] = None
+
+
+class SiteCrawlRequest(BaseModel):
+    url: str
+    output_format: Optional[str] = None
+    max_age: Optional[float] = Field(default=None, ge=0)
+    max_depth: Optional[int] = Field(default=None, ge=0)
+    max_pages: Optional[int] = Field(default=None, ge=1)
+    max_bytes: Optional[int] = Field(default=None, ge=1)
+    markdown: Optional[MarkdownProfile] = None
+    sink: Optional[SinkRequest] = None
+
+
+class MarkdownVariant(MarkdownProfile):
+    output_format: Optional[str] = None # 该变体的输出格式，仅支持Markdown类格式
+
+class VariantCrawlRequest(BaseModel):
+    url: str
+    variants: Dict[str, MarkdownVariant] # 变体名称及其内容过滤器与Markdown选项
+    max_age: Optional[float] = Field(default=None, ge=0)
@@ -0,0 +1,94 @@
+import enum
+import hashlib
+import json
+import weakref
+
+# 以配置对象为键缓存其指纹，对象被回收后缓存项自动失效
+_fingerprint_cache = weakref.WeakKeyDictionary()
+
+_MAX_DEPTH = 6
+
+
+def _normalize(value, depth: int = 0):
+    """将配置对象递归转换为可稳定序列化的结构。
+
+    Args:
+        value: 任意配置值，可以是基础类型、容器或crawl4ai配置对象。
+        depth (int): 当前递归深度，超过上限时退化为类型名。
+
+    Returns:
+        可被json稳定序列化的值。
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if depth >= _MAX_DEPTH:
+        return type(value).__name__
+    if isinstance(value, dict):
+        return {str(k): _normalize(v, depth + 1) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v, depth + 1) for v in value]
+    if isinstance(value, (set, frozenset)):
+        return sorted(repr(_normalize(v, depth + 1)) for v in value)
+    if isinstance(value, enum.Enum):
+        # 枚举类型，例如CacheMode
+        return f"{type(value).__name__}.{value.name}"
+    if callable(value) and not hasattr(value, "__dict__"):
+        return getattr(value, "__qualname__", type(value).__name__)
+    if hasattr(value, "__dict__"):
+        fields = {
+            k: _normalize(v, depth + 1)
+            for k, v in vars(value).items()
+            if not k.startswith("_") and not callable(v)
+        }
+        return {"__type__": type(value).__name__, **fields}
+    return type(value).__name__
+
+
+def fingerprint(*values) -> str:
+    """计算一组配置值的稳定指纹。
+
+    Args:
+        *values: 需要参与指纹计算的配置对象或基础值。
+
+    Returns:
+        str: 十六进制的sha1摘要。
+    """
+    payload = json.dumps([_normalize(v) for v in values], sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def config_fingerprint(config) -> str:
+    """计算单个配置对象的指纹，并按对象身份进行缓存。
+
+    Args:
+        config: crawl4ai的配置对象，例如BrowserConfig。
+
+    Returns:
+        str: 配置对象的指纹。
+    """
+    try:
+        return _fingerprint_cache[config]
+    except (KeyError, TypeError):
+        pass
+    value = fingerprint(config)
+    try:
+        _fingerprint_cache[config] = value
+    except TypeError:
+        # 不支持弱引用的对象不做缓存
+        pass
+    return value
+
+
+def request_fingerprint(browser_config, crawler_run_config) -> str:
+    """计算一次爬取所使用的有效配置的指纹。
+
+    爬虫运行配置中包含Markdown生成器及其内容过滤器，因此它们的参数同样会影响指纹。
+
+    Args:
+        browser_config: 浏览器配置对象。
+        crawler_run_config: 爬虫运行配置对象。
+
+    Returns:
+        str: 有效配置的指纹。
+    """
+    return fingerprint(config_fingerprint(browser_config), config_fingerprint(crawler_run_config))
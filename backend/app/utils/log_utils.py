@@ -0,0 +1,49 @@
+import json
+import logging
+import os
+import sys
+
+# LogRecord自带的属性，其余属性视为通过extra传入的结构化字段
+_RESERVED_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """将日志记录输出为单行JSON，通过extra传入的字段作为独立的键。"""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RESERVED_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+def setup_logging(level: str = None, log_format: str = None):
+    """配置应用的日志输出，重复调用时只生效一次。
+
+    日志级别和格式默认从环境变量CRAWLER_LOG_LEVEL（默认INFO）和CRAWLER_LOG_FORMAT（text或json，默认text）读取。
+    低于当前级别的日志在格式化参数之前就会被丢弃，不会给请求处理带来额外开销。
+
+    Args:
+        level (str): 日志级别，例如DEBUG、INFO、WARNING。
+        log_format (str): 日志格式，text或json。
+    """
+    logger = logging.getLogger("app")
+    if logger.handlers:
+        return
+    level = (level or os.environ.get("CRAWLER_LOG_LEVEL", "INFO")).upper()
+    log_format = (log_format or os.environ.get("CRAWLER_LOG_FORMAT", "text")).lower()
+    handler = logging.StreamHandler(sys.stderr)
+    if log_format == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(getattr(logging, level, logging.INFO))
+    logger.propagate = False
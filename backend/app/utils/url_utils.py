@@ -1,25 +1,206 @@
-from urllib.parse import urlparse, urlunparse
-import validators
+import ipaddress
+import re
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import unquote_plus, urlsplit
+
+# 主机名中单个标签的格式（IDNA编码之后），与原先使用的validators.url一致：不允许下划线，不能以连字符开头或结尾
+_LABEL_RE = re.compile(r"^(?!-)[a-z0-9-]{1,63}(?<!-)$")
+
+# URL中不允许出现的空白和控制字符
+_FORBIDDEN_RE = re.compile(r"[\x00-\x20\x7f]")
+
+# 每个进程缓存的主机名数量，批量和整站爬取中发现的链接大多集中在少数主机上
+HOST_CACHE_SIZE = 4096
+
+
+class NormalizedURL(NamedTuple):
+    """规范化后的URL各个组成部分。
+
+    query保留原始的查询字符串，用于实际爬取；canonical_query移除了跟踪参数并排序，只用于去重和缓存键。
+    """
+    scheme: str
+    host: str # 小写、IDNA编码后的主机名，IPv6地址带方括号
+    port: Optional[int] # 默认端口为None
+    path: str
+    query: str
+    userinfo: str = ""
+    canonical_query: str = ""
+
+    @property
+    def netloc(self) -> str:
+        netloc = self.host if self.port is None else f"{self.host}:{self.port}"
+        return f"{self.userinfo}@{netloc}" if self.userinfo else netloc
+
+    @property
+    def url(self) -> str:
+        """拼接后的完整URL。"""
+        url = f"{self.scheme}://{self.netloc}{self.path}"
+        return f"{url}?{self.query}" if self.query else url
+
+    @property
+    def key(self) -> str:
+        """使用规范化查询字符串拼接的URL，同一页面的不同写法得到相同的结果，用于去重和缓存键。"""
+        url = f"{self.scheme}://{self.netloc}{self.path}"
+        return f"{url}?{self.canonical_query}" if self.canonical_query else url
+
+
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def _normalize_host(hostname: str) -> Optional[str]:
+    """验证并规范化主机名，结果按主机名缓存。
+
+    Args:
+        hostname (str): urlsplit得到的小写主机名，IPv6地址不带方括号。
+
+    Returns:
+        str: 规范化后的主机名，国际化域名转换为punycode，IPv6地址加上方括号；主机名无效时返回None。
+    """
+    if ":" in hostname:
+        try:
+            return f"[{ipaddress.IPv6Address(hostname).compressed}]"
+        except ValueError:
+            return None
+    if hostname.replace(".", "").isdigit():
+        try:
+            return str(ipaddress.IPv4Address(hostname))
+        except ValueError:
+            return None
+    try:
+        host = hostname.rstrip(".").encode("idna").decode("ascii").lower()
+    except UnicodeError:
+        return None
+    labels = host.split(".")
+    # 与原先使用的validators.url一致，不接受localhost等没有顶级域名的主机名
+    if len(labels) < 2 or labels[-1].isdigit() or not all(_LABEL_RE.match(label) for label in labels):
+        return None
+    return host
+
 
 class URLUtils:
-    @staticmethod
-    def validate_url(url: str) -> bool:
-        return validators.url(url)
+    # 规范化时移除的跟踪参数，它们不影响页面内容，只会让同一页面以不同的URL重复出现
+    TRACKING_PARAMS = frozenset({
+        "gclid", "dclid", "fbclid", "msclkid", "yclid", "igshid", "mc_cid", "mc_eid", "_ga", "_gl", "ref_src",
+    })
+    TRACKING_PARAM_PREFIXES = ("utm_",)
+    DEFAULT_PORTS = {"http": 80, "https": 443}
 
     @staticmethod
-    def validate_protocol(url: str) -> bool:
-        parsed_url = urlparse(url)
-        return parsed_url.scheme in ('http', 'https')
+    def clean_query(query: str) -> str:
+        """移除跟踪参数并按参数名排序查询字符串，参数顺序不同的相同查询得到相同的结果。
 
-    @staticmethod
-    def clean_url(parsed_url: str) -> str:
-        return urlunparse(parsed_url._replace(fragment=""))
+        各个参数保持原始的编码（例如%2F不会被解码为/，没有值的参数不会被补上“=”），只调整顺序。
+
+        Args:
+            query (str): 原始查询字符串。
+
+        Returns:
+            str: 规范化后的查询字符串。
+        """
+        if not query:
+            return query
+        params = []
+        for param in query.split("&"):
+            if not param:
+                continue
+            name = unquote_plus(param.partition("=")[0]).lower()
+            if name not in URLUtils.TRACKING_PARAMS and not name.startswith(URLUtils.TRACKING_PARAM_PREFIXES):
+                params.append(param)
+        params.sort(key=lambda param: param.partition("=")[0])
+        return "&".join(params)
 
     @staticmethod
-    def process_url(url: str) -> str:
-        if not URLUtils.validate_url(url):
+    def normalize(url: str) -> NormalizedURL:
+        """只解析一次URL，完成验证与规范化。
+
+        协议和主机名转为小写，国际化域名转换为punycode，去掉默认端口和片段，空路径补为“/”；
+        查询字符串保持原样，另外生成移除跟踪参数并按参数名排序的规范化查询字符串。主机名的验证结果按主机名缓存。
+
+        Args:
+            url (str): 原始URL。
+
+        Returns:
+            NormalizedURL: 规范化后的URL各个组成部分。
+
+        Raises:
+            ValueError: URL格式无效或协议不是http/https时抛出。
+        """
+        if _FORBIDDEN_RE.search(url):
+            raise ValueError("Invalid URL format")
+        try:
+            parts = urlsplit(url)
+            port = parts.port
+        except ValueError:
             raise ValueError("Invalid URL format")
-        parsed_url = urlparse(url)
-        if not URLUtils.validate_protocol(url):
+        scheme = parts.scheme.lower()
+        if not scheme or not parts.netloc:
+            raise ValueError("Invalid URL format")
+        if scheme not in URLUtils.DEFAULT_PORTS:
             raise ValueError("Only 'http' and 'https' protocols are supported")
-        return URLUtils.clean_url(parsed_url)
\ No newline at end of file
+        host = _normalize_host(parts.hostname or "")
+        if host is None:
+            raise ValueError("Invalid URL format")
+        if port == URLUtils.DEFAULT_PORTS[scheme]:
+            port = None
+        return NormalizedURL(
+            scheme=scheme, host=host, port=port, path=parts.path or "/",
+            query=parts.query, userinfo=parts.netloc.rpartition("@")[0],
+            canonical_query=URLUtils.clean_query(parts.query),
+        )
+
+    @staticmethod
+    def process_url(url: str) -> str:
+        return URLUtils.normalize(url).url
+
+    @staticmethod
+    def cache_key(url: str) -> str:
+        """返回URL的规范化形式，用作去重和缓存键；无法解析的URL原样返回。
+
+        Args:
+            url (str): 经过URLUtils.process_url处理的URL。
+
+        Returns:
+            str: 移除跟踪参数并排序查询参数后的URL。
+        """
+        try:
+            return URLUtils.normalize(url).key
+        except ValueError:
+            return url
+
+    @staticmethod
+    def normalize_urls(urls: List[str]) -> Tuple[List[NormalizedURL], Dict[str, str]]:
+        """一次性验证、规范化并去重一批URL，重复出现的原始URL只处理一次，规范化形式（NormalizedURL.key）相同的URL只保留第一个。
+
+        Args:
+            urls (List[str]): 原始URL列表。
+
+        Returns:
+            Tuple[List[NormalizedURL], Dict[str, str]]: 去重后的有效URL（保持首次出现的顺序），以及无效URL到错误信息的映射。
+        """
+        normalized, errors, seen_raw, seen = [], {}, set(), set()
+        normalize = URLUtils.normalize
+        for url in urls:
+            if url in seen_raw:
+                continue
+            seen_raw.add(url)
+            try:
+                result = normalize(url)
+            except ValueError as e:
+                errors[url] = str(e)
+                continue
+            if result.key not in seen:
+                seen.add(result.key)
+                normalized.append(result)
+        return normalized, errors
+
+    @staticmethod
+    def process_urls(urls: List[str]) -> Tuple[List[str], Dict[str, str]]:
+        """一次性验证、规范化并去重一批URL。
+
+        Args:
+            urls (List[str]): 原始URL列表。
+
+        Returns:
+            Tuple[List[str], Dict[str, str]]: 去重后的有效URL（保持首次出现的顺序），以及无效URL到错误信息的映射。
+        """
+        normalized, errors = URLUtils.normalize_urls(urls)
+        return [result.url for result in normalized], errors
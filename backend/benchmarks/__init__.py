@@ -0,0 +1 @@
+# 标记本目录为包
\ No newline at end of file
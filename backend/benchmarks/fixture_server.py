@@ -0,0 +1,133 @@
+"""本地基准测试站点：按参数生成大小和DOM复杂度可控的合成页面，并提供慢响应和错误响应。
+
+页面内容只由请求参数决定，同样的参数每次都返回完全相同的页面，保证基准测试结果可复现。
+
+路由：
+    /page?size=<KB>&depth=<嵌套层数>&links=<链接数>&seed=<种子>  合成页面
+    /slow?delay=<秒>&size=<KB>                                  延迟返回的合成页面
+    /error?status=<状态码>                                      错误响应
+"""
+import argparse
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlparse
+
+WORDS = ("crawler", "browser", "markdown", "content", "filter", "latency", "throughput", "page", "render",
+         "network", "cache", "queue", "worker", "request", "response", "document", "element", "session")
+
+
+def build_page(size_kb: int = 8, depth: int = 4, links: int = 20, seed: int = 0) -> bytes:
+    """生成合成HTML页面。
+
+    Args:
+        size_kb (int): 页面正文的近似大小（KB）。
+        depth (int): 每个段落外层嵌套的div层数，用于控制DOM复杂度。
+        links (int): 页面中的链接数量。
+        seed (int): 随机种子，相同参数生成相同页面。
+
+    Returns:
+        bytes: UTF-8编码的HTML。
+    """
+    rng = random.Random(f"{size_kb}:{depth}:{links}:{seed}")
+    parts = [f"<!DOCTYPE html><html><head><title>Fixture page {seed}</title></head><body>",
+             "<nav>" + "".join(f'<a href="/page?seed={seed * 1000 + i}">link {i}</a> ' for i in range(links)) + "</nav>",
+             f"<h1>Synthetic page {seed}</h1>"]
+    target = size_kb * 1024
+    written = sum(len(part) for part in parts)
+    section = 0
+    while written < target:
+        sentence = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 24))).capitalize() + "."
+        block = ("<div>" * depth) + f"<h2>Section {section}</h2><p>{sentence} {sentence}</p>" + ("</div>" * depth)
+        parts.append(block)
+        written += len(block)
+        section += 1
+    parts.append("<footer>fixture footer</footer></body></html>")
+    return "".join(parts).encode("utf-8")
+
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    """基准测试站点的请求处理器。"""
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        # 基准测试期间不输出访问日志
+        pass
+
+    def _send(self, status: int, body: bytes, content_type: str = "text/html; charset=utf-8"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        parsed = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(parsed.query).items()}
+
+        def int_param(name: str, default: int) -> int:
+            try:
+                return int(params.get(name, default))
+            except ValueError:
+                return default
+
+        if parsed.path == "/page":
+            self._send(200, build_page(int_param("size", 8), int_param("depth", 4),
+                                       int_param("links", 20), int_param("seed", 0)))
+        elif parsed.path == "/slow":
+            time.sleep(float(params.get("delay", 1)))
+            self._send(200, build_page(int_param("size", 8), seed=int_param("seed", 0)))
+        elif parsed.path == "/error":
+            status = int_param("status", 500)
+            self._send(status, f"<html><body>error {status}</body></html>".encode("utf-8"))
+        elif parsed.path == "/":
+            self._send(200, b"<html><body>fixture server</body></html>")
+        else:
+            self._send(404, b"<html><body>not found</body></html>")
+
+
+class FixtureServer:
+    """在后台线程中运行的基准测试站点。"""
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        """初始化FixtureServer实例。
+
+        Args:
+            host (str): 监听地址。
+            port (int): 监听端口，0表示由系统分配。
+        """
+        self._server = ThreadingHTTPServer((host, port), FixtureHandler)
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        """站点的根URL，例如http://127.0.0.1:8765。"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """在后台线程中启动站点。"""
+        self._thread = threading.Thread(target=self._server.serve_forever, name="fixture-server", daemon=True)
+        self._thread.start()
+
+    def serve_forever(self):
+        """在当前线程中运行站点，直到进程被中断。"""
+        self._server.serve_forever()
+
+    def stop(self):
+        """停止站点。"""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="运行基准测试使用的本地站点")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = FixtureServer(args.host, args.port)
+    print(f"fixture server listening on {server.base_url}")
+    server.serve_forever()
@@ -0,0 +1,403 @@
+"""爬虫API的基准测试。
+
+启动本地基准测试站点和一个独立的uvicorn进程（app.main:app），以固定的并发级别请求/api/crawl，
+统计吞吐量、p50/p95/p99延迟、进程树的峰值内存和浏览器启动次数，并与保存的基线对比。
+整个过程只访问本机，可以在离线的Linux机器上作为性能回归检查运行。
+
+用法（在backend/目录下）：
+    python -m benchmarks.run                                # 运行并与benchmarks/baseline.json对比
+    python -m benchmarks.run --save-baseline                # 运行并把结果保存为新的基线
+    python -m benchmarks.run --scenarios small,large --concurrency 1,8 --requests 40
+"""
+import argparse
+import asyncio
+import json
+import math
+import os
+import re
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+from .fixture_server import FixtureServer
+
+try:
+    import psutil
+except ImportError:  # psutil为可选依赖，缺失时不统计内存
+    psutil = None
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CONFIG_PATH = BACKEND_DIR / "app" / "config" / "config.json"
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "baseline.json"
+
+# 基准测试场景：请求的站点路径和页面参数，每个请求使用不同的seed，避免命中结果缓存或被合并
+SCENARIOS = {
+    "small": {"path": "/page", "params": {"size": 8, "depth": 4, "links": 20}},
+    "large": {"path": "/page", "params": {"size": 512, "depth": 24, "links": 500}},
+    "slow": {"path": "/slow", "params": {"delay": 1, "size": 8}},
+    "error": {"path": "/error", "params": {"status": 500}},
+}
+
+
+def _free_port() -> int:
+    """获取一个空闲的本地端口。"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _percentile(values: List[float], percent: float) -> float:
+    """按最近秩法计算百分位数。"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def warmup_finished(response: httpx.Response) -> bool:
+    """/ready的响应表明预热已经结束：已就绪，或者没有仍在进行中的预热阶段。"""
+    if response.status_code == 200:
+        return True
+    if response.status_code != 503:
+        return False
+    stages = response.json().get("stages", {})
+    return bool(stages) and all(stage["status"] not in ("pending", "not_started") for stage in stages.values())
+
+
+def build_config(source: Path, workdir: Path, max_concurrency: int) -> Path:
+    """基于应用的配置文件生成基准测试使用的临时配置。
+
+    保留浏览器、爬虫运行、Markdown生成器和浏览器池等影响爬取性能的配置，
+    关闭结果缓存和限流，并放宽并发上限，使每个请求都真正执行一次爬取。
+
+    Args:
+        source (Path): 应用的配置文件。
+        workdir (Path): 临时目录。
+        max_concurrency (int): 基准测试的最大并发数。
+
+    Returns:
+        Path: 生成的配置文件路径。
+    """
+    data = json.loads(source.read_text(encoding="utf-8"))
+    data["result_cache_config"] = {**data.get("result_cache_config", {}), "enabled": False, "disk_path": ""}
+    data["admission_config"] = {
+        **data.get("admission_config", {}),
+        "max_in_flight": max(max_concurrency, data.get("admission_config", {}).get("max_in_flight", 1)),
+        "max_queue": max_concurrency * 4,
+        "queue_timeout": 600,
+        "client_rate": 0,
+        "domain_rate": 0,
+    }
+    data["job_config"] = {**data.get("job_config", {}), "workers": 0, "db_path": str(workdir / "jobs.sqlite3")}
+    path = workdir / "config.json"
+    path.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
+    return path
+
+
+class AppServer:
+    """在独立进程中运行的爬虫API。"""
+    def __init__(self, config_path: Path, port: int):
+        """初始化AppServer实例。
+
+        Args:
+            config_path (Path): 基准测试使用的配置文件。
+            port (int): 监听端口。
+        """
+        self.config_path = config_path
+        self.port = port
+        self.process: Optional[subprocess.Popen] = None
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def launch(self):
+        """启动uvicorn进程，不等待其开始接受请求。"""
+        env = {**os.environ, "CRAWLER_CONFIG_PATH": str(self.config_path), "CRAWLER_LOG_LEVEL": "WARNING"}
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning"],
+            cwd=str(BACKEND_DIR), env=env,
+        )
+
+    def wait(self, path: str, timeout: float, accept: Callable[[httpx.Response], bool],
+             interval: float = 0.5) -> httpx.Response:
+        """轮询指定路径，直到响应满足条件。
+
+        Args:
+            path (str): 请求路径。
+            timeout (float): 最长等待时间（秒）。
+            accept (Callable): 判断响应是否满足条件的函数。
+            interval (float): 轮询间隔（秒）。
+
+        Returns:
+            httpx.Response: 满足条件的响应。
+        """
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {self.process.returncode}")
+            try:
+                response = httpx.get(self.base_url + path, timeout=1)
+                if accept(response):
+                    return response
+            except httpx.HTTPError:
+                pass
+            time.sleep(interval)
+        raise RuntimeError(f"Timed out waiting for {path}")
+
+    def start(self, timeout: float = 180):
+        """启动uvicorn进程，并等待预热结束（浏览器池预热完成或失败）。"""
+        self.launch()
+        self.wait("/ready", timeout, warmup_finished)
+
+    def stop(self):
+        """停止uvicorn进程。"""
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=60)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+
+
+class RssSampler:
+    """在后台线程中定期采样进程树（包括浏览器子进程）的常驻内存，记录峰值。"""
+    def __init__(self, pid: int, interval: float = 0.2):
+        self.pid = pid
+        self.interval = interval
+        self.peak_mb: Optional[float] = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _sample(self) -> float:
+        process = psutil.Process(self.pid)
+        rss = process.memory_info().rss
+        for child in process.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        return rss / (1024 * 1024)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                rss = self._sample()
+                self.peak_mb = rss if self.peak_mb is None else max(self.peak_mb, rss)
+            except Exception:
+                pass
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+
+async def _scrape_counter(client: httpx.AsyncClient, name: str) -> Optional[float]:
+    """从/metrics中读取计数器的当前值。"""
+    try:
+        text = (await client.get("/metrics")).text
+    except httpx.HTTPError:
+        return None
+    match = re.search(rf"^{name}_total(?:{{[^}}]*}})? ([0-9.eE+-]+)$", text, re.MULTILINE)
+    return float(match.group(1)) if match else None
+
+
+async def run_level(app: AppServer, fixture_url: str, scenario: str, concurrency: int, requests: int,
+                    seed_offset: int, timeout: float) -> Dict:
+    """以固定并发数执行一组请求并汇总结果。
+
+    Args:
+        app (AppServer): 被测的API进程。
+        fixture_url (str): 基准测试站点的根URL。
+        scenario (str): 场景名称，见SCENARIOS。
+        concurrency (int): 并发数。
+        requests (int): 请求总数。
+        seed_offset (int): 页面seed的起始值，保证不同级别之间不会请求相同的页面。
+        timeout (float): 单个请求的超时时间（秒）。
+
+    Returns:
+        Dict: 本级别的统计结果。
+    """
+    spec = SCENARIOS[scenario]
+    latencies, statuses = [], {}
+    failures = 0
+    counter = iter(range(requests))
+
+    async with httpx.AsyncClient(base_url=app.base_url, timeout=timeout) as client:
+        launches_before = await _scrape_counter(client, "crawler_browser_launches")
+
+        async def worker():
+            nonlocal failures
+            for index in counter:
+                params = {**spec["params"], "seed": seed_offset + index}
+                page_url = fixture_url + spec["path"] + "?" + "&".join(f"{k}={v}" for k, v in params.items())
+                started = time.perf_counter()
+                try:
+                    response = await client.get("/api/crawl", params={"url": page_url, "max_age": 0})
+                    status = str(response.status_code)
+                    if response.status_code != 200 or not response.json().get("success"):
+                        failures += 1
+                except httpx.HTTPError as e:
+                    status = type(e).__name__
+                    failures += 1
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        with RssSampler(app.process.pid) as sampler:
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+            elapsed = time.perf_counter() - started
+
+        launches_after = await _scrape_counter(client, "crawler_browser_launches")
+
+    launches = None
+    if launches_before is not None and launches_after is not None:
+        launches = int(launches_after - launches_before)
+    return {
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "requests": requests,
+        "failures": failures,
+        "statuses": statuses,
+        "throughput_rps": requests / elapsed if elapsed else 0.0,
+        "p50_ms": _percentile(latencies, 50) * 1000,
+        "p95_ms": _percentile(latencies, 95) * 1000,
+        "p99_ms": _percentile(latencies, 99) * 1000,
+        "peak_rss_mb": sampler.peak_mb,
+        "browser_launches": launches,
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    """与基线对比，返回超出容忍范围的退化项。
+
+    吞吐量下降、p95延迟或峰值内存上升超过tolerance比例，以及浏览器启动次数增加时视为退化。
+
+    Args:
+        results (List[Dict]): 本次结果。
+        baseline (Dict): 基线文件内容。
+        tolerance (float): 容忍的相对变化比例，例如0.15表示15%。
+
+    Returns:
+        List[str]: 退化项的描述。
+    """
+    previous = {f"{item['scenario']}@{item['concurrency']}": item for item in baseline.get("results", [])}
+    regressions = []
+    for item in results:
+        key = f"{item['scenario']}@{item['concurrency']}"
+        base = previous.get(key)
+        if base is None:
+            continue
+        if item["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{key}: throughput {base['throughput_rps']:.2f} -> {item['throughput_rps']:.2f} req/s")
+        if item["p95_ms"] > base["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {base['p95_ms']:.0f} -> {item['p95_ms']:.0f} ms")
+        if item["peak_rss_mb"] and base.get("peak_rss_mb") and item["peak_rss_mb"] > base["peak_rss_mb"] * (1 + tolerance):
+            regressions.append(f"{key}: peak RSS {base['peak_rss_mb']:.0f} -> {item['peak_rss_mb']:.0f} MB")
+        if item["browser_launches"] is not None and base.get("browser_launches") is not None \
+                and item["browser_launches"] > base["browser_launches"]:
+            regressions.append(f"{key}: browser launches {base['browser_launches']} -> {item['browser_launches']}")
+        if item["failures"] > base["failures"]:
+            regressions.append(f"{key}: failures {base['failures']} -> {item['failures']}")
+    return regressions
+
+
+def print_report(results: List[Dict]):
+    """以表格形式输出结果。"""
+    header = f"{'scenario':<8} {'conc':>4} {'reqs':>5} {'fail':>5} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} " \
+             f"{'p99 ms':>8} {'peak MB':>8} {'launches':>8}"
+    print(header)
+    print("-" * len(header))
+    for item in results:
+        rss = f"{item['peak_rss_mb']:.0f}" if item["peak_rss_mb"] is not None else "n/a"
+        launches = item["browser_launches"] if item["browser_launches"] is not None else "n/a"
+        print(f"{item['scenario']:<8} {item['concurrency']:>4} {item['requests']:>5} {item['failures']:>5} "
+              f"{item['throughput_rps']:>8.2f} {item['p50_ms']:>8.0f} {item['p95_ms']:>8.0f} {item['p99_ms']:>8.0f} "
+              f"{rss:>8} {launches:>8}")
+
+
+async def run(args) -> List[Dict]:
+    """启动站点和API，按场景和并发级别依次执行基准测试。"""
+    concurrency_levels = [int(value) for value in args.concurrency.split(",")]
+    scenarios = [value.strip() for value in args.scenarios.split(",")]
+    for scenario in scenarios:
+        if scenario not in SCENARIOS:
+            raise SystemExit(f"Unknown scenario: {scenario}, choose from {', '.join(SCENARIOS)}")
+
+    fixture = FixtureServer()
+    fixture.start()
+    results = []
+    with tempfile.TemporaryDirectory(prefix="crawler-bench-") as workdir:
+        config_path = build_config(Path(args.config), Path(workdir), max(concurrency_levels))
+        app = AppServer(config_path, _free_port())
+        try:
+            app.start()
+            seed_offset = 0
+            for scenario in scenarios:
+                # 预热一次，避免首个请求的初始化开销计入结果
+                await run_level(app, fixture.base_url, scenario, 1, 1, 10 ** 9, args.timeout)
+                for concurrency in concurrency_levels:
+                    results.append(await run_level(app, fixture.base_url, scenario, concurrency, args.requests,
+                                                   seed_offset, args.timeout))
+                    seed_offset += args.requests
+        finally:
+            app.stop()
+            fixture.stop()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="爬虫API基准测试")
+    parser.add_argument("--scenarios", default="small,large,slow,error", help="逗号分隔的场景名称")
+    parser.add_argument("--concurrency", default="1,4,16", help="逗号分隔的并发级别")
+    parser.add_argument("--requests", type=int, default=50, help="每个并发级别的请求数")
+    parser.add_argument("--timeout", type=float, default=120, help="单个请求的超时时间（秒）")
+    parser.add_argument("--config", default=str(DEFAULT_CONFIG_PATH), help="作为基础的应用配置文件")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="判定为退化的相对变化比例")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为新的基线")
+    parser.add_argument("--output", help="把本次结果写入JSON文件")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_report(results)
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0], "results": results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nBaseline saved to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}, run with --save-baseline to create one")
+        return
+    regressions = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.tolerance)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,211 @@
+"""导入耗时与启动耗时的基准测试。
+
+在全新的子进程中分别测量：
+- 导入app.main的耗时（python -X importtime），并检查crawl4ai、Playwright等重量级模块是否在导入时被加载；
+- 以后台预热和阻塞预热两种方式启动uvicorn（app.main:app）时，进程启动到/health返回200（开始接受请求）
+  以及到预热结束（/ready返回200，或各预热阶段都已完成或失败）的耗时。
+结果与保存的基线对比，可以作为冷启动性能的回归检查运行。
+
+用法（在backend/目录下）：
+    python -m benchmarks.startup                      # 运行并与benchmarks/startup_baseline.json对比
+    python -m benchmarks.startup --save-baseline      # 运行并把结果保存为新的基线
+    python -m benchmarks.startup --repeat 5 --modes background
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from .run import AppServer, BACKEND_DIR, DEFAULT_CONFIG_PATH, _free_port, build_config, warmup_finished
+
+DEFAULT_BASELINE_PATH = Path(__file__).resolve().parent / "startup_baseline.json"
+
+# 不应在导入app.main时加载的重量级模块，它们只在预热或首次爬取时导入
+HEAVY_MODULES = ("crawl4ai", "playwright", "aiohttp", "nltk", "rank_bm25", "lxml", "snowballstemmer")
+
+# 启动方式：startup_config.background_warmup的取值
+MODES = {"background": True, "blocking": False}
+
+
+def measure_import() -> Dict:
+    """在子进程中导入app.main，返回导入耗时、app.main直接导入的模块中最慢的几个，以及被加载的重量级模块。"""
+    started = time.perf_counter()
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import app.main"],
+        cwd=str(BACKEND_DIR), capture_output=True, text=True, check=True,
+    )
+    wall_seconds = time.perf_counter() - started
+    import_seconds, cumulative, heavy = None, {}, set()
+    for line in completed.stderr.splitlines():
+        # 格式为“import time: self [us] | cumulative | imported package”，缩进表示嵌套层级
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, total, name = line.split("|")
+        if not total.strip().isdigit():
+            continue
+        module, depth = name.strip(), (len(name) - len(name.lstrip()) - 1) // 2
+        if module == "app.main":
+            import_seconds = int(total) / 1e6
+        elif depth == 1:
+            # app.main直接导入的模块，嵌套模块的耗时已包含在其中
+            cumulative[module] = int(total) / 1e6
+        if module.split(".")[0] in HEAVY_MODULES:
+            heavy.add(module.split(".")[0])
+    slowest = sorted(cumulative.items(), key=lambda item: item[1], reverse=True)[:5]
+    return {
+        "import_seconds": import_seconds,
+        "wall_seconds": wall_seconds,
+        "heavy_modules": sorted(heavy),
+        "slowest": [{"module": name, "seconds": seconds} for name, seconds in slowest],
+    }
+
+
+def measure_startup(source: Path, mode: str, timeout: float) -> Dict:
+    """以指定的预热方式启动应用，返回开始接受请求和预热结束的耗时。
+
+    Args:
+        source (Path): 作为基础的应用配置文件。
+        mode (str): 启动方式，见MODES。
+        timeout (float): 等待预热结束的最长时间（秒）。
+
+    Returns:
+        Dict: 本次启动的测量结果。
+    """
+    with tempfile.TemporaryDirectory(prefix="crawler-startup-") as workdir:
+        config_path = build_config(source, Path(workdir), 1)
+        data = json.loads(config_path.read_text(encoding="utf-8"))
+        data["startup_config"] = {**data.get("startup_config", {}), "background_warmup": MODES[mode]}
+        config_path.write_text(json.dumps(data, ensure_ascii=False, indent=4), encoding="utf-8")
+
+        app = AppServer(config_path, _free_port())
+        started = time.monotonic()
+        app.launch()
+        try:
+            app.wait("/health", timeout, lambda response: response.status_code == 200, interval=0.05)
+            live_seconds = time.monotonic() - started
+            response = app.wait("/ready", timeout, warmup_finished, interval=0.05)
+            warm_seconds = time.monotonic() - started
+        finally:
+            app.stop()
+    status = response.json()
+    return {
+        "mode": mode,
+        "live_seconds": live_seconds,
+        "warm_seconds": warm_seconds,
+        "ready": status["ready"],
+        "stages": {name: stage.get("seconds") for name, stage in status["stages"].items()},
+    }
+
+
+def summarize(runs: List[Dict], keys: List[str]) -> Dict:
+    """取多次测量的中位数。"""
+    return {key: statistics.median(run[key] for run in runs) for key in keys}
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """与基线对比，返回超出容忍范围的退化项。
+
+    导入耗时、开始接受请求的耗时或预热耗时上升超过tolerance比例，以及导入时加载了新的重量级模块时视为退化。
+
+    Args:
+        results (Dict): 本次结果。
+        baseline (Dict): 基线文件内容。
+        tolerance (float): 容忍的相对变化比例，例如0.25表示25%。
+
+    Returns:
+        List[str]: 退化项的描述。
+    """
+    regressions = []
+    current, previous = results["import"], baseline.get("import", {})
+    if previous.get("import_seconds") and current["import_seconds"] > previous["import_seconds"] * (1 + tolerance):
+        regressions.append(f"import app.main: {previous['import_seconds']:.3f} -> {current['import_seconds']:.3f} s")
+    added = sorted(set(current["heavy_modules"]) - set(previous.get("heavy_modules", [])))
+    if added:
+        regressions.append(f"import app.main now loads: {', '.join(added)}")
+    previous_startup = baseline.get("startup", {})
+    for mode, item in results["startup"].items():
+        base = previous_startup.get(mode)
+        if base is None:
+            continue
+        for key in ("live_seconds", "warm_seconds"):
+            if item[key] > base[key] * (1 + tolerance):
+                regressions.append(f"{mode} {key}: {base[key]:.3f} -> {item[key]:.3f} s")
+    return regressions
+
+
+def print_report(results: Dict):
+    """输出结果。"""
+    item = results["import"]
+    print(f"import app.main: {item['import_seconds']:.3f} s (process wall time {item['wall_seconds']:.3f} s)")
+    print(f"heavy modules loaded at import: {', '.join(item['heavy_modules']) or 'none'}")
+    for entry in item["slowest"]:
+        print(f"  {entry['module']:<40} {entry['seconds']:.3f} s")
+    if results["startup"]:
+        print(f"\n{'mode':<12} {'live s':>8} {'warm s':>8} {'ready':>6}")
+        for mode, entry in results["startup"].items():
+            print(f"{mode:<12} {entry['live_seconds']:>8.3f} {entry['warm_seconds']:>8.3f} {str(entry['ready']):>6}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="导入耗时与启动耗时基准测试")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测量的重复次数，取中位数")
+    parser.add_argument("--modes", default="background,blocking", help="逗号分隔的启动方式，留空则只测量导入耗时")
+    parser.add_argument("--timeout", type=float, default=180, help="等待应用启动和预热结束的最长时间（秒）")
+    parser.add_argument("--config", default=str(DEFAULT_CONFIG_PATH), help="作为基础的应用配置文件")
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE_PATH), help="基线文件")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="判定为退化的相对变化比例")
+    parser.add_argument("--save-baseline", action="store_true", help="把本次结果保存为新的基线")
+    parser.add_argument("--output", help="把本次结果写入JSON文件")
+    args = parser.parse_args()
+
+    modes = [value.strip() for value in args.modes.split(",") if value.strip()]
+    for mode in modes:
+        if mode not in MODES:
+            raise SystemExit(f"Unknown mode: {mode}, choose from {', '.join(MODES)}")
+
+    import_runs = [measure_import() for _ in range(args.repeat)]
+    results = {
+        "import": {
+            **summarize(import_runs, ["import_seconds", "wall_seconds"]),
+            "heavy_modules": sorted({name for run in import_runs for name in run["heavy_modules"]}),
+            "slowest": import_runs[-1]["slowest"],
+        },
+        "startup": {},
+    }
+    for mode in modes:
+        runs = [measure_startup(Path(args.config), mode, args.timeout) for _ in range(args.repeat)]
+        results["startup"][mode] = {
+            **summarize(runs, ["live_seconds", "warm_seconds"]),
+            "ready": all(run["ready"] for run in runs),
+            "stages": runs[-1]["stages"],
+        }
+    print_report(results)
+
+    report = {"created": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": sys.version.split()[0], **results}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+
+    baseline_path = Path(args.baseline)
+    if args.save_baseline:
+        baseline_path.write_text(json.dumps(report, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"\nBaseline saved to {baseline_path}")
+        return
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path}, run with --save-baseline to create one")
+        return
+    regressions = compare(results, json.loads(baseline_path.read_text(encoding="utf-8")), args.tolerance)
+    if regressions:
+        print("\nRegressions against baseline:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+    print("\nNo regressions against baseline")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""URL验证与规范化的微基准测试。
+
+用确定性生成的URL集合（模拟批量和整站爬取中发现的链接：少量主机、大量路径和带跟踪参数的查询），
+对比旧实现（validators.url加两次urlparse）与单次解析的URLUtils.normalize，
+分别测试逐个处理和批量处理（URLUtils.process_urls）的吞吐量，并检查两者的规范化结果一致。
+
+用法（在backend/目录下）：
+    python -m benchmarks.url_normalization
+    python -m benchmarks.url_normalization --urls 200000 --hosts 50 --repeat 5
+"""
+import argparse
+import random
+import time
+from typing import Callable, Dict, List, Tuple
+from urllib.parse import urlparse, urlunparse
+
+import validators
+
+from app.utils.url_utils import URLUtils, _normalize_host
+
+
+def legacy_process_url(url: str) -> str:
+    """旧实现：validators.url验证，再分别为协议检查和规范化各解析一次URL。"""
+    if not validators.url(url):
+        raise ValueError("Invalid URL format")
+    parsed_url = urlparse(url)
+    if urlparse(url).scheme not in ("http", "https"):
+        raise ValueError("Only 'http' and 'https' protocols are supported")
+    scheme = parsed_url.scheme.lower()
+    host = parsed_url.hostname or ""
+    if ":" in host:
+        host = f"[{host}]"
+    try:
+        port = parsed_url.port
+    except ValueError:
+        port = None
+    if port == URLUtils.DEFAULT_PORTS.get(scheme):
+        port = None
+    userinfo = parsed_url.netloc.rpartition("@")[0]
+    netloc = (userinfo + "@" if userinfo else "") + host + (f":{port}" if port is not None else "")
+    return urlunparse(parsed_url._replace(
+        scheme=scheme, netloc=netloc, path=parsed_url.path or "/",
+        fragment="",
+    ))
+
+
+def legacy_process_urls(urls: List[str]) -> Tuple[List[str], Dict[str, str]]:
+    """旧实现的批量处理：逐个调用legacy_process_url。"""
+    processed, errors, seen = [], {}, set()
+    for url in urls:
+        if url in errors:
+            continue
+        try:
+            processed_url = legacy_process_url(url)
+        except ValueError as e:
+            errors[url] = str(e)
+            continue
+        # 与新实现一样按移除跟踪参数并排序后的查询字符串去重
+        base, _, query = processed_url.partition("?")
+        key = f"{base}?{URLUtils.clean_query(query)}"
+        if key not in seen:
+            seen.add(key)
+            processed.append(processed_url)
+    return processed, errors
+
+
+def build_urls(count: int, hosts: int, seed: int = 0) -> List[str]:
+    """生成确定性的URL集合。
+
+    Args:
+        count (int): URL数量。
+        hosts (int): 主机数量。
+        seed (int): 随机种子。
+
+    Returns:
+        List[str]: URL列表，其中约2%为无效URL。
+    """
+    rng = random.Random(seed)
+    host_names = [f"{rng.choice(['www.', 'docs.', 'blog.', ''])}site{index}.example.com" for index in range(hosts)]
+    urls = []
+    for index in range(count):
+        roll = rng.random()
+        if roll < 0.01:
+            urls.append(f"ftp://{rng.choice(host_names)}/file{index}")
+            continue
+        if roll < 0.02:
+            urls.append(f"http://bad_host{index}/page")
+            continue
+        scheme = rng.choice(["http", "https", "HTTPS"])
+        host = rng.choice(host_names)
+        if rng.random() < 0.3:
+            host = host.upper()
+        port = rng.choice(["", "", "", ":443" if scheme != "http" else ":80", ":8080"])
+        path = "/" + "/".join(f"section{rng.randint(0, 50)}" for _ in range(rng.randint(0, 4)))
+        params = [f"id={rng.randint(0, 1000)}", f"page={rng.randint(1, 20)}"]
+        if rng.random() < 0.4:
+            params.append(f"utm_source=feed{rng.randint(0, 5)}")
+        rng.shuffle(params)
+        query = "?" + "&".join(params) if rng.random() < 0.7 else ""
+        fragment = "#top" if rng.random() < 0.1 else ""
+        urls.append(f"{scheme}://{host}{port}{path}{query}{fragment}")
+    return urls
+
+
+def measure(function: Callable[[], object], repeat: int) -> float:
+    """多次执行函数并返回最短耗时（秒），减少调度抖动的影响。"""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def single(process: Callable[[str], str], urls: List[str]):
+    for url in urls:
+        try:
+            process(url)
+        except ValueError:
+            pass
+
+
+def check_equivalence(urls: List[str]) -> int:
+    """检查新旧实现对每个URL的结果一致（有效性、错误信息和规范化后的URL），返回不一致的数量。"""
+    mismatches = 0
+    for url in urls:
+        results = []
+        for process in (legacy_process_url, URLUtils.process_url):
+            try:
+                results.append(process(url))
+            except ValueError as e:
+                results.append(f"error: {e}")
+        if results[0] != results[1]:
+            mismatches += 1
+            if mismatches <= 5:
+                print(f"  结果不一致: {url!r}: {results[0]!r} != {results[1]!r}")
+    return mismatches
+
+
+def main():
+    parser = argparse.ArgumentParser(description="URL验证与规范化微基准测试")
+    parser.add_argument("--urls", type=int, default=100000, help="URL数量")
+    parser.add_argument("--hosts", type=int, default=20, help="主机数量")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测试的重复次数，取最短耗时")
+    args = parser.parse_args()
+
+    urls = build_urls(args.urls, args.hosts)
+    print(f"URL数量: {len(urls)}，主机数量: {args.hosts}")
+    mismatches = check_equivalence(urls[:10000])
+    print(f"新旧实现结果不一致的URL数量（前10000个）: {mismatches}")
+
+    cases = [
+        ("逐个处理", lambda: single(legacy_process_url, urls), lambda: single(URLUtils.process_url, urls)),
+        ("批量处理", lambda: legacy_process_urls(urls), lambda: URLUtils.process_urls(urls)),
+    ]
+    print(f"{'测试':<10}{'旧实现(URL/秒)':>18}{'新实现(URL/秒)':>18}{'加速比':>10}")
+    for name, legacy, current in cases:
+        _normalize_host.cache_clear()
+        legacy_seconds = measure(legacy, args.repeat)
+        current_seconds = measure(current, args.repeat)
+        print(f"{name:<10}{len(urls) / legacy_seconds:>18,.0f}{len(urls) / current_seconds:>18,.0f}"
+              f"{legacy_seconds / current_seconds:>10.1f}x")
+    info = _normalize_host.cache_info()
+    print(f"主机名缓存: 命中{info.hits}次，未命中{info.misses}次")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# 测试在backend/目录下运行，使app包可以被导入
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
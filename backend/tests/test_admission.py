@@ -0,0 +1,150 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app.api import common
+from app.core.admission import AdmissionController, AdmissionRejected
+from app.core.config_loader import ConfigLoader
+
+
+def _controller(**overrides) -> AdmissionController:
+    controller = AdmissionController()
+    controller.configure({**ConfigLoader.default_settings("admission_config"), **overrides})
+    return controller
+
+
+async def _hold(controller, domain, started, release):
+    async with controller.slot(domain):
+        started.set()
+        await release.wait()
+
+
+def test_full_queue_is_rejected_with_503():
+    controller = _controller(max_in_flight=1, max_queue=1, queue_timeout=5)
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.ensure_future(_hold(controller, "a.example", started, release))
+        await started.wait()
+        waiter = asyncio.ensure_future(_hold(controller, "a.example", asyncio.Event(), release))
+        await asyncio.sleep(0)
+        with pytest.raises(AdmissionRejected) as error:
+            async with controller.slot("a.example"):
+                pass
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 503 and error.retry_after >= 1
+    assert controller.stats()["rejected_queue_full"] == 1 and controller.stats()["in_flight"] == 0
+
+
+def test_queue_timeout_is_rejected_with_503():
+    controller = _controller(max_in_flight=1, max_queue=4)
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.ensure_future(_hold(controller, "a.example", started, release))
+        await started.wait()
+        with pytest.raises(AdmissionRejected) as error:
+            async with controller.slot("a.example", deadline=time.monotonic() + 0.05):
+                pass
+        release.set()
+        await holder
+        return error.value
+
+    assert asyncio.run(run()).status_code == 503
+    assert controller.stats()["rejected_timeout"] == 1 and controller.stats()["queue_length"] == 0
+
+
+def test_cancelled_waiters_leave_the_queue():
+    controller = _controller(max_in_flight=1, max_queue=1, queue_timeout=5)
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.ensure_future(_hold(controller, "a.example", started, release))
+        await started.wait()
+        waiter = asyncio.ensure_future(_hold(controller, "a.example", asyncio.Event(), release))
+        await asyncio.sleep(0)
+        assert controller.stats()["queue_length"] == 1
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        # 被取消的请求不再占用队列，新的请求可以排队而不是被拒绝
+        assert controller.stats()["queue_length"] == 0
+        queued_started = asyncio.Event()
+        queued = asyncio.ensure_future(_hold(controller, "a.example", queued_started, release))
+        await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, queued)
+        return queued_started.is_set()
+
+    assert asyncio.run(run())
+    assert controller.stats()["rejected_queue_full"] == 0 and controller.stats()["in_flight"] == 0
+
+
+def test_cancelled_waiter_returns_handed_over_slot():
+    controller = _controller(max_in_flight=1, max_queue=4, queue_timeout=5)
+
+    async def run():
+        started, release = asyncio.Event(), asyncio.Event()
+        holder = asyncio.ensure_future(_hold(controller, "a.example", started, release))
+        await started.wait()
+        waiter_started = asyncio.Event()
+        waiter = asyncio.ensure_future(_hold(controller, "a.example", waiter_started, release))
+        await asyncio.sleep(0)
+        # 名额转交给排队请求的同时该请求被取消
+        release.set()
+        await holder
+        waiter.cancel()
+        await asyncio.gather(waiter, return_exceptions=True)
+        return waiter.cancelled() and not waiter_started.is_set()
+
+    assert asyncio.run(run())
+    assert controller.stats()["in_flight"] == 0 and controller.stats()["queue_length"] == 0
+
+
+def test_domain_rate_limit_rejects_beyond_deadline():
+    controller = _controller(domain_rate=1, domain_burst=1)
+
+    async def run():
+        async with controller.slot("a.example"):
+            pass
+        with pytest.raises(AdmissionRejected) as error:
+            async with controller.slot("a.example", deadline=time.monotonic() + 0.1):
+                pass
+        # 其他域名不受影响
+        async with controller.slot("b.example"):
+            pass
+        return error.value
+
+    error = asyncio.run(run())
+    assert error.status_code == 429 and 0 < error.retry_after <= 1
+    assert controller.stats()["rejected_domain_rate"] == 1
+
+
+def test_client_rate_limit_returns_429_with_retry_after(monkeypatch):
+    controller = _controller(client_rate=0.5, client_burst=2)
+    monkeypatch.setattr(common, "admission", controller)
+    app = FastAPI()
+
+    @app.get("/")
+    async def index(request: Request):
+        common.admit_client(request)
+        return {"ok": True}
+
+    client = TestClient(app)
+    assert [client.get("/").status_code for _ in range(2)] == [200, 200]
+    response = client.get("/")
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "2"
+    assert controller.stats()["rejected_client_rate"] == 1
+
+
+@pytest.mark.parametrize("retry_after, header", [(0.01, "1"), (1.2, "2"), (30, "30")])
+def test_retry_after_is_rounded_up_to_whole_seconds(retry_after, header):
+    error = common.rejected(AdmissionRejected(503, retry_after, "busy"))
+    assert error.status_code == 503 and error.headers == {"Retry-After": header}
@@ -0,0 +1,51 @@
+import logging
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.browser_sessions import DomainSessions, _current_domain
+
+
+class Strategy:
+    def __init__(self, manager):
+        self.browser_manager = manager
+        self.hooks = {}
+
+    def set_hook(self, name, hook):
+        self.hooks[name] = hook
+
+
+class Manager:
+    def __init__(self):
+        self._max_contexts = 10
+
+    def _make_config_signature(self, crawler_run_config):
+        return "base"
+
+
+def test_install_keys_contexts_by_domain():
+    manager = Manager()
+    strategy = Strategy(manager)
+    DomainSessions().install(SimpleNamespace(crawler_strategy=strategy), True, 4)
+
+    assert manager._max_contexts == 4 and "on_page_context_created" in strategy.hooks
+    assert manager._make_config_signature(None) == "base"
+    token = _current_domain.set("example.com")
+    try:
+        assert manager._make_config_signature(None) == "base:example.com"
+    finally:
+        _current_domain.reset(token)
+
+
+@pytest.mark.parametrize("missing", ["_make_config_signature", "_max_contexts"])
+def test_install_falls_back_to_shared_contexts_without_manager_internals(missing, caplog):
+    manager = SimpleNamespace(**{name: value for name, value in (
+        ("_make_config_signature", lambda config: "base"), ("_max_contexts", 10)) if name != missing})
+    strategy = Strategy(manager)
+    with caplog.at_level(logging.WARNING, logger="app.core.browser_sessions"):
+        DomainSessions().install(SimpleNamespace(crawler_strategy=strategy), True, 4)
+
+    assert "共用浏览器上下文" in caplog.text
+    assert getattr(manager, "_max_contexts", 10) == 10
+    # 资源拦截钩子仍然安装
+    assert "on_page_context_created" in strategy.hooks
@@ -0,0 +1,168 @@
+import asyncio
+import gzip
+import zlib
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.api import middleware
+from app.api.middleware import CompressionMiddleware, negotiate_encoding
+from app.core.config_loader import ConfigLoader
+
+BODY = "compressible text " * 200
+
+requires_brotli = pytest.mark.skipif(middleware.brotli is None, reason="brotli is not installed")
+requires_zstd = pytest.mark.skipif(middleware.zstandard is None, reason="zstandard is not installed")
+
+
+@pytest.fixture
+def settings(monkeypatch):
+    settings = ConfigLoader.default_settings("compression_config")
+    loader = SimpleNamespace(snapshot=SimpleNamespace(compression_config=settings))
+    monkeypatch.setattr(middleware, "get_config_loader", lambda: loader)
+    return settings
+
+
+@pytest.fixture
+def client(settings):
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get("/text")
+    async def text():
+        return PlainTextResponse(BODY)
+
+    @app.get("/small")
+    async def small():
+        return PlainTextResponse("tiny")
+
+    @app.get("/vary")
+    async def vary():
+        return PlainTextResponse(BODY, headers={"Vary": "Origin"})
+
+    @app.get("/image")
+    async def image():
+        return Response(b"\x89PNG" * 1000, media_type="image/png")
+
+    @app.get("/stream")
+    async def stream():
+        return StreamingResponse((f"record {index}\n" for index in range(3)), media_type="application/x-ndjson")
+
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("", None),
+    ("gzip", "gzip"),
+    ("GZIP;q=0.5", "gzip"),
+    ("identity", None),
+    ("gzip;q=0", None),
+    ("*", next(iter(middleware.ENCODINGS))),
+    ("*;q=0.5, gzip;q=0", next((name for name in middleware.ENCODINGS if name != "gzip"), None)),
+    ("gzip;q=abc", None),
+    ("deflate, compress", None),
+    pytest.param("gzip;q=0.5, br;q=0.9", "br", marks=requires_brotli),
+    pytest.param("gzip, br", "br", marks=requires_brotli),
+    pytest.param("br;q=0.1, gzip", "gzip", marks=requires_brotli),
+    pytest.param("gzip, br, zstd", "zstd", marks=requires_zstd),
+])
+def test_negotiate_encoding(accept_encoding, expected):
+    assert negotiate_encoding(accept_encoding) == expected
+
+
+def test_unavailable_encodings_are_never_chosen(monkeypatch):
+    monkeypatch.setattr(middleware, "ENCODINGS", {"gzip": middleware.ENCODINGS["gzip"]})
+    assert negotiate_encoding("zstd, br") is None
+    assert negotiate_encoding("zstd, br, gzip;q=0.1") == "gzip"
+
+
+def test_gzip_response_is_compressed(client):
+    response = client.get("/text", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert int(response.headers["content-length"]) < len(BODY)
+    assert response.text == BODY
+
+
+@pytest.mark.parametrize("accept_encoding", ["identity", "gzip;q=0", "identity;q=1, *;q=0"])
+def test_identity_is_served_uncompressed(client, accept_encoding):
+    response = client.get("/text", headers={"Accept-Encoding": accept_encoding})
+    assert "content-encoding" not in response.headers
+    assert response.text == BODY
+
+
+@requires_brotli
+def test_brotli_response_is_compressed(client):
+    response = client.get("/text", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.text == BODY
+
+
+@requires_zstd
+def test_zstd_response_is_compressed(client):
+    response = client.get("/text", headers={"Accept-Encoding": "gzip, br, zstd"})
+    assert response.headers["content-encoding"] == "zstd"
+    assert response.text == BODY
+
+
+def test_small_and_incompressible_responses_are_not_compressed(client):
+    for path in ("/small", "/image"):
+        response = client.get(path, headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+
+def test_disabled_compression_passes_through(client, settings):
+    settings["enabled"] = False
+    assert "content-encoding" not in client.get("/text", headers={"Accept-Encoding": "gzip"}).headers
+
+
+def test_existing_vary_header_is_merged(client):
+    response = client.get("/vary", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["vary"] == "Origin, Accept-Encoding"
+
+
+@pytest.mark.parametrize("headers, expected", [
+    ([], [(b"vary", b"Accept-Encoding")]),
+    ([(b"Vary", b"Origin")], [(b"Vary", b"Origin, Accept-Encoding")]),
+    ([(b"Vary", b"accept-encoding")], [(b"Vary", b"accept-encoding")]),
+    ([(b"Vary", b"*")], [(b"Vary", b"*")]),
+    ([(b"Vary", b"")], [(b"Vary", b"Accept-Encoding")]),
+])
+def test_add_vary(headers, expected):
+    middleware._add_vary(headers, b"Accept-Encoding")
+    assert headers == expected
+
+
+def test_streaming_response_is_compressed(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert "content-length" not in response.headers
+    assert response.text == "record 0\nrecord 1\nrecord 2\n"
+
+
+def test_streaming_chunks_are_flushed_immediately(settings):
+    records = [f'{{"index": {index}}}\n'.encode() for index in range(3)]
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/x-ndjson")]})
+        for record in records:
+            await send({"type": "http.response.body", "body": record, "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {"type": "http", "method": "GET", "path": "/", "headers": [(b"accept-encoding", b"gzip")]}
+    asyncio.run(CompressionMiddleware(app)(scope, None, send))
+
+    # 每个分片单独解压即可得到对应的记录，不需要等待后续分片
+    decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    bodies = [message["body"] for message in messages[1:]]
+    assert [decompressor.decompress(body) for body in bodies[:3]] == records
+    assert messages[-1]["more_body"] is False
+    assert gzip.decompress(b"".join(bodies)) == b"".join(records)
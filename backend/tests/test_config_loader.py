@@ -0,0 +1,157 @@
+import asyncio
+import builtins
+import json
+import threading
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+
+from app import dependencies
+from app.core.config_loader import ConfigLoader
+
+
+@pytest.fixture
+def config_path(tmp_path, monkeypatch):
+    """使用临时配置文件，并在测试前后重置进程内共享的ConfigLoader。"""
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"output_format": "markdown", "batch_config": {"max_urls": 5}}), encoding="utf-8")
+    monkeypatch.setenv("CRAWLER_CONFIG_PATH", str(path))
+    dependencies.get_config_loader.cache_clear()
+    yield path
+    dependencies.get_config_loader().close()
+    dependencies.get_config_loader.cache_clear()
+
+
+def test_dependencies_do_not_reopen_config_or_start_threads(config_path, monkeypatch):
+    app = FastAPI()
+
+    @app.get("/")
+    def read(output_format: str = Depends(dependencies.get_output_format),
+             batch_config: dict = Depends(dependencies.get_batch_config),
+             stream_config: dict = Depends(dependencies.get_stream_config)):
+        return {"output_format": output_format, "max_urls": batch_config["max_urls"]}
+
+    opened = []
+    real_open = builtins.open
+
+    def counting_open(file, *args, **kwargs):
+        if str(file) == str(config_path):
+            opened.append(file)
+        return real_open(file, *args, **kwargs)
+
+    with TestClient(app) as client:
+        # 第一个请求创建ConfigLoader、监听线程和线程池中的工作线程
+        assert client.get("/").json() == {"output_format": "markdown", "max_urls": 5}
+        threads = threading.active_count()
+        monkeypatch.setattr(builtins, "open", counting_open)
+        for _ in range(1000):
+            assert client.get("/").status_code == 200
+        monkeypatch.setattr(builtins, "open", real_open)
+        assert threading.active_count() <= threads
+    assert opened == []
+
+
+@pytest.mark.parametrize("value", ["not a section", ["a", "b"], 3])
+def test_invalid_settings_section_falls_back_to_defaults(tmp_path, value):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"batch_config": value}), encoding="utf-8")
+    loader = ConfigLoader(str(path), watch=False)
+    assert loader.snapshot.batch_config == ConfigLoader.default_settings("batch_config")
+
+
+def _snapshot(tmp_path, config):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps(config), encoding="utf-8")
+    return ConfigLoader(str(path), watch=False).snapshot
+
+
+def test_every_settings_section_is_exposed_on_the_snapshot(tmp_path):
+    snapshot = _snapshot(tmp_path, {"batch_config": {"max_urls": 5}})
+    for section in ConfigLoader.SETTINGS_SECTIONS:
+        assert getattr(snapshot, section) is snapshot.settings[section]
+    assert snapshot.batch_config == {**ConfigLoader.default_settings("batch_config"), "max_urls": 5}
+    with pytest.raises(AttributeError):
+        snapshot.missing_config
+
+
+@pytest.mark.parametrize("section, key, value", [
+    ("worker_config", "mode", "threads"),
+    ("worker_config", "mode", 1),
+    ("sink_config", "parquet_compression", "rar"),
+    ("batch_config", "max_urls", -1),
+    ("batch_config", "max_urls", True),
+    ("resource_blocking_config", "resource_types", ["image", 1]),
+])
+def test_invalid_setting_values_fall_back_to_defaults(tmp_path, section, key, value):
+    snapshot = _snapshot(tmp_path, {section: {key: value}})
+    assert getattr(snapshot, section)[key] == ConfigLoader.default_settings(section)[key]
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("HTML", "html"),
+    ("fit_markdown", "fit_markdown"),
+    ("pdf", "markdown"),
+    ({"format": "html"}, "markdown"),
+    (["html"], "markdown"),
+    (3, "markdown"),
+])
+def test_output_format_falls_back_to_markdown(tmp_path, value, expected):
+    assert _snapshot(tmp_path, {"output_format": value}).output_format == expected
+
+
+@pytest.mark.parametrize("value", ["BYPASS", ["BYPASS"], 3])
+def test_non_object_crawl4ai_sections_fall_back_to_defaults(tmp_path, value):
+    from crawl4ai.async_configs import BrowserConfig, CrawlerRunConfig
+
+    snapshot = _snapshot(tmp_path, {"browser_config": value, "crawler_run_config": value,
+                                    "markdown_generator_config": value, "content_filter_choice": value})
+    assert snapshot.browser_config.headless == BrowserConfig().headless
+    assert snapshot.crawler_run_config.cache_mode == CrawlerRunConfig().cache_mode
+    assert snapshot.markdown_generator is None
+
+
+@pytest.mark.parametrize("value, expected", [("BYPASS", "BYPASS"), ("bypass", "ENABLED"), (["BYPASS"], "ENABLED"), (3, "ENABLED")])
+def test_invalid_cache_mode_falls_back_to_enabled(tmp_path, value, expected):
+    from crawl4ai.async_configs import CacheMode
+
+    snapshot = _snapshot(tmp_path, {"crawler_run_config": {"cache_mode": value}})
+    assert snapshot.crawler_run_config.cache_mode == CacheMode[expected]
+
+
+def test_loop_listener_runs_on_the_event_loop_thread(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text(json.dumps({"admission_config": {"max_queue": 1}}), encoding="utf-8")
+    loader = ConfigLoader(str(path), watch=False)
+
+    async def run():
+        calls = []
+        done = asyncio.Event()
+
+        def listener(old_snapshot, new_snapshot):
+            calls.append((threading.get_ident(), old_snapshot.version, new_snapshot.admission_config["max_queue"]))
+            done.set()
+
+        loader.add_loop_listener(listener, asyncio.get_running_loop())
+        path.write_text(json.dumps({"admission_config": {"max_queue": 2}}), encoding="utf-8")
+        # 与配置监听线程一样，在其他线程中重新加载配置
+        reloader = threading.Thread(target=loader._reload_config)
+        reloader.start()
+        await asyncio.wait_for(done.wait(), 5)
+        reloader.join()
+        return calls
+
+    assert asyncio.run(run()) == [(threading.get_ident(), 1, 2)]
+
+
+def test_loop_listener_is_called_directly_without_running_loop(tmp_path):
+    path = tmp_path / "config.json"
+    path.write_text("{}", encoding="utf-8")
+    loader = ConfigLoader(str(path), watch=False)
+    calls = []
+    loop = asyncio.new_event_loop()
+    loader.add_loop_listener(lambda old, new: calls.append(new.version), loop)
+
+    loader._reload_config()
+    loop.close()
+    assert calls == [2]
@@ -0,0 +1,97 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import deep_crawl
+from app.core.config_loader import ConfigLoader
+from app.core.deep_crawl import BloomFilter, Frontier
+from app.models.schemas import CrawlResponse
+
+
+@pytest.mark.parametrize("capacity, error_rate", [(1000, 0.01), (10000, 0.001)])
+def test_bloom_filter_false_positive_rate_stays_within_bound(capacity, error_rate):
+    bloom = BloomFilter(capacity, error_rate)
+    added = sum(bloom.add(f"http://example.com/page/{index}") for index in range(capacity))
+    # 已加入的元素一定能被查到，不会重复爬取；加入时的误判只会让极少数元素被当作已存在
+    assert all(f"http://example.com/page/{index}" in bloom for index in range(capacity))
+    assert not bloom.add("http://example.com/page/0")
+    assert bloom.count == added >= capacity * (1 - error_rate)
+
+    probes = 20000
+    false_positives = sum(f"http://other.example/{index}" in bloom for index in range(probes))
+    assert false_positives / probes <= error_rate * 2
+
+
+def test_frontier_round_robins_between_hosts():
+    frontier = Frontier(per_host_concurrency=10)
+    for index in range(3):
+        frontier.push(f"http://a.example/{index}", 1)
+    frontier.push("http://b.example/0", 1)
+    frontier.push("http://c.example/0", 1)
+
+    order = [frontier.pop()[0] for _ in range(5)]
+    assert order == ["http://a.example/0", "http://b.example/0", "http://c.example/0",
+                     "http://a.example/1", "http://a.example/2"]
+    assert frontier.pop() is None and len(frontier) == 0
+
+
+def test_frontier_pops_shallow_urls_first():
+    frontier = Frontier()
+    frontier.push("http://a.example/deep", 2)
+    frontier.push("http://a.example/shallow", 1)
+    frontier.push("http://a.example/also-shallow", 1)
+
+    assert [frontier.pop() for _ in range(2)] == [("http://a.example/shallow", 1), ("http://a.example/also-shallow", 1)]
+
+
+def test_frontier_limits_per_host_concurrency():
+    frontier = Frontier(per_host_concurrency=1)
+    for url in ("http://a.example/0", "http://a.example/1", "http://b.example/0"):
+        frontier.push(url, 0)
+
+    assert frontier.pop() == ("http://a.example/0", 0)
+    assert frontier.pop() == ("http://b.example/0", 0)
+    # 两个主机都已达到并发上限
+    assert frontier.pop() is None and len(frontier) == 1
+    frontier.done("http://a.example/0")
+    assert frontier.pop() == ("http://a.example/1", 0)
+
+
+SITE = {
+    "http://a.example/": ["/1", "http://a.example/1?utm_source=x", "http://a.example:8080/", "http://b.example/"],
+    "http://a.example/1": ["/"],
+    "http://a.example:8080/": [],
+    "http://b.example/": ["http://b.example/2"],
+    "http://b.example/2": [],
+}
+
+
+def _crawl_site(monkeypatch, exclude_external_links: bool, **overrides):
+    async def fake_crawl_url(url, browser_config, crawler_run_config, output_format, max_age=None):
+        return CrawlResponse(success=True, content=url, links=SITE.get(url, []))
+
+    monkeypatch.setattr(deep_crawl, "crawl_url", fake_crawl_url)
+    settings = {**ConfigLoader.default_settings("deep_crawl_config"), "max_concurrency": 1, **overrides}
+    run_config = SimpleNamespace(exclude_external_links=exclude_external_links)
+
+    async def run():
+        return [(url, depth) async for url, depth, _ in deep_crawl.iter_site(
+            "http://a.example/", None, run_config, "markdown", settings)]
+
+    return asyncio.run(run())
+
+
+def test_site_crawl_stays_on_seed_origin_when_excluding_external_links(monkeypatch):
+    assert _crawl_site(monkeypatch, True) == [("http://a.example/", 0), ("http://a.example/1", 1)]
+
+
+def test_site_crawl_follows_external_links_when_allowed(monkeypatch):
+    pages = _crawl_site(monkeypatch, False)
+    assert sorted(pages) == [("http://a.example/", 0), ("http://a.example/1", 1), ("http://a.example:8080/", 1),
+                             ("http://b.example/", 1), ("http://b.example/2", 2)]
+
+
+def test_site_crawl_respects_depth_and_page_limits(monkeypatch):
+    assert len(_crawl_site(monkeypatch, False, max_depth=1)) == 4
+    assert len(_crawl_site(monkeypatch, False, max_pages=2)) == 2
@@ -0,0 +1,137 @@
+import pytest
+
+from app.core import job_store
+from app.core.job_store import CANCELLED, FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+from app.core.job_worker import JobWorkerPool
+
+
+class Clock:
+    """可手动推进的time.time替身。"""
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(job_store.time, "time", clock)
+    return clock
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    yield store
+    store.close()
+
+
+def test_lease_takes_each_job_once(store, clock):
+    job = store.create("http://example.com/", "markdown", None, 3)
+
+    leased = store.lease("worker-a", 30)
+    assert leased["id"] == job["id"] and leased["status"] == RUNNING and leased["attempts"] == 1
+    assert store.lease("worker-b", 30) is None
+
+
+def test_expired_lease_is_taken_over(store, clock):
+    job = store.create("http://example.com/", "markdown", None, 3)
+    store.lease("worker-a", 30)
+
+    clock.now += 31
+    leased = store.lease("worker-b", 30)
+    assert leased["id"] == job["id"] and leased["lease_owner"] == "worker-b" and leased["attempts"] == 2
+    # 原工作者失去租约后无法续期或提交结果
+    assert not store.renew(job["id"], "worker-a", 30)
+    assert not store.complete(job["id"], "worker-a", {"success": True})
+    assert store.complete(job["id"], "worker-b", {"success": True})
+    assert store.get(job["id"])["status"] == SUCCEEDED
+
+
+def test_renew_keeps_lease(store, clock):
+    job = store.create("http://example.com/", "markdown", None, 3)
+    store.lease("worker-a", 30)
+
+    clock.now += 20
+    assert store.renew(job["id"], "worker-a", 30)
+    clock.now += 20
+    assert store.lease("worker-b", 30) is None
+
+
+def test_expired_leases_stop_at_max_attempts(store, clock):
+    job = store.create("http://example.com/", "markdown", None, 2)
+
+    assert store.lease("worker-a", 30)["attempts"] == 1
+    clock.now += 31
+    assert store.lease("worker-b", 30)["attempts"] == 2
+    clock.now += 31
+    # 第二次租约过期后不再被领取，而是标记为失败
+    assert store.lease("worker-c", 30) is None
+    failed = store.get(job["id"])
+    assert failed["status"] == FAILED and failed["attempts"] == 2
+    assert failed["lease_owner"] is None and "maximum number of attempts" in failed["error_message"]
+
+
+def test_fail_requeues_with_delay_or_fails(store, clock):
+    job = store.create("http://example.com/", "markdown", None, 2)
+    store.lease("worker-a", 30)
+
+    assert store.fail(job["id"], "worker-a", "timeout", 10)
+    assert store.get(job["id"])["status"] == QUEUED
+    assert store.lease("worker-a", 30) is None
+    clock.now += 10
+    assert store.lease("worker-a", 30)["attempts"] == 2
+
+    assert store.fail(job["id"], "worker-a", "timeout", None)
+    assert store.get(job["id"])["status"] == FAILED
+
+
+def test_cancel_stops_queued_and_running_jobs(store, clock):
+    queued = store.create("http://example.com/a", "markdown", None, 3)
+    running = store.create("http://example.com/b", "markdown", None, 3)
+    clock.now += 1
+    # 先创建的任务在运行中，另一个任务仍在排队
+    assert store.lease("worker-a", 30)["id"] == queued["id"]
+
+    assert store.cancel(running["id"])
+    assert store.cancel(queued["id"])
+    assert store.get(queued["id"])["status"] == CANCELLED
+    assert store.get(running["id"])["status"] == CANCELLED
+    # 已取消的任务不会被领取，工作者也无法再提交结果
+    clock.now += 31
+    assert store.lease("worker-b", 30) is None
+    assert not store.complete(queued["id"], "worker-a", {"success": True})
+    assert not store.cancel(queued["id"])
+    assert not store.cancel("missing")
+
+
+def test_purge_removes_only_finished_jobs(store, clock):
+    done = store.create("http://example.com/a", "markdown", None, 1)
+    store.lease("worker-a", 30)
+    store.complete(done["id"], "worker-a", {"success": True})
+    pending = store.create("http://example.com/b", "markdown", None, 1)
+
+    clock.now += 100
+    assert store.purge(clock.now - 50) == 1
+    assert store.get(done["id"]) is None and store.get(pending["id"]) is not None
+
+
+@pytest.mark.parametrize("attempts, expected", [(1, 2), (2, 4), (3, 8), (4, 10), (5, None)])
+def test_retry_delay_backs_off_exponentially(attempts, expected):
+    pool = JobWorkerPool()
+    pool.settings = {"backoff_base": 2, "backoff_max": 10}
+    assert pool._retry_delay(attempts, 5) == expected
+
+
+def test_store_survives_reopen(tmp_path):
+    path = tmp_path / "jobs.sqlite3"
+    store = JobStore(path)
+    job = store.create("http://example.com/", "markdown", 60, 3)
+    store.close()
+
+    reopened = JobStore(path)
+    assert reopened.get(job["id"])["max_age"] == 60
+    assert reopened.lease("worker-a", 30)["id"] == job["id"]
+    reopened.close()
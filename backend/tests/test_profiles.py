@@ -0,0 +1,107 @@
+import json
+import logging
+
+import pytest
+
+from app.core.config_loader import ConfigLoader
+from app.core.profiles import ProfileFactory
+from app.models.schemas import MarkdownProfile
+
+DATA = {
+    "content_filter_choice": "pruning",
+    "markdown_generator_config": {"options": {"ignore_links": True}},
+    "pruning_content_filter_config": {"threshold": 0.5},
+    "BM25_content_filter_config": {"bm25_threshold": 1.0},
+}
+
+
+def _snapshot(tmp_path, name: str = "config.json", **overrides):
+    path = tmp_path / name
+    path.write_text(json.dumps({**DATA, "crawler_run_config": {"cache_mode": "BYPASS"}, **overrides}), encoding="utf-8")
+    return ConfigLoader(str(path), watch=False).snapshot
+
+
+def test_same_profile_returns_same_generator():
+    factory = ProfileFactory()
+    first = factory.markdown_generator(DATA, MarkdownProfile(content_filter="bm25", user_query="docs"))
+    second = factory.markdown_generator(DATA, MarkdownProfile(content_filter="BM25", user_query="docs"))
+
+    assert first is second
+    assert factory.stats() == {"hits": 1, "builds": 1, "filters": 1, "generators": 1}
+
+
+@pytest.mark.parametrize("profile", [
+    MarkdownProfile(content_filter="bm25", user_query="other"),
+    MarkdownProfile(content_filter="pruning", user_query="docs"),
+    MarkdownProfile(content_filter="bm25", user_query="docs", bm25_threshold=2.0),
+    MarkdownProfile(content_filter="bm25", user_query="docs", ignore_links=False),
+    MarkdownProfile(content_filter="none"),
+])
+def test_different_profiles_build_different_generators(profile):
+    factory = ProfileFactory()
+    base = factory.markdown_generator(DATA, MarkdownProfile(content_filter="bm25", user_query="docs"))
+    assert factory.markdown_generator(DATA, profile) is not base
+
+
+def test_content_filter_is_shared_between_generators():
+    factory = ProfileFactory()
+    linked = factory.markdown_generator(DATA, MarkdownProfile(content_filter="bm25", user_query="docs", ignore_links=False))
+    plain = factory.markdown_generator(DATA, MarkdownProfile(content_filter="bm25", user_query="docs"))
+
+    assert linked is not plain and linked.content_filter is plain.content_filter
+    assert factory.stats()["filters"] == 1
+
+
+def test_profile_without_filter_uses_configured_filter():
+    factory = ProfileFactory()
+    generator = factory.markdown_generator(DATA, MarkdownProfile(ignore_images=True))
+    assert type(generator.content_filter).__name__ == "PruningContentFilter"
+    assert factory.markdown_generator(DATA, MarkdownProfile(content_filter="none")).content_filter is None
+
+
+def test_invalid_requested_filter_is_rejected():
+    with pytest.raises(ValueError, match="Invalid content filter: fancy"):
+        ProfileFactory().markdown_generator(DATA, MarkdownProfile(content_filter="fancy"))
+
+
+@pytest.mark.parametrize("choice", ["fancy", 3, ["pruning"]])
+def test_invalid_configured_filter_falls_back_to_none(choice, caplog):
+    data = {**DATA, "content_filter_choice": choice}
+    with caplog.at_level(logging.WARNING, logger="app.core.profiles"):
+        generator = ProfileFactory().markdown_generator(data, MarkdownProfile(ignore_links=False))
+
+    assert generator.content_filter is None
+    assert "content_filter_choice" in caplog.text
+    # 请求中指定的内容过滤器不受配置值影响
+    generator = ProfileFactory().markdown_generator(data, MarkdownProfile(content_filter="bm25"))
+    assert type(generator.content_filter).__name__ == "BM25ContentFilter"
+
+
+def test_run_config_is_memoized_per_snapshot(tmp_path):
+    factory = ProfileFactory()
+    snapshot = _snapshot(tmp_path)
+    profile = MarkdownProfile(content_filter="bm25", user_query="docs")
+
+    assert factory.run_config(snapshot, None) is snapshot.crawler_run_config
+    assert factory.run_config(snapshot, MarkdownProfile()) is snapshot.crawler_run_config
+    config = factory.run_config(snapshot, profile)
+    assert config is not snapshot.crawler_run_config
+    assert factory.run_config(snapshot, MarkdownProfile(content_filter="bm25", user_query="docs")) is config
+
+    # 配置变更后的新快照重新生成配置，但复用相同参数的Markdown生成器
+    reloaded = _snapshot(tmp_path, "reloaded.json", crawler_run_config={"cache_mode": "BYPASS", "word_count_threshold": 5})
+    new_config = factory.run_config(reloaded, profile)
+    assert new_config is not config and new_config.markdown_generator is config.markdown_generator
+    assert new_config.word_count_threshold == 5
+
+
+def test_capacity_evicts_least_recently_used_generators():
+    factory = ProfileFactory()
+    factory.configure({"max_cached_profiles": 2})
+    profiles = [MarkdownProfile(content_filter="bm25", user_query=query) for query in ("a", "b", "c")]
+    first = factory.markdown_generator(DATA, profiles[0])
+    for profile in profiles[1:]:
+        factory.markdown_generator(DATA, profile)
+
+    assert factory.stats()["generators"] == 2
+    assert factory.markdown_generator(DATA, profiles[0]) is not first
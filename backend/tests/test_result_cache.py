@@ -0,0 +1,166 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from app.core.config_loader import ConfigLoader
+from app.core.profiles import ProfileFactory
+from app.core.result_cache import ResultCache
+from app.models.schemas import CrawlResponse, MarkdownProfile
+from app.utils.fingerprint import config_fingerprint, request_fingerprint
+
+URL = "http://example.com/"
+
+CONFIG = {
+    "output_format": "markdown",
+    "content_filter_choice": "pruning",
+    "browser_config": {"headless": True, "text_mode": True},
+    "crawler_run_config": {"cache_mode": "BYPASS", "exclude_external_links": True, "excluded_tags": ["script"]},
+    "markdown_generator_config": {"options": {"ignore_links": True}},
+    "pruning_content_filter_config": {"threshold": 0.5},
+}
+
+
+def _loader(tmp_path, name: str = "config.json", **overrides) -> ConfigLoader:
+    path = tmp_path / name
+    path.write_text(json.dumps({**CONFIG, **overrides}), encoding="utf-8")
+    return ConfigLoader(str(path), watch=False)
+
+
+def _cache(tmp_path=None, **overrides) -> ResultCache:
+    cache = ResultCache()
+    cache.configure({**ConfigLoader.default_settings("result_cache_config"), "enabled": True, "ttl_seconds": 0,
+                     "max_memory_bytes": 10 ** 6, "disk_path": str(tmp_path / "cache.sqlite3") if tmp_path else "",
+                     **overrides})
+    return cache
+
+
+def _response(content: str = "# page") -> CrawlResponse:
+    return CrawlResponse(success=True, content=content)
+
+
+def test_fingerprint_is_stable_across_loaders(tmp_path):
+    first = _loader(tmp_path, "first.json").snapshot
+    second = _loader(tmp_path, "second.json").snapshot
+
+    assert first.crawler_run_config is not second.crawler_run_config
+    assert config_fingerprint(first.browser_config) == config_fingerprint(second.browser_config)
+    assert (request_fingerprint(first.browser_config, first.crawler_run_config)
+            == request_fingerprint(second.browser_config, second.crawler_run_config))
+
+
+def test_fingerprint_changes_with_config(tmp_path):
+    first = _loader(tmp_path, "first.json").snapshot
+    changed = _loader(tmp_path, "second.json", pruning_content_filter_config={"threshold": 0.7}).snapshot
+
+    assert (request_fingerprint(first.browser_config, first.crawler_run_config)
+            != request_fingerprint(changed.browser_config, changed.crawler_run_config))
+
+
+def test_config_reload_invalidates_derived_fingerprints(tmp_path):
+    old = _loader(tmp_path, "old.json").snapshot
+    new = _loader(tmp_path, "new.json", crawler_run_config={**CONFIG["crawler_run_config"], "word_count_threshold": 5}).snapshot
+    profiled = ProfileFactory().run_config(old, MarkdownProfile(content_filter="bm25", user_query="docs"))
+    default_fingerprint = request_fingerprint(old.browser_config, old.crawler_run_config)
+    profile_fingerprint = request_fingerprint(old.browser_config, profiled)
+    assert profile_fingerprint != default_fingerprint
+
+    cache = _cache(tmp_path)
+
+    async def run():
+        await cache.set(URL, default_fingerprint, "markdown", _response())
+        await cache.set(URL, profile_fingerprint, "markdown", _response())
+        await cache.set(URL, profile_fingerprint, "html,markdown", _response())
+        cache.handle_config_reload(old, new)
+        return [await cache.get(URL, fingerprint, output_format) for fingerprint, output_format in (
+            (default_fingerprint, "markdown"), (profile_fingerprint, "markdown"), (profile_fingerprint, "html,markdown"),
+        )]
+
+    assert asyncio.run(run()) == [None, None, None]
+    assert cache.stats()["invalidations"] == 3
+
+
+def test_reload_without_crawler_config_change_keeps_entries(tmp_path):
+    old = _loader(tmp_path, "old.json").snapshot
+    new = _loader(tmp_path, "new.json", output_format="html").snapshot
+    fingerprint = request_fingerprint(old.browser_config, old.crawler_run_config)
+    cache = _cache()
+
+    async def run():
+        await cache.set(URL, fingerprint, "markdown", _response())
+        cache.handle_config_reload(old, new)
+        return await cache.get(URL, fingerprint, "markdown")
+
+    assert asyncio.run(run()) == _response()
+
+
+def test_failed_results_are_never_cached(tmp_path):
+    cache = _cache(tmp_path)
+
+    async def run():
+        await cache.set(URL, "fp", "markdown", CrawlResponse(success=False, error_message="boom"))
+        return await cache.get(URL, "fp", "markdown")
+
+    assert asyncio.run(run()) is None
+    assert cache.stats()["stores"] == 0 and cache.stats()["disk_bytes"] == 0
+
+
+def test_memory_tier_evicts_least_recently_used_within_byte_budget():
+    payload_size = len(_response("x" * 100).model_dump_json())
+    cache = _cache(max_memory_bytes=payload_size * 2)
+
+    async def run():
+        await cache.set("http://example.com/a", "fp", "markdown", _response("x" * 100))
+        await cache.set("http://example.com/b", "fp", "markdown", _response("x" * 100))
+        # 访问a之后b成为最久未使用的条目
+        assert await cache.get("http://example.com/a", "fp", "markdown") is not None
+        await cache.set("http://example.com/c", "fp", "markdown", _response("x" * 100))
+        return [await cache.get(f"http://example.com/{name}", "fp", "markdown") is not None for name in "abc"]
+
+    assert asyncio.run(run()) == [True, False, True]
+    stats = cache.stats()
+    assert stats["memory_bytes"] <= payload_size * 2 and stats["evictions"] == 1
+
+
+def test_disk_tier_serves_entries_after_memory_is_cleared(tmp_path):
+    cache = _cache(tmp_path)
+
+    async def run():
+        await cache.set(URL, "fp", "markdown", _response())
+        cache._memory.clear()
+        cache._memory_bytes = 0
+        return await cache.get(URL, "fp", "markdown")
+
+    assert asyncio.run(run()) == _response()
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    # 重新打开同一个磁盘文件后仍然可以命中
+    reopened = _cache(tmp_path)
+    assert asyncio.run(reopened.get(URL, "fp", "markdown")) == _response()
+    reopened.close()
+
+
+@pytest.mark.parametrize("ttl_seconds, max_age, expected", [
+    (0, None, True),
+    (10, None, False),
+    (0, 10, False),
+    (0, 0, False),
+    (100, 50, True),
+])
+def test_ttl_and_max_age(tmp_path, monkeypatch, ttl_seconds, max_age, expected):
+    cache = _cache(tmp_path, ttl_seconds=ttl_seconds)
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now)
+    asyncio.run(cache.set(URL, "fp", "markdown", _response()))
+    monkeypatch.setattr(time, "time", lambda: now + 30)
+
+    assert (asyncio.run(cache.get(URL, "fp", "markdown", max_age)) is not None) is expected
+    cache.close()
+
+
+def test_cache_key_uses_canonical_url():
+    assert (ResultCache.make_key("http://example.com/?b=2&a=1&utm_source=x", "fp", "markdown")
+            == ResultCache.make_key("http://example.com/?a=1&b=2", "fp", "markdown"))
+    assert ResultCache.make_key(URL, "fp", "markdown") != ResultCache.make_key(URL, "fp", "html")
@@ -0,0 +1,109 @@
+import asyncio
+
+import pytest
+
+from app.core.single_flight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flights = SingleFlight()
+    calls = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def crawl():
+            calls.append(1)
+            await release.wait()
+            return "result"
+
+        waiters = [asyncio.ensure_future(flights.do("key", crawl)) for _ in range(3)]
+        await asyncio.sleep(0)
+        assert flights.in_flight == 1
+        release.set()
+        return await asyncio.gather(*waiters)
+
+    assert asyncio.run(run()) == ["result"] * 3
+    assert calls == [1] and flights.in_flight == 0
+    assert flights.stats()["executed"] == 1 and flights.stats()["coalesced"] == 2
+
+
+def test_cancelled_waiter_does_not_cancel_shared_call():
+    flights = SingleFlight()
+
+    async def run():
+        release = asyncio.Event()
+
+        async def crawl():
+            await release.wait()
+            return "result"
+
+        first = asyncio.ensure_future(flights.do("key", crawl))
+        second = asyncio.ensure_future(flights.do("key", crawl))
+        await asyncio.sleep(0)
+        # 发起调用的请求被取消，另一个请求仍然得到结果
+        first.cancel()
+        await asyncio.sleep(0)
+        assert first.cancelled() and flights.in_flight == 1
+        release.set()
+        return await second
+
+    assert asyncio.run(run()) == "result"
+
+
+def test_call_finishes_after_all_waiters_are_cancelled():
+    flights = SingleFlight()
+    finished = []
+
+    async def run():
+        release = asyncio.Event()
+
+        async def crawl():
+            await release.wait()
+            finished.append(True)
+
+        waiters = [asyncio.ensure_future(flights.do("key", crawl)) for _ in range(2)]
+        await asyncio.sleep(0)
+        for waiter in waiters:
+            waiter.cancel()
+        await asyncio.gather(*waiters, return_exceptions=True)
+        release.set()
+        while flights.in_flight:
+            await asyncio.sleep(0)
+
+    asyncio.run(run())
+    assert finished == [True]
+
+
+def test_exceptions_reach_every_waiter_and_key_is_released():
+    flights = SingleFlight()
+
+    async def run():
+        release = asyncio.Event()
+
+        async def crawl():
+            await release.wait()
+            raise RuntimeError("boom")
+
+        waiters = [asyncio.ensure_future(flights.do("key", crawl)) for _ in range(2)]
+        await asyncio.sleep(0)
+        release.set()
+        results = await asyncio.gather(*waiters, return_exceptions=True)
+        # 失败的调用不会被后续请求复用
+        retried = await flights.do("key", lambda: asyncio.sleep(0, "retried"))
+        return results, retried
+
+    results, retried = asyncio.run(run())
+    assert [str(result) for result in results] == ["boom", "boom"]
+    assert retried == "retried"
+
+
+@pytest.mark.parametrize("keys, executed", [(["a", "a"], 1), (["a", "b"], 2)])
+def test_calls_are_coalesced_by_key(keys, executed):
+    flights = SingleFlight()
+
+    async def run():
+        return await asyncio.gather(*(flights.do(key, lambda: asyncio.sleep(0.01, key)) for key in keys))
+
+    asyncio.run(run())
+    assert flights.stats()["executed"] == executed
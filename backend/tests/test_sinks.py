@@ -0,0 +1,123 @@
+import asyncio
+import gzip
+import json
+import threading
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from app.api.routers import crawl
+from app.core import sinks
+from app.core.config_loader import ConfigLoader
+from app.models.schemas import CrawlResponse, SinkRequest
+
+
+def _settings(tmp_path, **overrides) -> dict:
+    return {**ConfigLoader.default_settings("sink_config"), "enabled": True, "output_dir": str(tmp_path), **overrides}
+
+
+async def _write_all(sink, responses, output_format="markdown"):
+    for index, response in enumerate(responses):
+        await sink.write(f"http://example.com/{index}", response, output_format)
+    return await sink.close()
+
+
+def test_jsonl_sink_writes_one_record_per_line(tmp_path):
+    sink = sinks.open_sink("jsonl", "pages", _settings(tmp_path), {"kind": "batch"})
+    summary = asyncio.run(_write_all(sink, [
+        CrawlResponse(success=True, content="# a"),
+        CrawlResponse(success=False, error_message="boom"),
+    ]))
+
+    assert summary.files == ["pages-00001.jsonl"] and summary.records == 2
+    lines = [json.loads(line) for line in (tmp_path / "pages" / "pages-00001.jsonl").read_text("utf-8").splitlines()]
+    assert [(line["url"], line["success"], line["content"]) for line in lines] == [
+        ("http://example.com/0", True, "# a"),
+        ("http://example.com/1", False, None),
+    ]
+    assert lines[1]["error_message"] == "boom"
+    assert summary.bytes == (tmp_path / "pages" / "pages-00001.jsonl").stat().st_size
+
+
+def test_jsonl_sink_rotates_by_size(tmp_path):
+    sink = sinks.open_sink("jsonl", "rotated", _settings(tmp_path, buffer_records=2, rotate_bytes=300), {})
+    summary = asyncio.run(_write_all(sink, [CrawlResponse(success=True, content="x" * 200) for _ in range(5)]))
+
+    assert summary.files == [f"rotated-0000{index}.jsonl" for index in range(1, 6)]
+    assert sum(len((tmp_path / "rotated" / name).read_text("utf-8").splitlines()) for name in summary.files) == 5
+
+
+def test_existing_output_files_are_not_overwritten(tmp_path):
+    (tmp_path / "kept").mkdir()
+    (tmp_path / "kept" / "kept-00001.jsonl").write_text("old\n", encoding="utf-8")
+    sink = sinks.open_sink("jsonl", "kept", _settings(tmp_path), {})
+    summary = asyncio.run(_write_all(sink, [CrawlResponse(success=True, content="new")]))
+
+    assert summary.files == ["kept-00002.jsonl"]
+    assert (tmp_path / "kept" / "kept-00001.jsonl").read_text("utf-8") == "old\n"
+
+
+def test_warc_sink_writes_resource_and_conversion_records(tmp_path):
+    sink = sinks.open_sink("warc", "archive", _settings(tmp_path), {"kind": "site"})
+    summary = asyncio.run(_write_all(sink, [
+        CrawlResponse(success=True, contents={"html": "<p>a</p>", "markdown": "a"}),
+        CrawlResponse(success=False, error_message="boom"),
+    ], "html,markdown"))
+
+    assert summary.files == ["archive-00001.warc.gz"]
+    data = gzip.decompress((tmp_path / "archive" / "archive-00001.warc.gz").read_bytes()).decode("utf-8")
+    types = [line.split(": ")[1] for line in data.splitlines() if line.startswith("WARC-Type: ")]
+    assert types == ["warcinfo", "resource", "conversion", "metadata"]
+    resource_id = data.split("WARC-Type: resource\r\nWARC-Record-ID: ")[1].split("\r\n")[0]
+    assert f"WARC-Refers-To: {resource_id}" in data
+    assert "error: boom" in data
+
+
+def test_flush_keeps_at_most_two_batches_in_memory(tmp_path):
+    release = threading.Event()
+
+    class SlowSink(sinks.JSONLSink):
+        def _write_batch(self, batch):
+            release.wait(5)
+            return super()._write_batch(batch)
+
+    async def run():
+        sink = SlowSink(tmp_path / "slow", "slow", _settings(tmp_path, buffer_records=2), {})
+        response = CrawlResponse(success=True, content="x")
+        for index in range(3):
+            # 第一批交给后台线程写入，第二批继续在内存中缓冲
+            await sink.write(f"http://example.com/{index}", response, "markdown")
+        assert sink._pending is not None and len(sink._buffer) == 1
+
+        # 第二批也满时等待第一批写完
+        blocked = asyncio.ensure_future(sink.write("http://example.com/3", response, "markdown"))
+        await asyncio.sleep(0.1)
+        assert not blocked.done()
+        release.set()
+        await blocked
+        return await sink.close()
+
+    summary = asyncio.run(run())
+    assert summary.records == 4
+    assert len((tmp_path / "slow" / "slow-00001.jsonl").read_text("utf-8").splitlines()) == 4
+
+
+@pytest.mark.parametrize("name", ["../escape", "a/b", "..", ".hidden", "x" * 65])
+def test_sink_name_cannot_leave_output_directory(name):
+    with pytest.raises(ValidationError):
+        SinkRequest(format="jsonl", name=name)
+
+
+def test_parquet_without_pyarrow_is_a_client_error(tmp_path, monkeypatch):
+    monkeypatch.setattr(sinks, "pyarrow", None)
+    with pytest.raises(HTTPException) as error:
+        crawl._open_sink(SinkRequest(format="parquet"), _settings(tmp_path), "markdown", {})
+    assert error.value.status_code == 400
+    assert "pyarrow" in error.value.detail
+
+
+def test_disabled_sinks_are_rejected(tmp_path):
+    with pytest.raises(HTTPException) as error:
+        crawl._open_sink(SinkRequest(format="jsonl"), _settings(tmp_path, enabled=False), "markdown", {})
+    assert error.value.status_code == 403